@@ -0,0 +1,157 @@
+# Imports
+from frame_store import read_matches, read_shots
+from create_minute_data import build_match_frames, collapse_frames
+from match_figure import match_figure
+from writers import animation_writer, gif_palette, FILE_EXTENSIONS
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import shutil
+import tempfile
+import time
+import os
+from PIL import Image
+from sys import argv
+
+FPS = 30
+
+
+def benchmark_encoders(code:str=None, formats:list[str]=None, output_dir:str=None) -> list[dict]:
+    '''
+    Draws the frames of one match once, then times encoding them in each animation format and compares the encode time and file size against
+    saving a GIF with Pillow's `Image.save`, the way `main.py` did before it had its own writers. Prints a table of the results and returns them.
+
+    :param code: Match code of the match to encode, which must be in the saved frame store. Uses the first saved match if None. Default value:
+        `None`
+    :type code: str
+    :param formats: Formats to benchmark, from the keys of `writers.FILE_EXTENSIONS`. Formats that need ffmpeg are skipped if it isn't on the
+        PATH. Uses every format if None. Default value: `None`
+    :type formats: list[str]
+    :param output_dir: Folder to keep the encoded animations in. They are written to a temporary folder and deleted if None. Default value: `None`
+    :type output_dir: str
+    :returns results: One dictionary per encoder with the `format`, `writer`, encode time in `seconds`, file size in `bytes`, and time and size
+        relative to the Pillow GIF baseline.
+    :rtype results: list[dict]
+    '''
+    plt.switch_backend('Agg')
+    if formats is None:
+        formats = list(FILE_EXTENSIONS)
+
+    matches = read_matches()
+    match = matches.iloc[0] if code is None else matches[matches['match_code'] == code].iloc[0]
+    shots = read_shots()
+    minute_data = collapse_frames(build_match_frames(
+        match['h_team'], match['a_team'], match['match_code'], match['max_min'], shots[shots['match_id'] == match['match_id']]
+    ))
+    durations = (minute_data['frames'].to_numpy() * int(1000 / FPS)).tolist()
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_encoders_') as tmp_dir:
+        if output_dir is None:
+            output_dir = tmp_dir
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+
+        # The frames are mapped from a file in the temporary folder. The mapping is closed when _draw_and_encode returns, before the folder is
+        # deleted
+        results = _draw_and_encode(match, minute_data, durations, formats, output_dir, f'{tmp_dir}/frames.npy')
+
+    baseline = results[0]
+    for result in results:
+        result['relative_time'] = result['seconds'] / baseline['seconds']
+        result['relative_size'] = result['bytes'] / baseline['bytes']
+
+    print(f'\n{"Format":<8}{"Writer":<16}{"Time (s)":>10}{"Size (KB)":>12}{"Time vs GIF":>14}{"Size vs GIF":>14}')
+    for result in results:
+        print(
+            f'{result["format"]:<8}{result["writer"]:<16}{result["seconds"]:>10.2f}{result["bytes"]/1024:>12.1f}'
+            f'{result["relative_time"]:>14.2f}{result["relative_size"]:>14.2f}'
+        )
+    return results
+
+
+def _draw_and_encode(match:pd.Series, minute_data:pd.DataFrame, durations:list[int], formats:list[str], output_dir:str,
+                     frames_path:str) -> list[dict]:
+    '''
+    Draws every frame of the match once to a memory-mapped file at `frames_path`, so only encoding is timed, then encodes the frames with
+    Pillow's GIF writer and the writer for each of `formats`. Returns the result of `_time_encoder` for each, with the Pillow GIF first.
+    '''
+    print(f'Drawing {minute_data.shape[0]} frames for {match["match_code"]}...')
+    figure = match_figure()
+    figure.set_match(match['h_team'], match['a_team'], minute_data)
+    width, height = figure.fig.canvas.get_width_height()
+    frames = np.lib.format.open_memmap(frames_path, mode='w+', dtype=np.uint8, shape=(minute_data.shape[0], height, width, 4))
+    for f in range(minute_data.shape[0]):
+        frames[f] = figure.frame(f)
+    frames.flush()
+
+    results = []
+    path = f'{output_dir}/{match["match_code"]}_pillow.gif'
+    results.append(_time_encoder('gif', path, lambda: _save_pillow_gif(frames, durations, path)))
+
+    ffmpeg = shutil.which('ffmpeg')
+    for animation_format in formats:
+        if animation_format in ('mp4', 'webm') and ffmpeg is None:
+            print(f'Skipping {animation_format}: ffmpeg not found on the PATH.')
+            continue
+        path = f'{output_dir}/{match["match_code"]}.{FILE_EXTENSIONS[animation_format]}'
+
+        def encode():
+            palette = gif_palette([frames[0], frames[-1]]) if animation_format == 'gif' else None
+            with animation_writer(path, animation_format, palette, FPS) as writer:
+                for f in range(frames.shape[0]):
+                    writer.write(frames[f], durations[f])
+            return type(writer).__name__
+
+        results.append(_time_encoder(animation_format, path, encode))
+    return results
+
+
+def _time_encoder(animation_format:str, path:str, encode) -> dict:
+    '''
+    Runs `encode`, which writes an animation to `path` and returns the name of the writer it used, and returns how long it took and the size of
+    the file.
+    '''
+    print(f'Encoding {animation_format}...')
+    start = time.monotonic()
+    writer = encode()
+    seconds = time.monotonic() - start
+    return {'format':animation_format, 'writer':writer, 'seconds':seconds, 'bytes':os.path.getsize(path)}
+
+
+def _save_pillow_gif(frames:np.ndarray, durations:list[int], path:str) -> str:
+    '''
+    Saves `frames` as a GIF with Pillow's `Image.save`, converting each frame the same way as matplotlib's PillowWriter, as a baseline.
+    '''
+    images = (Image.fromarray(np.array(frame)).convert('RGB') for frame in frames)
+    first_frame = next(images)
+    first_frame.save(path, save_all=True, append_images=images, duration=durations, loop=0)
+    return 'Image.save'
+
+
+if __name__ == '__main__':
+    code = None
+    formats = None
+    output_dir = None
+    if len(argv) > 1:
+        cl_args = argv[1:]
+        if cl_args[0] in ('-h','--help'):
+            print('''
+    -h\t\tPrint this help page.
+    -m\t\tMatch code of the match to encode (default: first match in the frame store)
+    -f\t\tComma separated formats to benchmark from gif, mp4, webm, webp and apng (default: all)
+    -o\t\tFolder to keep the encoded animations in (default: deleted after the run)'''
+            )
+            exit()
+        if len(cl_args) % 2 != 0:
+            raise ValueError(f'No value provided for command line option {cl_args[-1]}.')
+        for key, value in zip(cl_args[::2], cl_args[1::2]):
+            match key:
+                case "-m":
+                    code = value
+                case "-f":
+                    formats = value.split(',')
+                case "-o":
+                    output_dir = value
+                case _:
+                    raise ValueError(f'Unknown command line argument {key} with value {value}')
+    benchmark_encoders(code, formats, output_dir)
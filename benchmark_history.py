@@ -0,0 +1,318 @@
+# Imports
+import hashlib
+import itertools
+import json
+import os
+import platform
+import subprocess
+import numpy as np
+from math import comb
+from sys import argv
+
+HISTORY_PATH = './output/benchmarks/history.jsonl'
+# Library versions kept with each result, so a slowdown can be put down to an upgrade rather than a commit
+LIBRARIES = ['numpy', 'pandas', 'matplotlib', 'pillow']
+# Largest number of ways to split the runs between baseline and candidate tried exactly. Past this, random splits are sampled
+EXACT_PERMUTATIONS = 20000
+N_PERMUTATIONS = 10000
+
+
+def git_commit() -> str:
+    '''
+    Returns the short hash of the checked out commit, with '-dirty' added if there are uncommitted changes, or None if this isn't a git
+    checkout.
+    '''
+    # Ask git about the checkout this file is in, wherever the benchmarks are run from
+    repo_dir = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=repo_dir, capture_output=True, text=True,
+                                check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{commit}-dirty' if status.strip() else commit
+
+
+def cpu_model() -> str:
+    '''
+    Returns the CPU model name, falling back to `platform.processor()` where /proc/cpuinfo isn't available.
+    '''
+    try:
+        with open('/proc/cpuinfo', 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('model name'):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def machine_fingerprint(environment:dict) -> str:
+    '''
+    Returns a short hash identifying the machine a benchmark report was made on, from its OS, architecture, CPU model and CPU count. Python
+    and library versions are left out so results from before and after an upgrade on the same machine can be compared.
+    '''
+    key = '|'.join(str(environment.get(k)) for k in ('system', 'processor', 'cpu', 'cpus'))
+    return hashlib.sha1(key.encode()).hexdigest()[:12]
+
+
+class BenchmarkHistory:
+    '''
+    Benchmark results over time, kept as a JSON lines file with one line per benchmark case per run of `benchmarks.run_benchmarks`. Each line
+    is keyed by the commit the benchmarks ran on, a fingerprint of the machine they ran on, and the case and dataset names, and holds every
+    timed run so slowdowns can be tested for with `compare`.
+
+        history = BenchmarkHistory()
+        history.record(run_benchmarks(['figure']))
+        regressions = [c for c in history.compare('a1b2c3d') if c['regression']]
+    '''
+
+    def __init__(self, path:str=HISTORY_PATH) -> None:
+        '''
+        :param path: JSON lines file to keep the history in. Default value: `'./output/benchmarks/history.jsonl'`
+        :type path: str
+        '''
+        self.path = path
+
+    def record(self, report:dict, commit:str=None) -> int:
+        '''
+        Appends every result in a report returned by `benchmarks.run_benchmarks` to the history and returns the number of results added.
+        The report is recorded against `commit`, or if None the commit saved in the report, falling back to the checked out commit.
+        '''
+        if commit is None:
+            commit = report.get('commit') or git_commit() or 'unknown'
+        environment = report['environment']
+        machine = machine_fingerprint(environment)
+        libraries = {library: environment.get(library) for library in LIBRARIES}
+        lines = []
+        for result in report['results']:
+            lines.append(json.dumps({
+                'commit':commit, 'machine':machine, 'created':report['created'], 'name':result['name'], 'dataset':result['dataset'],
+                'items':result['items'], 'unit':result['unit'], 'seconds':result['seconds'], 'peak_memory':result['peak_memory'],
+                'python':environment.get('python'), 'libraries':libraries
+            }))
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+        return len(lines)
+
+    def results(self, commit:str=None, machine:str=None, names:list[str]=None) -> list[dict]:
+        '''
+        Returns the recorded results in the order they were recorded, optionally only those for commits starting with `commit`, on `machine`,
+        or for cases starting with any of `names` (so 'figure' matches both 'figure.update' and 'figure.frame').
+        '''
+        results = []
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip() == '':
+                        continue
+                    result = json.loads(line)
+                    if commit is not None and not result['commit'].startswith(commit):
+                        continue
+                    if machine is not None and result['machine'] != machine:
+                        continue
+                    if names is not None and not any(result['name'].startswith(name) for name in names):
+                        continue
+                    results.append(result)
+        except FileNotFoundError:
+            pass
+        return results
+
+    def commits(self, machine:str=None) -> list[str]:
+        '''
+        Returns every commit with results on `machine` (or any machine if None), in the order they were first recorded.
+        '''
+        return list(dict.fromkeys(result['commit'] for result in self.results(machine=machine)))
+
+    def compare(self, baseline:str, candidate:str=None, machine:str=None, names:list[str]=None, alpha:float=0.05,
+                threshold:float=0.05) -> list[dict]:
+        '''
+        Compares the timings of each benchmark case at `candidate` with those at `baseline` on the same machine. Every timed run recorded for
+        a commit is pooled, so benchmarking a commit more than once makes the comparison more sensitive. A case is flagged as a regression if
+        it is more than `threshold` slower at the median and a one-sided permutation test on the log run times gives a p-value below `alpha`.
+        With too few runs the test can't give a p-value below `alpha` at all (see `min_p_value`), so those cases are marked `too_few_runs`.
+
+        :param baseline: Commit to compare against. A prefix of the hash is enough.
+        :type baseline: str
+        :param candidate: Commit to compare. The last commit recorded on `machine` if None. Default value: `None`
+        :type candidate: str
+        :param machine: Fingerprint of the machine to compare results from. The machine with the latest results for `candidate` if None.
+            Default value: `None`
+        :type machine: str
+        :param names: Only compare cases starting with one of these names, e.g. ['create_minute_data', 'figure', 'encode']. Compares every
+            case if None. Default value: `None`
+        :type names: list[str]
+        :param alpha: Significance level of the permutation test. Default value: `0.05`
+        :type alpha: float
+        :param threshold: Smallest relative slowdown of the median flagged as a regression. Default value: `0.05`
+        :type threshold: float
+        :returns comparisons: One comparison per case and dataset recorded at both commits, with the `name`, `dataset`, number of runs
+            `n_baseline` and `n_candidate`, their `baseline_median` and `candidate_median`, the `ratio` of the medians, the `p_value`, whether
+            it is a `regression`, whether it has `too_few_runs` to be flagged at `alpha`, and any `changed` library versions as (baseline,
+            candidate) pairs.
+        :rtype comparisons: list[dict]
+        '''
+        if candidate is None:
+            candidate_results = self.results(machine=machine)
+            if len(candidate_results) == 0:
+                raise ValueError(f'No benchmark results recorded in {self.path}.')
+            candidate = candidate_results[-1]['commit']
+        candidate_results = self.results(candidate, machine, names)
+        if len(candidate_results) == 0:
+            raise ValueError(f'No benchmark results recorded for commit {candidate}.')
+        if machine is None:
+            machine = candidate_results[-1]['machine']
+            candidate_results = [result for result in candidate_results if result['machine'] == machine]
+        baseline_results = self.results(baseline, machine, names)
+        if len(baseline_results) == 0:
+            raise ValueError(f'No benchmark results recorded for commit {baseline} on machine {machine}. Please select from {self.commits(machine)}.')
+
+        comparisons = []
+        baseline_cases = _group(baseline_results)
+        for (name, dataset), results in _group(candidate_results).items():
+            if (name, dataset) not in baseline_cases:
+                continue
+            before = np.array([s for result in baseline_cases[(name, dataset)] for s in result['seconds']])
+            after = np.array([s for result in results for s in result['seconds']])
+            ratio = float(np.median(after) / np.median(before))
+            p_value = permutation_test(np.log(before), np.log(after))
+            too_few_runs = min_p_value(before.size, after.size) >= alpha
+            libraries_before, libraries_after = baseline_cases[(name, dataset)][-1]['libraries'], results[-1]['libraries']
+            comparisons.append({
+                'name':name, 'dataset':dataset, 'n_baseline':before.size, 'n_candidate':after.size, 'baseline_median':float(np.median(before)),
+                'candidate_median':float(np.median(after)), 'ratio':ratio, 'p_value':p_value,
+                'regression':bool(ratio > 1 + threshold and p_value < alpha), 'too_few_runs':too_few_runs,
+                'changed':{library: (libraries_before.get(library), libraries_after.get(library)) for library in LIBRARIES
+                           if libraries_before.get(library) != libraries_after.get(library)}
+            })
+        return comparisons
+
+
+def _group(results:list[dict]) -> dict:
+    groups = {}
+    for result in results:
+        groups.setdefault((result['name'], result['dataset']), []).append(result)
+    return groups
+
+
+def permutation_test(before:np.ndarray, after:np.ndarray, seed:int=0) -> float:
+    '''
+    Returns the one-sided p-value for `after` being larger than `before` on average, from the share of ways of splitting the pooled samples
+    into groups of the same sizes whose difference in means is at least the one observed. Every split is tried if there are at most
+    `EXACT_PERMUTATIONS` of them, and `N_PERMUTATIONS` random splits are tried otherwise. No distribution is assumed, which suits the
+    handful of skewed run times a benchmark gives.
+    '''
+    pooled = np.concatenate([before, after])
+    n, k = pooled.size, after.size
+    observed = after.mean() - before.mean()
+    total = pooled.sum()
+    if comb(n, k) <= EXACT_PERMUTATIONS:
+        splits = np.array(list(itertools.combinations(range(n), k)))
+    else:
+        rng = np.random.default_rng(seed)
+        splits = np.argsort(rng.random((N_PERMUTATIONS, n)), axis=1)[:, :k]
+    after_sums = pooled[splits].sum(axis=1)
+    differences = after_sums / k - (total - after_sums) / (n - k)
+    # Allow for rounding in the sums so the observed split always counts as at least as extreme as itself
+    return float(np.mean(differences >= observed - 1e-12))
+
+
+def min_p_value(n_before:int, n_after:int) -> float:
+    '''
+    Returns the smallest p-value `permutation_test` can give for `n_before` and `n_after` runs, which is when the observed split is the most
+    extreme of every way of splitting the runs. For example, 3 runs of each commit can only be split 20 ways, so the p-value is never below
+    0.05, while 5 runs of each can be split 252 ways.
+    '''
+    return 1 / comb(n_before + n_after, n_after)
+
+
+def print_comparisons(comparisons:list[dict], baseline:str, candidate:str) -> None:
+    '''
+    Prints a table of comparisons returned by `BenchmarkHistory.compare`, followed by the regressions and any library upgrades between the
+    two commits.
+    '''
+    print(f'\nComparing {candidate} against {baseline}')
+    print(f'{"Benchmark":<28}{"Data":<11}{"Baseline (s)":>14}{"Candidate (s)":>15}{"Change":>9}{"p":>8}')
+    for c in comparisons:
+        flag = '  SLOWER' if c['regression'] else ('  TOO FEW RUNS' if c.get('too_few_runs') else '')
+        print(f'{c["name"]:<28}{c["dataset"]:<11}{c["baseline_median"]:>14.4f}{c["candidate_median"]:>15.4f}{c["ratio"]-1:>+9.1%}{c["p_value"]:>8.3f}{flag}')
+    regressions = [c for c in comparisons if c['regression']]
+    if len(regressions) == 0:
+        print('\nNo significant slowdowns found.')
+    else:
+        slower = ', '.join(f'{c["name"]} ({c["dataset"]})' for c in regressions)
+        print(f'\n{len(regressions)} significant slowdown(s): {slower}')
+    too_few = [c for c in comparisons if c.get('too_few_runs')]
+    if len(too_few) > 0:
+        cases = ', '.join(f'{c["name"]} ({c["dataset"]}, {c["n_baseline"]} and {c["n_candidate"]} runs)' for c in too_few)
+        print(f'Too few runs to flag a slowdown in {cases}. Record more runs of both commits, e.g. with benchmarks.py -r 5.')
+    changed = {library: versions for c in comparisons for library, versions in c['changed'].items()}
+    for library, (before, after) in changed.items():
+        print(f'{library} changed from {before} to {after}.')
+
+
+if __name__ == '__main__':
+    path = HISTORY_PATH
+    baseline = None
+    candidate = None
+    machine = None
+    names = None
+    alpha = 0.05
+    threshold = 0.05
+    reports = []
+    if len(argv) > 1:
+        cl_args = argv[1:]
+        if cl_args[0] in ('-h','--help'):
+            print('''
+    -h\t\tPrint this help page.
+    -f\t\tJSON lines file the history is kept in (default ./output/benchmarks/history.jsonl)
+    -a\t\tComma separated benchmark report(s) saved by benchmarks.py to add to the history, against the commit saved in each report (or the checked out commit if it has none)
+    -b\t\tBaseline commit to compare against. Lists the recorded commits if not given
+    -c\t\tCandidate commit to compare (default: the last commit recorded)
+    -m\t\tMachine fingerprint to compare results from (default: the machine with the latest candidate results)
+    -n\t\tComma separated benchmark names to compare, e.g. create_minute_data,figure,encode (default: all)
+    -p\t\tSignificance level of the slowdown test (default 0.05)
+    -t\t\tSmallest relative slowdown flagged, e.g. 0.05 for 5% (default 0.05)
+
+    Exits with status 1 if any significant slowdown is found.'''
+            )
+            exit()
+        if len(cl_args) % 2 != 0:
+            raise ValueError(f'No value provided for command line option {cl_args[-1]}.')
+        for key, value in zip(cl_args[::2], cl_args[1::2]):
+            match key:
+                case "-f":
+                    path = value
+                case "-a":
+                    reports = value.split(',')
+                case "-b":
+                    baseline = value
+                case "-c":
+                    candidate = value
+                case "-m":
+                    machine = value
+                case "-n":
+                    names = value.split(',')
+                case "-p":
+                    alpha = float(value)
+                case "-t":
+                    threshold = float(value)
+                case _:
+                    raise ValueError(f'Unknown command line argument {key} with value {value}')
+
+    history = BenchmarkHistory(path)
+    for report_path in reports:
+        with open(report_path, 'r', encoding='utf-8') as f:
+            n = history.record(json.load(f))
+        print(f'Added {n} results from {report_path} to {path}.')
+    if baseline is None:
+        if len(reports) == 0:
+            print('Recorded commits:', history.commits(machine))
+        exit()
+    if candidate is None and len(history.results(machine=machine)) > 0:
+        candidate = history.results(machine=machine)[-1]['commit']
+    comparisons = history.compare(baseline, candidate, machine, names, alpha, threshold)
+    print_comparisons(comparisons, baseline, candidate)
+    if any(c['regression'] for c in comparisons):
+        exit(1)
@@ -0,0 +1,356 @@
+# Imports
+from frame_store import read_matches, read_shots
+from create_minute_data import create_minute_data, build_match_frames, collapse_frames
+from get_shot_data import shot_tables
+from match_figure import MatchFigure
+from writers import GifWriter, gif_palette
+from synthetic import generate_season
+from understat_server import StandInServer
+from fetch import UnderstatFetcher
+from util import prob
+from benchmark_history import BenchmarkHistory, HISTORY_PATH, cpu_model, git_commit
+import matplotlib
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import PIL
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+import json
+import os
+from datetime import datetime
+from sys import argv
+
+FPS = 30
+BENCHMARK_DIR = './output/benchmarks'
+# Shot counts util.prob is timed at, from a quiet match for one team to far more shots than any team takes in a match
+PROB_SHOT_COUNTS = [5, 10, 20, 40]
+
+
+class Dataset:
+    '''
+    Matches and shots to run the benchmarks on, with the frame tables for each match built the first time they are needed.
+    '''
+
+    def __init__(self, name:str, matches:pd.DataFrame, shots:pd.DataFrame, fixtures:list[dict]=None, match_shots:dict=None) -> None:
+        '''
+        :param name: Name of the dataset in the results, e.g. 'bundled'.
+        :type name: str
+        :param matches: Match-level DataFrame as returned by `get_league_shot_data`.
+        :type matches: pd.DataFrame
+        :param shots: Shot-level DataFrame as returned by `get_league_shot_data`.
+        :type shots: pd.DataFrame
+        :param fixtures: Understat fixture list for the matches, needed to benchmark fetching. Default value: `None`
+        :type fixtures: list[dict]
+        :param match_shots: Understat shot data for each match, keyed by match ID, needed to benchmark fetching. Default value: `None`
+        :type match_shots: dict
+        '''
+        self.name = name
+        self.matches = matches.reset_index(drop=True)
+        self.shots = shots[shots['match_id'].isin(self.matches['match_id'])].reset_index(drop=True)
+        self.fixtures = fixtures
+        self.match_shots = match_shots
+        self._frames = None
+
+    @property
+    def frames(self) -> list[pd.DataFrame]:
+        '''
+        Collapsed frame table for each match, as rendered by `main.py`.
+        '''
+        if self._frames is None:
+            shots_by_match = {id: shots for id, shots in self.shots.groupby('match_id', sort=False)}
+            self._frames = [
+                collapse_frames(build_match_frames(m.h_team, m.a_team, m.match_code, m.max_min, shots_by_match.get(m.match_id, self.shots.iloc[:0])))
+                for m in self.matches.itertuples(index=False)
+            ]
+        return self._frames
+
+
+def bundled_dataset(n_matches:int=None) -> Dataset:
+    '''
+    Returns the first `n_matches` matches (or all of them if None) saved in the frame store in the data folder.
+    '''
+    matches = read_matches()
+    if n_matches is not None:
+        matches = matches.iloc[:n_matches]
+    return Dataset('bundled', matches, read_shots())
+
+
+def synthetic_dataset(n_matches:int=10, seed:int=0) -> Dataset:
+    '''
+    Returns `n_matches` matches from a season made by `synthetic.generate_season`, along with their Understat responses so fetching can be
+    benchmarked against a `StandInServer`.
+    '''
+    fixtures, match_shots = generate_season('EPL', '2025', n_matches=n_matches, seed=seed)
+    matches, shots = shot_tables(fixtures, [match_shots[f['id']] for f in fixtures])
+    return Dataset('synthetic', matches.drop(columns='datetime'), shots, fixtures, match_shots)
+
+
+def bench_prob(dataset:Dataset):
+    '''
+    util.prob for every goal count up to 3, on samples of the dataset's shots of each size in `PROB_SHOT_COUNTS`.
+    '''
+    rng = np.random.default_rng(0)
+    xG = dataset.shots['xG'].to_numpy()
+    for n_shots in PROB_SHOT_COUNTS:
+        samples = [rng.choice(xG, n_shots).tolist() for _ in range(250)]
+
+        def run(samples=samples):
+            for sample in samples:
+                for n in range(4):
+                    prob(sample, n)
+
+        yield f'util.prob[{n_shots} shots]', len(samples) * 4, 'calls', run
+
+
+def bench_minute_data(dataset:Dataset):
+    '''
+    build_match_frames for one match at a time, and create_minute_data for every match in the dataset at once, including saving the frame
+    tables to the frame store in a temporary folder.
+    '''
+    shots_by_match = {id: shots for id, shots in dataset.shots.groupby('match_id', sort=False)}
+    no_shots = dataset.shots.iloc[:0]
+
+    def per_match():
+        for m in dataset.matches.itertuples(index=False):
+            build_match_frames(m.h_team, m.a_team, m.match_code, m.max_min, shots_by_match.get(m.match_id, no_shots))
+
+    yield 'create_minute_data.match', dataset.matches.shape[0], 'matches', per_match
+
+    def per_season():
+        # create_minute_data saves to ./data, so run it in a temporary folder
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory(prefix='benchmarks_') as tmp_dir:
+            os.makedirs(f'{tmp_dir}/data')
+            os.chdir(tmp_dir)
+            try:
+                create_minute_data(dataset.matches, dataset.shots)
+            finally:
+                os.chdir(cwd)
+
+    yield 'create_minute_data.season', dataset.matches.shape[0], 'matches', per_season
+
+
+def bench_figure(dataset:Dataset):
+    '''
+    Building the match figure and loading a match into it, updating its artists for every frame, drawing every frame, and saving the static PNG.
+    '''
+    first = dataset.matches.iloc[0]
+
+    def setup():
+        figure = MatchFigure()
+        figure.set_match(first['h_team'], first['a_team'], dataset.frames[0])
+        plt.close(figure.fig)
+
+    yield 'figure.setup', 1, 'figures', setup
+
+    figure = MatchFigure()
+    n_frames = sum(df.shape[0] for df in dataset.frames)
+
+    def update():
+        for m, minute_data in zip(dataset.matches.itertuples(index=False), dataset.frames):
+            figure.set_match(m.h_team, m.a_team, minute_data)
+            for f in range(minute_data.shape[0]):
+                figure.update(f)
+
+    yield 'figure.update', n_frames, 'frames', update
+
+    def draw():
+        for m, minute_data in zip(dataset.matches.itertuples(index=False), dataset.frames):
+            figure.set_match(m.h_team, m.a_team, minute_data)
+            for f in range(minute_data.shape[0]):
+                figure.frame(f)
+
+    yield 'figure.frame', n_frames, 'frames', draw
+
+    def save_static():
+        with tempfile.TemporaryDirectory(prefix='benchmarks_') as tmp_dir:
+            for m, minute_data in zip(dataset.matches.itertuples(index=False), dataset.frames):
+                figure.set_match(m.h_team, m.a_team, minute_data)
+                figure.save_static(f'{tmp_dir}/{m.match_code}.png')
+
+    yield 'save.static_png', dataset.matches.shape[0], 'matches', save_static
+    plt.close(figure.fig)
+
+
+def bench_encode(dataset:Dataset):
+    '''
+    Encoding the frames of the first match as a GIF, with the frames drawn up front so only encoding is timed.
+    '''
+    first = dataset.matches.iloc[0]
+    minute_data = dataset.frames[0]
+    figure = MatchFigure()
+    figure.set_match(first['h_team'], first['a_team'], minute_data)
+    frames = [figure.frame(f).copy() for f in range(minute_data.shape[0])]
+    plt.close(figure.fig)
+    durations = (minute_data['frames'].to_numpy() * int(1000 / FPS)).tolist()
+
+    def encode():
+        with tempfile.TemporaryDirectory(prefix='benchmarks_') as tmp_dir:
+            with GifWriter(f'{tmp_dir}/{first["match_code"]}.gif', gif_palette([frames[0], frames[-1]])) as writer:
+                for frame, duration in zip(frames, durations):
+                    writer.write(frame, duration)
+
+    yield 'encode.gif', len(frames), 'frames', encode
+
+
+def bench_fetch(dataset:Dataset):
+    '''
+    Fetching the shots for every match from a `StandInServer` with no latency, so only the client's own overhead is timed. Needs a dataset with
+    Understat responses.
+    '''
+    if dataset.fixtures is None:
+        return
+    ids = [f['id'] for f in dataset.fixtures if f['isResult']]
+
+    def fetch():
+        with StandInServer({('EPL', '2025'):(dataset.fixtures, dataset.match_shots)}) as server:
+            with UnderstatFetcher(rate=10000, burst=100, base_url=server.url) as fetcher:
+                fetcher.match_shots_many(ids)
+
+    yield 'fetch.match_shots', len(ids), 'matches', fetch
+
+
+BENCHMARKS = {
+    'prob':bench_prob,
+    'minute_data':bench_minute_data,
+    'figure':bench_figure,
+    'encode':bench_encode,
+    'fetch':bench_fetch
+}
+
+
+def run_benchmarks(names:list[str]=None, datasets:list[str]=None, n_matches:int=5, repeats:int=5, output:str=None,
+                   history:str=HISTORY_PATH) -> dict:
+    '''
+    Runs the benchmarks in `names` on each dataset in `datasets` and saves the results as JSON. Each case is run once to warm up and then timed
+    `repeats` times, and then run once more under tracemalloc to measure its peak memory, since tracing slows it down.
+
+    :param names: Benchmarks to run, from the keys of `BENCHMARKS`. Runs every benchmark if None. Default value: `None`
+    :type names: list[str]
+    :param datasets: Datasets to run on, from 'bundled' (the frame store in the data folder) and 'synthetic'. Runs on both if None. Default
+        value: `None`
+    :type datasets: list[str]
+    :param n_matches: Number of matches to take from each dataset. Default value: `5`
+    :type n_matches: int
+    :param repeats: Number of timed runs of each case. At least 5 are needed for `BenchmarkHistory.compare` to flag a slowdown at the
+        0.05 level from one run of `benchmarks.py` per commit. Default value: `5`
+    :type repeats: int
+    :param output: File to save the results to. Saved to `./output/benchmarks/benchmark_{timestamp}.json` if None. Default value: `None`
+    :type output: str
+    :param history: JSON lines file of a `BenchmarkHistory` to add the results to, against the checked out commit. Not added to a history if
+        None. Default value: `'./output/benchmarks/history.jsonl'`
+    :type history: str
+    :returns report: The commit and environment the benchmarks ran in and one result per case, with the `name`, `dataset`, number of `items` processed per
+        run and their `unit`, every timed run in `seconds`, the `median` and `min`, throughput `per_second` and `per_minute` at the median, and
+        `peak_memory` in bytes.
+    :rtype report: dict
+    '''
+    plt.switch_backend('Agg')
+    if names is None:
+        names = list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise ValueError(f'{name} is not a benchmark. Please select from {list(BENCHMARKS)}.')
+    if datasets is None:
+        datasets = ['bundled', 'synthetic']
+
+    results = []
+    for dataset_name in datasets:
+        match dataset_name:
+            case 'bundled':
+                dataset = bundled_dataset(n_matches)
+            case 'synthetic':
+                dataset = synthetic_dataset(n_matches)
+            case _:
+                raise ValueError(f'{dataset_name} is not a dataset. Please select from bundled and synthetic.')
+        for name in names:
+            for case, items, unit, run in BENCHMARKS[name](dataset):
+                print(f'Running {case} on {dataset.name} data...')
+                run()
+                seconds = []
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    run()
+                    seconds.append(time.perf_counter() - start)
+                tracemalloc.start()
+                run()
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                median = statistics.median(seconds)
+                results.append({
+                    'name':case, 'dataset':dataset.name, 'items':items, 'unit':unit, 'seconds':seconds, 'median':median, 'min':min(seconds),
+                    'per_second':items / median, 'per_minute':items * 60 / median, 'peak_memory':peak_memory
+                })
+
+    report = {
+        'created':datetime.now().isoformat(timespec='seconds'),
+        'commit':git_commit(),
+        'environment':{
+            'python':platform.python_version(), 'platform':platform.platform(), 'system':platform.system(), 'processor':platform.machine(),
+            'cpu':cpu_model(), 'cpus':os.cpu_count(),
+            'numpy':np.__version__, 'pandas':pd.__version__, 'matplotlib':matplotlib.__version__, 'pillow':PIL.__version__
+        },
+        'n_matches':n_matches,
+        'repeats':repeats,
+        'results':results
+    }
+    if output is None:
+        os.makedirs(BENCHMARK_DIR, exist_ok=True)
+        output = f'{BENCHMARK_DIR}/benchmark_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json'
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+    print(f'\n{"Benchmark":<28}{"Data":<11}{"Median (s)":>12}{"Throughput":>22}{"Peak (MB)":>11}')
+    for result in results:
+        throughput = f'{result["per_minute"]:.1f} {result["unit"]}/min' if result['unit'] == 'matches' else f'{result["per_second"]:.1f} {result["unit"]}/s'
+        print(f'{result["name"]:<28}{result["dataset"]:<11}{result["median"]:>12.4f}{throughput:>22}{result["peak_memory"]/2**20:>11.1f}')
+    print(f'\nResults saved to {output}')
+    if history is not None:
+        BenchmarkHistory(history).record(report)
+        print(f'Results added to the benchmark history in {history}')
+    return report
+
+
+if __name__ == '__main__':
+    names = None
+    datasets = None
+    n_matches = 5
+    repeats = 5
+    output = None
+    history = HISTORY_PATH
+    if len(argv) > 1:
+        cl_args = argv[1:]
+        if cl_args[0] in ('-h','--help'):
+            print('''
+    -h\t\tPrint this help page.
+    -b\t\tComma separated benchmarks to run from prob, minute_data, figure, encode and fetch (default: all)
+    -d\t\tComma separated datasets to run on from bundled and synthetic (default: both)
+    -n\t\tNumber of matches to take from each dataset (default 5)
+    -r\t\tNumber of timed runs of each benchmark (default 5)
+    -o\t\tFile to save the results to as JSON (default: ./output/benchmarks/benchmark_{timestamp}.json)
+    -hi\t\tBenchmark history file to add the results to, or off to not add them (default ./output/benchmarks/history.jsonl)'''
+            )
+            exit()
+        if len(cl_args) % 2 != 0:
+            raise ValueError(f'No value provided for command line option {cl_args[-1]}.')
+        for key, value in zip(cl_args[::2], cl_args[1::2]):
+            match key:
+                case "-b":
+                    names = value.split(',')
+                case "-d":
+                    datasets = value.split(',')
+                case "-n":
+                    n_matches = int(value)
+                case "-r":
+                    repeats = int(value)
+                case "-o":
+                    output = value
+                case "-hi":
+                    history = None if value == 'off' else value
+                case _:
+                    raise ValueError(f'Unknown command line argument {key} with value {value}')
+    run_benchmarks(names, datasets, n_matches, repeats, output, history)
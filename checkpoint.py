@@ -0,0 +1,95 @@
+# Imports
+import json
+import os
+from frame_store import DATA_DIR
+
+CHECKPOINT_DIR = f'{DATA_DIR}/checkpoints'
+# Number of fetched matches held in memory before they are appended to the checkpoint file
+CHECKPOINT_EVERY = 25
+
+
+class FetchCheckpoint:
+    '''
+    Checkpoint of the match shots fetched so far by a long run, kept as a JSON lines file with one match per line in
+    `{checkpoint_dir}/{name}.jsonl`. Fetched matches are appended every `every` matches and whenever the checkpoint is closed, so an
+    interrupted run loses at most `every` matches and can be resumed from `load()`. Delete the checkpoint with `remove()` once the run has
+    finished.
+
+        with FetchCheckpoint('EPL_2025_all_all') as checkpoint:
+            done = checkpoint.load()
+            shots = fetcher.match_shots_many([id for id in match_ids if id not in done], on_result=checkpoint.add)
+    '''
+
+    def __init__(self, name:str, checkpoint_dir:str=CHECKPOINT_DIR, every:int=CHECKPOINT_EVERY) -> None:
+        '''
+        :param name: Name of the run, used as the file name. A run with the same name resumes from this checkpoint.
+        :type name: str
+        :param checkpoint_dir: Folder to keep checkpoints in. Default value: `'./data/checkpoints'`
+        :type checkpoint_dir: str
+        :param every: Number of fetched matches to hold before appending them to the file. Default value: `25`
+        :type every: int
+        '''
+        self.path = f'{checkpoint_dir}/{name}.jsonl'
+        self.every = max(1, every)
+        self.pending = []
+
+    def load(self) -> dict[str, dict]:
+        '''
+        Returns the shots for every match in the checkpoint, keyed by match ID, or an empty dictionary if there is no checkpoint.
+        '''
+        fetched = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A run killed mid-write can leave a partial last line. That match is fetched again
+                        continue
+                    fetched[entry['id']] = entry['shots']
+        except FileNotFoundError:
+            pass
+        return fetched
+
+    def add(self, match_id:str, shots:dict) -> None:
+        '''
+        Adds the `shots` for the match with ID `match_id`, appending everything held so far to the file once `every` matches are held.
+        '''
+        self.pending.append({'id':match_id, 'shots':shots})
+        if len(self.pending) >= self.every:
+            self.flush()
+
+    def flush(self) -> None:
+        '''
+        Appends every match held in memory to the file.
+        '''
+        if len(self.pending) == 0:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a+b') as f:
+            # A run killed mid-write can leave a partial last line, so end it before appending rather than joining the first new match onto it
+            start = b''
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    start = b'\n'
+            f.write(start + ''.join(json.dumps(entry) + '\n' for entry in self.pending).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending = []
+
+    def remove(self) -> None:
+        '''
+        Deletes the checkpoint file and drops any matches held in memory.
+        '''
+        self.pending = []
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.flush()
@@ -1,19 +1,34 @@
+import numpy as np
 import pandas as pd
-from util import prob
+from util import batch_goal_distribution
+from frame_store import read_matches, read_shots, write_frames
+from shot_db import ShotDatabase
+import tracing
 
-def create_minute_data(matches:pd.DataFrame = None, shots_all:pd.DataFrame = None) -> list[pd.DataFrame]:
+FRAMES_PER_MINUTE = 5
+HOLD_FRAMES = 20
+MAX_GOALS = 3
+
+# Columns whose values are drawn on the figure. Consecutive frames that match on all of these (and have no new shot) look the same
+STATE_COLUMNS = ['minute'] + [f'{t}_{col}' for t in ('h', 'a') for col in ['score', 'xG', '0', '1', '2', '3', '4', 'event_log']]
+
+def create_minute_data(matches:pd.DataFrame = None, shots_all:pd.DataFrame = None, db:ShotDatabase = None) -> list[pd.DataFrame]:
     '''
     Function to create minute by minute data for each match in `matches` showing on the evolving goal probabilities based on the shots in `shots_all`.
-    Saves data for each match in separate CSV named after the `match_code` and returns a list of pandas DataFrames containing the data for each match
-    in `matches`.
+    Saves data for each match in a separate frame store file named after the `match_code` and returns a list of pandas DataFrames containing the data
+    for each match in `matches`.
 
-    :param matches: Pandas DataFrame containing `match_id`, `h_team`, `a_team`, `match_code`, and `min_max` at a match level. If None, data will be 
-        loaded from saved CSV file. Default value: `None`
+    :param matches: Pandas DataFrame containing `match_id`, `h_team`, `a_team`, `match_code`, and `min_max` at a match level. If None, data will be
+        loaded from the saved frame store (or legacy CSV) file. Default value: `None`
     :type matches: pd.DataFrame
     :param shots_all: Pandas DataFrame containing `match_id`, `minute`, `h_a`, `xG`, `result`, `x`, `y`, `player`, `shot_type`, and `last_action` for
-        each shot taken during the matches found in `matches`. If None, data will be loaded from saved CSV file. Default value: `None`
+        each shot taken during the matches found in `matches`. If None, data will be loaded from the saved frame store (or legacy CSV) file. Default
+        value: `None`
     :type shots_all: pd.DataFrame
-    :returns output: List of pandas DataFrames containing the minute by minute data for each match. Each DataFrame contains `minute`, the name of the 
+    :param db: Shot database to query for just the shots in `matches` when `shots_all` is None, instead of loading every shot from the frame store.
+        Default value: `None`
+    :type db: ShotDatabase
+    :returns output: List of pandas DataFrames containing the minute by minute data for each match. Each DataFrame contains `minute`, the name of the
         home team `h_name`, the score for the home team `h_score`, the naive xG for the home team `h_xG`, the probability of the home team having scored
         0 `h_0`, 1 `h_1`, 2 `h_2`, 3 `h_3`, and 4 or more `h_4` goals, and the most recent event for the home team `h_event_log`, with `a_name`, `a_score`,
         `a_xG`, `a_0`, `a_1`, `a_2`, `a_3`, `a_4, and `a_event_log` representing the same data for the away team.
@@ -21,373 +36,274 @@ def create_minute_data(matches:pd.DataFrame = None, shots_all:pd.DataFrame = Non
     '''
     if matches is None:
         try:
-            matches = pd.read_csv('./data/matches.csv')
-        except:
-            raise FileNotFoundError('No matches dataframe provided and no matches.csv file found in ./data/ folder.')
-    if shots_all is None:
+            matches = read_matches()
+        except FileNotFoundError:
+            raise FileNotFoundError('No matches dataframe provided and no matches.npz or matches.csv file found in ./data/ folder.')
+    # Match IDs are int64 in the shot database but may be strings in the matches table, so compare them as int64 on both sides
+    match_ids = matches['match_id'].astype('int64')
+    if shots_all is None and db is not None:
+        shots_all = db.shots(match_ids=match_ids)
+    elif shots_all is None:
         try:
-            shots_all = pd.read_csv('./data/raw_shots.csv')
-        except:
-            raise FileNotFoundError('No shots_all dataframe provided and no raw_shots.csv file found in ./data/ folder.')
+            shots_all = read_shots()
+        except FileNotFoundError:
+            raise FileNotFoundError('No shots_all dataframe provided and no raw_shots.npz or raw_shots.csv file found in ./data/ folder.')
 
     output = []
 
-    for id in matches['match_id']:
-        data = {
-            'minute':[],
-            'h_name':[],
-            'h_score':[],
-            'h_xG':[],
-            'h_0':[],
-            'h_1':[],
-            'h_2':[],
-            'h_3':[],
-            'h_4':[],
-            'h_shot_x':[],
-            'h_shot_y':[],
-            'h_type':[],
-            'h_shot_xG':[],
-            'h_event_log':[],
-            'a_name':[],
-            'a_score':[],
-            'a_xG':[],
-            'a_0':[],
-            'a_1':[],
-            'a_2':[],
-            'a_3':[],
-            'a_4':[],
-            'a_shot_x':[],
-            'a_shot_y':[],
-            'a_type':[],
-            'a_shot_xG':[],
-            'a_event_log':[],
-            'code':[]
-        }
-
-        h_name = matches[matches['match_id'] == id]['h_team'].item()
-        a_name = matches[matches['match_id'] == id]['a_team'].item()
-        code = matches[matches['match_id'] == id]['match_code'].item()
-
-        shots_game = shots_all[shots_all['match_id']==id]
-        h_shots = []
-        a_shots = []
-
-        for m in range(matches[matches['match_id']==id]['max_min'].item() + 1):
-            # Get previous minute / initial values
-            if m == 0:
-                h_score = 0
-                h_xG = 0
-                h_prob = [1,0,0,0,0]
-                h_events = ''
-                a_score = 0
-                a_xG = 0
-                a_prob = [1,0,0,0,0]
-                a_events = ''
-            else:
-                h_score = data['h_score'][-1]
-                h_xG = data['h_xG'][-1]
-                h_prob = [data['h_0'][-1], data['h_1'][-1], data['h_2'][-1], data['h_3'][-1], data['h_4'][-1]]
-                h_events = data['h_event_log'][-1]
-                a_score = data['a_score'][-1]
-                a_xG = data['a_xG'][-1]
-                a_prob = [data['a_0'][-1], data['a_1'][-1], data['a_2'][-1], data['a_3'][-1], data['a_4'][-1]]
-                a_events = data['a_event_log'][-1]
-                
-            
-            shots_min = shots_game[shots_game['minute']==m].reset_index()
-            if shots_min.shape[0] > 0:
-                # Append first shot to the current attack
-                attack = [shots_min['xG'][0]]
-                attack_result = [shots_min['result'][0]]
-                attack_h_a = [shots_min['h_a'][0]]
-                attack_players = [shots_min['player'][0]]
-                h_shot_x = []
-                h_shot_y = []
-                h_type = []
-                h_shot_xG = []
-                a_shot_x = []
-                a_shot_y = []
-                a_type = []
-                a_shot_xG = []
-
-                if attack_h_a[0] == 'h':
-                    h_shot_x = [shots_min['x'][0]]
-                    h_shot_y = [shots_min['y'][0]]
-                    h_type = [shots_min['result'][0]]
-                    h_shot_xG = [shots_min['xG'][0]]
-                else:
-                    a_shot_x = [1 - shots_min['x'][0]]
-                    a_shot_y = [1 - shots_min['y'][0]]
-                    a_type = [shots_min['result'][0]]
-                    a_shot_xG = [shots_min['xG'][0]]
-
-                for i in range(1,shots_min.shape[0]):
-                    if shots_min['h_a'][i] == 'h':
-                        h_shot_x.append(shots_min['x'][i])
-                        h_shot_y.append(shots_min['y'][i])
-                        h_type.append(shots_min['result'][i])
-                        h_shot_xG.append(shots_min['xG'][i])
-                    else:
-                        a_shot_x.append(1 - shots_min['x'][i])
-                        a_shot_y.append(1 - shots_min['y'][i])
-                        a_type.append(shots_min['result'][i])
-                        a_shot_xG.append(shots_min['xG'][i])
-
-                    if shots_min['last_action'][i] == 'Rebound':
-                        # Append any rebounded shots to the current attack
-                        attack.append(shots_min['xG'][i])
-                        attack_result.append(shots_min['result'][i])
-                        attack_h_a.append(shots_min['h_a'][i])
-                        attack_players.append(shots_min['player'][i])
-                    else:
-                        # Otherwise get probability & result from the current attack and append it to h_shots/a_shots, and update the xG and score
-                        attack_xG = 1 - prob(attack,0)
-                        if attack_h_a[-1] == 'h':
-                            h_shots.append(attack_xG)
-                            h_xG += attack_xG
-                            if attack_result[-1] == 'Goal':
-                                h_score += 1
-                                if len(attack) > 1:
-                                    h_events = f'{m}\': Goal scored by {attack_players[-1]} from an attack with {len(attack)} shots worth {round(attack_xG,2)} xG'
-                                else:
-                                    h_events = f'{m}\': Goal scored by {attack_players[-1]} from a shot worth {round(attack_xG,2)} xG'
-                            elif attack_result[-1] == 'OwnGoal':
-                                a_score += 1
-                                h_events = f'{m}\': Own goal scored by {attack_players[-1]}'
-                            else:
-                                if len(attack) > 1:
-                                    h_events = f'{m}\': Attack with {len(attack)} shots worth {round(attack_xG,2)} xG'
-                                else:
-                                    h_events = f'{m}\': Shot by {attack_players[-1]} worth {round(attack_xG,2)} xG'
-                            
-                        else:
-                            a_shots.append(attack_xG)
-                            a_xG += attack_xG
-                            if attack_result[-1] == 'Goal':
-                                a_score += 1
-                                if len(attack) > 1:
-                                    a_events = f'{m}\': Goal scored by {attack_players[-1]} from an attack with {len(attack)} shots worth {round(attack_xG,2)} xG'
-                                else:
-                                    a_events = f'{m}\': Goal scored by {attack_players[-1]} from a shot worth {round(attack_xG,2)} xG'
-                            elif attack_result[-1] == 'OwnGoal':
-                                h_score += 1
-                                a_events = f'{m}\': Own goal scored by {attack_players[-1]}'
-                            else:
-                                if len(attack) > 1:
-                                    a_events = f'{m}\': Attack with {len(attack)} shots worth {round(attack_xG,2)} xG'
-                                else:
-                                    a_events = f'{m}\': Shot by {attack_players[-1]} worth {round(attack_xG,2)} xG'
-                        # Reset the current attack to include only the most recent shot
-                        attack = [shots_min['xG'][i]]
-                        attack_result = [shots_min['result'][i]]
-                        attack_h_a = [shots_min['h_a'][i]]
-                        attack_players = [shots_min['player'][i]]
-                
-                # Deal with the contents of the final current attack of the current minute
-                attack_xG = 1 - prob(attack, 0)
-                if attack_h_a[-1] == 'h':
-                    h_shots.append(attack_xG)
-                    h_xG += attack_xG
-                    if attack_result[-1] == 'Goal':
-                        h_score += 1
-                        if len(attack) > 1:
-                            h_events = f'{m}\': Goal scored by {attack_players[-1]} ({len(attack)} shots) - {round(attack_xG,2)} xG'
-                        else:
-                            h_events = f'{m}\': Goal scored by {attack_players[-1]} - {round(attack_xG,2)} xG'
-                    elif attack_result[-1] == 'OwnGoal':
-                        a_score += 1
-                        h_events = f'{m}\': Own goal scored by {attack_players[-1]}'
-                    else:
-                        if len(attack) > 1:
-                            h_events = f'{m}\': Attack with {len(attack)} shots - {round(attack_xG,2)} xG'
-                        else:
-                            h_events = f'{m}\': Shot by {attack_players[-1]} - {round(attack_xG,2)} xG'
-                else:
-                    a_shots.append(attack_xG)
-                    a_xG += attack_xG
-                    if attack_result[-1] == 'Goal':
-                        a_score += 1
-                        if len(attack) > 1:
-                            a_events = f'{m}\': Goal scored by {attack_players[-1]} ({len(attack)} shots) - {round(attack_xG,2)} xG'
-                        else:
-                            a_events = f'{m}\': Goal scored by {attack_players[-1]} - {round(attack_xG,2)} xG'
-                    elif attack_result[-1] == 'OwnGoal':
-                        h_score += 1
-                        a_events = f'{m}\': Own goal scored by {attack_players[-1]}'
-                    else:
-                        if len(attack) > 1:
-                            a_events = f'{m}\': Attack with {len(attack)} shots - {round(attack_xG,2)} xG'
-                        else:
-                            a_events = f'{m}\': Shot by {attack_players[-1]} - {round(attack_xG,2)} xG'
-                
-                new_h_prob = [prob(h_shots,0), prob(h_shots,1), prob(h_shots,2), prob(h_shots,3)]
-                new_h_prob.append(1 - (new_h_prob[0] + new_h_prob[1] + new_h_prob[2] + new_h_prob[3]))
-                new_a_prob = [prob(a_shots,0),prob(a_shots,1),prob(a_shots,2),prob(a_shots,3)]
-                new_a_prob.append(1 - (new_a_prob[0] + new_a_prob[1] + new_a_prob[2] + new_a_prob[3]))
-                diff_h_prob = []
-                diff_a_prob = []
-                for j in range(5):
-                    diff_h_prob.append((new_h_prob[j] - h_prob[j])/5)
-                    diff_a_prob.append((new_a_prob[j] - a_prob[j])/5)
-                
-                if len(h_shot_x) > 5 or len(a_shot_x) > 5:
-                    raise ValueError(f'More shots than frames. {len(h_shot_x)} h shots, {len(a_shot_x)} a shots for {m}\' minute.')
-                # lerping probability values for smoother transition in animation
-                for f in range(4):
-                    data['minute'].append(m)
-                    data['h_name'].append(h_name)
-                    data['h_score'].append(h_score)
-                    data['h_xG'].append(h_xG)
-                    data['h_0'].append(h_prob[0] + (diff_h_prob[0] * (f+1)))
-                    data['h_1'].append(h_prob[1] + (diff_h_prob[1] * (f+1)))
-                    data['h_2'].append(h_prob[2] + (diff_h_prob[2] * (f+1)))
-                    data['h_3'].append(h_prob[3] + (diff_h_prob[3] * (f+1)))
-                    data['h_4'].append(h_prob[4] + (diff_h_prob[4] * (f+1)))
-                    data['h_event_log'].append(h_events)
-                    data['a_name'].append(a_name)
-                    data['a_score'].append(a_score)
-                    data['a_xG'].append(a_xG)
-                    data['a_0'].append(a_prob[0] + (diff_a_prob[0] * (f+1)))
-                    data['a_1'].append(a_prob[1] + (diff_a_prob[1] * (f+1)))
-                    data['a_2'].append(a_prob[2] + (diff_a_prob[2] * (f+1)))
-                    data['a_3'].append(a_prob[3] + (diff_a_prob[3] * (f+1)))
-                    data['a_4'].append(a_prob[4] + (diff_a_prob[4] * (f+1)))
-                    data['a_event_log'].append(a_events)
-                    data['code'].append(code)
-                    if f < len(h_shot_x):
-                        data['h_shot_x'].append(h_shot_x[f])
-                        data['h_shot_y'].append(h_shot_y[f])
-                        data['h_type'].append(h_type[f])
-                        data['h_shot_xG'].append(h_shot_xG[f])
-                    else:
-                        data['h_shot_x'].append(None)
-                        data['h_shot_y'].append(None)
-                        data['h_type'].append(None)
-                        data['h_shot_xG'].append(None)
-                    if f < len(a_shot_x):
-                        data['a_shot_x'].append(a_shot_x[f])
-                        data['a_shot_y'].append(a_shot_y[f])
-                        data['a_type'].append(a_type[f])
-                        data['a_shot_xG'].append(a_shot_xG[f])
-                    else:
-                        data['a_shot_x'].append(None)
-                        data['a_shot_y'].append(None)
-                        data['a_type'].append(None)
-                        data['a_shot_xG'].append(None)
-                data['minute'].append(m)
-                data['h_name'].append(h_name)
-                data['h_score'].append(h_score)
-                data['h_xG'].append(h_xG)
-                data['h_0'].append(new_h_prob[0])
-                data['h_1'].append(new_h_prob[1])
-                data['h_2'].append(new_h_prob[2])
-                data['h_3'].append(new_h_prob[3])
-                data['h_4'].append(new_h_prob[4])
-                data['h_event_log'].append(h_events)
-                data['a_name'].append(a_name)
-                data['a_score'].append(a_score)
-                data['a_xG'].append(a_xG)
-                data['a_0'].append(new_a_prob[0])
-                data['a_1'].append(new_a_prob[1])
-                data['a_2'].append(new_a_prob[2])
-                data['a_3'].append(new_a_prob[3])
-                data['a_4'].append(new_a_prob[4])
-                data['a_event_log'].append(a_events)
-                data['code'].append(code)
-                if len(h_shot_x) == 5:
-                    data['h_shot_x'].append(h_shot_x[-1])
-                    data['h_shot_y'].append(h_shot_y[-1])
-                    data['h_type'].append(h_type[-1])
-                    data['h_shot_xG'].append(h_shot_xG[-1])
-                else:
-                    data['h_shot_x'].append(None)
-                    data['h_shot_y'].append(None)
-                    data['h_type'].append(None)
-                    data['h_shot_xG'].append(None)
-                if len(a_shot_x) == 5:
-                    data['a_shot_x'].append(a_shot_x[-1])
-                    data['a_shot_y'].append(a_shot_y[-1])
-                    data['a_type'].append(a_type[-1])
-                    data['a_shot_xG'].append(a_shot_xG[-1])
-                else:
-                    data['a_shot_x'].append(None)
-                    data['a_shot_y'].append(None)
-                    data['a_type'].append(None)
-                    data['a_shot_xG'].append(None)
-            else:
-                for i in range(5):
-                    data['minute'].append(m)
-                    data['h_name'].append(h_name)
-                    data['h_score'].append(h_score)
-                    data['h_xG'].append(h_xG)
-                    data['h_0'].append(h_prob[0])
-                    data['h_1'].append(h_prob[1])
-                    data['h_2'].append(h_prob[2])
-                    data['h_3'].append(h_prob[3])
-                    data['h_4'].append(h_prob[4])
-                    data['h_event_log'].append(h_events)
-                    data['a_name'].append(a_name)
-                    data['a_score'].append(a_score)
-                    data['a_xG'].append(a_xG)
-                    data['a_0'].append(a_prob[0])
-                    data['a_1'].append(a_prob[1])
-                    data['a_2'].append(a_prob[2])
-                    data['a_3'].append(a_prob[3])
-                    data['a_4'].append(a_prob[4])
-                    data['a_event_log'].append(a_events)
-                    data['code'].append(code)
-                    data['h_shot_x'].append(None)
-                    data['h_shot_y'].append(None)
-                    data['h_type'].append(None)
-                    data['a_shot_x'].append(None)
-                    data['a_shot_y'].append(None)
-                    data['a_type'].append(None)
-                    data['h_shot_xG'].append(None)
-                    data['a_shot_xG'].append(None)
-
-        # Add 20 frames holding on the final value
-        h_score = data['h_score'][-1]
-        h_xG = data['h_xG'][-1]
-        h_prob = [data['h_0'][-1], data['h_1'][-1], data['h_2'][-1], data['h_3'][-1], data['h_4'][-1]]
-        a_score = data['a_score'][-1]
-        a_xG = data['a_xG'][-1]
-        a_prob = [data['a_0'][-1], data['a_1'][-1], data['a_2'][-1], data['a_3'][-1], data['a_4'][-1]]
-        for f in range(20):
-            data['minute'].append(m)
-            data['h_name'].append(h_name)
-            data['h_score'].append(h_score)
-            data['h_xG'].append(h_xG)
-            data['h_0'].append(h_prob[0])
-            data['h_1'].append(h_prob[1])
-            data['h_2'].append(h_prob[2])
-            data['h_3'].append(h_prob[3])
-            data['h_4'].append(h_prob[4])
-            data['h_event_log'].append(h_events)
-            data['a_name'].append(a_name)
-            data['a_score'].append(a_score)
-            data['a_xG'].append(a_xG)
-            data['a_0'].append(a_prob[0])
-            data['a_1'].append(a_prob[1])
-            data['a_2'].append(a_prob[2])
-            data['a_3'].append(a_prob[3])
-            data['a_4'].append(a_prob[4])
-            data['a_event_log'].append(a_events)
-            data['code'].append(code)
-            data['h_shot_x'].append(None)
-            data['h_shot_y'].append(None)
-            data['h_type'].append(None)
-            data['h_shot_xG'].append(None)
-            data['a_shot_x'].append(None)
-            data['a_shot_y'].append(None)
-            data['a_type'].append(None)
-            data['a_shot_xG'].append(None)
-        
-        # Save data to csv
-        df = pd.DataFrame(data)
-        df.to_csv(f'./data/{code}.csv', index=False)
+    # Split the shots by match once rather than filtering shots_all for every match
+    shots_by_match = {id: shots for id, shots in shots_all.groupby(shots_all['match_id'].astype('int64'), sort=False)}
+    no_shots = shots_all.iloc[:0]
+
+    for match, match_id in zip(matches.itertuples(index=False), match_ids.tolist()):
+        with tracing.span('frames.build', echo=False, match=match.match_code):
+            df = build_match_frames(match.h_team, match.a_team, match.match_code, match.max_min, shots_by_match.get(match_id, no_shots))
+
+        # Save data to the frame store
+        with tracing.span('frames.save', echo=False, match=match.match_code):
+            write_frames(df, match.match_code)
         output.append(df)
 
     return output
 
+
+def build_match_frames(h_name:str, a_name:str, code:str, max_min:int, shots_game:pd.DataFrame) -> pd.DataFrame:
+    '''
+    Builds the frame table for a single match from its shots. Shots are grouped into attacks (a shot followed by any rebounds in the same minute),
+    and the scores, naive xG, goal probabilities and event log for each team are computed for every attack as whole arrays before being expanded
+    into `FRAMES_PER_MINUTE` frames per minute, lerping the probabilities across the frames of any minute with a shot, plus `HOLD_FRAMES` frames
+    holding on the final values.
+
+    :param h_name: Name of the home team.
+    :type h_name: str
+    :param a_name: Name of the away team.
+    :type a_name: str
+    :param code: Match code used to identify the match.
+    :type code: str
+    :param max_min: Last minute of the match.
+    :type max_min: int
+    :param shots_game: Pandas DataFrame containing `minute`, `h_a`, `xG`, `result`, `x`, `y`, `player`, and `last_action` for each shot in the match,
+        in the order they were returned by Understat.
+    :type shots_game: pd.DataFrame
+    :returns df: Pandas DataFrame with the columns described in `create_minute_data` and one row per frame.
+    :rtype df: pd.DataFrame
+    '''
+    n_minutes = max_min + 1
+
+    # Order shots by minute, keeping the original order within each minute, and drop any outside the match
+    minute = shots_game['minute'].to_numpy()
+    order = np.argsort(minute, kind='stable')
+    order = order[(minute[order] >= 0) & (minute[order] <= max_min)]
+    minute = minute[order]
+    is_h = shots_game['h_a'].to_numpy()[order] == 'h'
+    xG = shots_game['xG'].to_numpy(dtype=np.float64)[order]
+    result = shots_game['result'].to_numpy()[order]
+    player = shots_game['player'].to_numpy()[order]
+    shot_x = shots_game['x'].to_numpy(dtype=np.float64)[order]
+    shot_y = shots_game['y'].to_numpy(dtype=np.float64)[order]
+    rebound = shots_game['last_action'].to_numpy()[order] == 'Rebound'
+    n_shots = minute.shape[0]
+
+    # Position of each shot among its team's shots in the same minute, which is also the frame it is plotted on
+    first_of_minute = np.ones(n_shots, dtype=bool)
+    first_of_minute[1:] = minute[1:] != minute[:-1]
+    h_slot = _count_within(minute, is_h)
+    a_slot = _count_within(minute, ~is_h)
+    if n_shots > 0 and max(h_slot[is_h].max(initial=-1), a_slot[~is_h].max(initial=-1)) >= FRAMES_PER_MINUTE:
+        busiest = minute[np.argmax(np.where(is_h, h_slot, a_slot))]
+        raise ValueError(f'More shots than frames. {np.sum(is_h & (minute == busiest))} h shots, {np.sum(~is_h & (minute == busiest))} a shots for {busiest}\' minute.')
+
+    # Group shots into attacks: a new attack starts on the first shot of each minute and any shot that isn't a rebound
+    attack_start = np.flatnonzero(first_of_minute | ~rebound)
+    attack_end = np.empty_like(attack_start)
+    attack_end[:-1] = attack_start[1:] - 1
+    attack_end[-1:] = n_shots - 1
+    attack_len = attack_end - attack_start + 1
+    attack_xG = 1 - np.multiply.reduceat(1 - xG, attack_start) if n_shots > 0 else np.zeros(0)
+    # The team, result and player of an attack are those of its final shot
+    attack_minute = minute[attack_end]
+    attack_h = is_h[attack_end]
+    attack_result = result[attack_end]
+    attack_player = player[attack_end]
+    attack_last = np.ones(attack_start.shape[0], dtype=bool)
+    attack_last[:-1] = attack_minute[1:] != attack_minute[:-1]
+
+    # Running scores, xG and goal probabilities after each attack
+    h_score_after = np.cumsum((attack_h & (attack_result == 'Goal')) | (~attack_h & (attack_result == 'OwnGoal')))
+    a_score_after = np.cumsum((~attack_h & (attack_result == 'Goal')) | (attack_h & (attack_result == 'OwnGoal')))
+    h_xG_after = np.cumsum(np.where(attack_h, attack_xG, 0))
+    a_xG_after = np.cumsum(np.where(attack_h, 0, attack_xG))
+    h_prob_after = _with_tail(batch_goal_distribution(attack_xG[None, :], attack_h[None, :], MAX_GOALS, prefix=True)[0])
+    a_prob_after = _with_tail(batch_goal_distribution(attack_xG[None, :], ~attack_h[None, :], MAX_GOALS, prefix=True)[0])
+    events = np.array([
+        _event_text(*e) for e in zip(attack_minute.tolist(), attack_result, attack_player, attack_len.tolist(), attack_xG.tolist(), attack_last)
+    ], dtype=object)
+
+    # State at the end of each minute, taken from the last attack at or before it (index -1 meaning no attack yet)
+    minutes = np.arange(n_minutes)
+    last_attack = np.searchsorted(attack_minute, minutes, side='right') - 1
+    h_attacks = np.flatnonzero(attack_h)
+    a_attacks = np.flatnonzero(~attack_h)
+    last_h_attack = np.searchsorted(attack_minute[h_attacks], minutes, side='right') - 1
+    last_a_attack = np.searchsorted(attack_minute[a_attacks], minutes, side='right') - 1
+
+    h_score = _state_at(h_score_after, last_attack, 0)
+    a_score = _state_at(a_score_after, last_attack, 0)
+    h_xG = _state_at(h_xG_after, last_attack, 0.0) if len(h_attacks) > 0 else np.zeros(n_minutes, dtype=np.int64)
+    a_xG = _state_at(a_xG_after, last_attack, 0.0) if len(a_attacks) > 0 else np.zeros(n_minutes, dtype=np.int64)
+    h_events = _state_at(events[h_attacks], last_h_attack, '')
+    a_events = _state_at(events[a_attacks], last_a_attack, '')
+    h_prob = _state_at(h_prob_after, last_attack, np.array([1, 0, 0, 0, 0], dtype=np.float64))
+    a_prob = _state_at(a_prob_after, last_attack, np.array([1, 0, 0, 0, 0], dtype=np.float64))
+
+    # Expand each minute into its frames, lerping the probabilities across minutes with a shot for a smoother transition in the animation
+    has_shots = np.zeros(n_minutes, dtype=bool)
+    has_shots[minute] = True
+    h_frames = _lerp_frames(h_prob, has_shots)
+    a_frames = _lerp_frames(a_prob, has_shots)
+    if n_shots == 0:
+        # Probabilities never move from their initial whole values in a match without shots
+        h_frames = h_frames.astype(np.int64)
+        a_frames = a_frames.astype(np.int64)
+    n_frames = n_minutes * FRAMES_PER_MINUTE + HOLD_FRAMES
+
+    def per_frame(values):
+        # Repeat each minute's value for its frames, then hold on the final value
+        values = np.repeat(values, FRAMES_PER_MINUTE, axis=0)
+        return np.concatenate([values, np.repeat(values[-1:], HOLD_FRAMES, axis=0)])
+
+    def shot_column(values, team, slot):
+        # Place each shot on the frame matching its position within the minute, leaving every other frame empty (NaN for numeric values, or
+        # None if the team had no shots at all)
+        if values.dtype == np.float64 and team.any():
+            column = np.full(n_frames, np.nan)
+        else:
+            column = np.full(n_frames, None, dtype=object)
+        column[minute[team] * FRAMES_PER_MINUTE + slot[team]] = values[team]
+        return column
+
+    data = {
+        'minute':per_frame(minutes),
+        'h_name':[h_name] * n_frames,
+        'h_score':per_frame(h_score),
+        'h_xG':per_frame(h_xG),
+    }
+    for n in range(MAX_GOALS + 2):
+        data[f'h_{n}'] = np.concatenate([h_frames[:, n], np.repeat(h_frames[-1:, n], HOLD_FRAMES)])
+    data.update({
+        'h_shot_x':shot_column(shot_x, is_h, h_slot),
+        'h_shot_y':shot_column(shot_y, is_h, h_slot),
+        'h_type':shot_column(result, is_h, h_slot),
+        'h_shot_xG':shot_column(xG, is_h, h_slot),
+        'h_event_log':per_frame(h_events),
+        'a_name':[a_name] * n_frames,
+        'a_score':per_frame(a_score),
+        'a_xG':per_frame(a_xG),
+    })
+    for n in range(MAX_GOALS + 2):
+        data[f'a_{n}'] = np.concatenate([a_frames[:, n], np.repeat(a_frames[-1:, n], HOLD_FRAMES)])
+    data.update({
+        'a_shot_x':shot_column(1 - shot_x, ~is_h, a_slot),
+        'a_shot_y':shot_column(1 - shot_y, ~is_h, a_slot),
+        'a_type':shot_column(result, ~is_h, a_slot),
+        'a_shot_xG':shot_column(xG, ~is_h, a_slot),
+        'a_event_log':per_frame(a_events),
+        'code':[code] * n_frames
+    })
+
+    return pd.DataFrame(data)
+
+
+def collapse_frames(minute_data:pd.DataFrame) -> pd.DataFrame:
+    '''
+    Collapses each run of identical frames in a frame table into its first frame, so the animation only draws and encodes frames that change.
+    A frame is kept if any value shown on the figure differs from the frame before it or if a shot is plotted on it. The number of frames each
+    kept frame stands for is added as a `frames` column, so the animation can hold it for that many frames and keep the same timing.
+
+    :param minute_data: Frame table for a match as returned by `build_match_frames`, with one row per frame.
+    :type minute_data: pd.DataFrame
+    :returns df: Frame table with only the frames that change, and a `frames` column giving how many animation frames each one is shown for.
+    :rtype df: pd.DataFrame
+    '''
+    n_frames = minute_data.shape[0]
+    keep = np.ones(n_frames, dtype=bool)
+    if n_frames > 1:
+        changed = np.zeros(n_frames - 1, dtype=bool)
+        for col in STATE_COLUMNS:
+            values = minute_data[col].to_numpy()
+            changed |= values[1:] != values[:-1]
+        has_shot = (minute_data['h_type'].notna() | minute_data['a_type'].notna()).to_numpy()
+        keep[1:] = changed | has_shot[1:]
+
+    kept = np.flatnonzero(keep)
+    df = minute_data.iloc[kept].reset_index(drop=True)
+    df['frames'] = np.diff(np.append(kept, n_frames))
+    return df
+
+
+def _count_within(minute:np.ndarray, team:np.ndarray) -> np.ndarray:
+    '''
+    Returns, for each shot, how many shots by the same team came before it in the same minute. Only meaningful where `team` is True.
+    '''
+    team_minute = minute[team]
+    position = np.arange(team_minute.shape[0])
+    first = np.searchsorted(team_minute, team_minute, side='left')
+    count = np.zeros(minute.shape[0], dtype=np.int64)
+    count[team] = position - first
+    return count
+
+
+def _with_tail(dist:np.ndarray) -> np.ndarray:
+    '''
+    Appends the probability of scoring more than `MAX_GOALS` to each row of `dist`.
+    '''
+    return np.column_stack([dist, 1 - dist.sum(axis=1)])
+
+
+def _state_at(after:np.ndarray, index:np.ndarray, initial) -> np.ndarray:
+    '''
+    Looks up the value of `after` at each position in `index`, using `initial` wherever the index is -1 (i.e. before the first attack).
+    '''
+    values = np.concatenate([np.asarray([initial], dtype=after.dtype), after])
+    return values[index + 1]
+
+
+def _lerp_frames(prob:np.ndarray, has_shots:np.ndarray) -> np.ndarray:
+    '''
+    Expands the end-of-minute probabilities `prob` of shape (minutes, 5) into frames of shape (minutes * FRAMES_PER_MINUTE, 5). Minutes with a
+    shot step evenly from the previous minute's probabilities to the new ones, ending exactly on the new values; other minutes hold.
+    '''
+    previous = np.vstack([np.array([1, 0, 0, 0, 0], dtype=np.float64), prob[:-1]])
+    step = (prob - previous) / FRAMES_PER_MINUTE
+    frames = np.repeat(previous[:, None, :], FRAMES_PER_MINUTE, axis=1)
+    for f in range(FRAMES_PER_MINUTE - 1):
+        frames[has_shots, f] = previous[has_shots] + (step[has_shots] * (f+1))
+    frames[has_shots, -1] = prob[has_shots]
+    return frames.reshape(-1, prob.shape[1])
+
+
+def _event_text(m:int, result:str, player:str, n_shots:int, attack_xG:float, last_in_minute:bool) -> str:
+    '''
+    Returns the event log text for an attack. The final attack of each minute uses the shorter format shown while it is the latest event.
+    '''
+    if result == 'OwnGoal':
+        return f'{m}\': Own goal scored by {player}'
+    if last_in_minute:
+        if result == 'Goal':
+            if n_shots > 1:
+                return f'{m}\': Goal scored by {player} ({n_shots} shots) - {round(attack_xG,2)} xG'
+            return f'{m}\': Goal scored by {player} - {round(attack_xG,2)} xG'
+        if n_shots > 1:
+            return f'{m}\': Attack with {n_shots} shots - {round(attack_xG,2)} xG'
+        return f'{m}\': Shot by {player} - {round(attack_xG,2)} xG'
+    if result == 'Goal':
+        if n_shots > 1:
+            return f'{m}\': Goal scored by {player} from an attack with {n_shots} shots worth {round(attack_xG,2)} xG'
+        return f'{m}\': Goal scored by {player} from a shot worth {round(attack_xG,2)} xG'
+    if n_shots > 1:
+        return f'{m}\': Attack with {n_shots} shots worth {round(attack_xG,2)} xG'
+    return f'{m}\': Shot by {player} worth {round(attack_xG,2)} xG'
+
+
 if __name__=='__main__':
-    create_minute_data()
\ No newline at end of file
+    create_minute_data()
@@ -0,0 +1,91 @@
+# Imports
+import hashlib
+import os
+import numpy as np
+from PIL import Image
+from io import BytesIO
+from sys import argv
+from frame_store import DATA_DIR
+
+ICON_DIR = './icons'
+CREST_CACHE_DIR = f'{DATA_DIR}/crests'
+
+# Rasterised crests already loaded in this process, keyed by (SVG content hash, output width)
+_crests = {}
+
+def crest(team:str, size:int=None) -> Image.Image:
+    '''
+    Returns the crest of a team as an RGBA image. Crests are rasterised from the team's SVG icon once and then served from an in-process
+    cache, or from a raw array on disk when a previous run has already converted the same SVG at the same size.
+
+    :param team: Name of the team, matching an SVG file in the icons folder
+    :type team: str
+    :param size: Width in pixels to rasterise the crest at, keeping its aspect ratio. Uses the SVG's own size if None
+    :type size: int
+
+    :returns crest: Crest image
+    :rtype crest: PIL.Image.Image
+    '''
+    with open(f'{ICON_DIR}/{team}.svg', 'rb') as f:
+        svg = f.read()
+    # Key on the SVG content rather than the team name so an updated icon is never served from a stale raster
+    key = (hashlib.sha256(svg).hexdigest(), size)
+    if key not in _crests:
+        path = _cache_path(*key)
+        if os.path.exists(path):
+            pixels = np.load(path)
+        else:
+            pixels = _rasterise(svg, size)
+            os.makedirs(CREST_CACHE_DIR, exist_ok=True)
+            # Write to a temporary file first so a concurrent worker never reads a partially written raster
+            tmp_path = f'{path}.{os.getpid()}.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, pixels)
+            os.replace(tmp_path, path)
+        _crests[key] = pixels
+    return Image.fromarray(_crests[key], 'RGBA')
+
+def prewarm(size:int=None) -> int:
+    '''
+    Rasterises every crest in the icons folder into the disk cache, so later renders never need to call cairo.
+
+    :param size: Width in pixels to rasterise the crests at. Uses each SVG's own size if None
+    :type size: int
+
+    :returns n: Number of crests cached
+    :rtype n: int
+    '''
+    teams = sorted(file[:-4] for file in os.listdir(ICON_DIR) if file.endswith('.svg'))
+    for team in teams:
+        crest(team, size)
+    return len(teams)
+
+def _cache_path(svg_hash:str, size:int) -> str:
+    return f'{CREST_CACHE_DIR}/{svg_hash[:16]}_{size or "native"}.npy'
+
+def _rasterise(svg:bytes, size:int) -> np.ndarray:
+    # cairo is only needed on a cache miss, so it is imported here rather than by every module that draws a crest
+    folder_path = os.path.abspath('./venv/Lib/site-packages/cairo/bin/')
+    path_env = os.environ['PATH']
+    if folder_path not in path_env:
+        os.environ['PATH'] = folder_path + os.pathsep + path_env
+    from cairosvg import svg2png
+    image = Image.open(BytesIO(svg2png(bytestring=svg, output_width=size)))
+    return np.asarray(image.convert('RGBA'))
+
+if __name__ == '__main__':
+    size = None
+    if len(argv) > 1:
+        cl_args = argv[1:]
+        if cl_args[0] in ('-h','--help'):
+            print('''
+    -h\t\tPrint this help page.
+    -s\t\tWidth in pixels to rasterise the crests at (default: size of each SVG)'''
+            )
+            exit()
+        elif cl_args[0] == '-s' and len(cl_args) == 2:
+            size = int(cl_args[1])
+        else:
+            raise ValueError(f'Unknown command line arguments {" ".join(cl_args)}. Use -h or --help for list of command line arguments.')
+    n = prewarm(size)
+    print(f'{n} crests cached in {CREST_CACHE_DIR}')
@@ -0,0 +1,307 @@
+# Imports
+import os
+import threading
+import time
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+from understatapi import UnderstatClient
+from response_cache import ResponseCache
+from fixtures import FixtureIndex
+import tracing
+
+# Default request rate (requests per second), burst size and number of requests in flight at once
+RATE_LIMIT = 2.0
+BURST = 4
+MAX_WORKERS = 4
+# Number of times a request is retried after a rate limit response, server error or dropped connection, and the wait before the first retry
+RETRIES = 3
+RETRY_WAIT = 2.0
+# URL to send requests to instead of https://understat.com/ when no base_url is given, e.g. a StandInServer from understat_server.py
+BASE_URL = os.environ.get('UNDERSTAT_URL')
+# Age in seconds after which a cached fixture list is fetched again, unless every match it is needed for has already finished
+LEAGUE_MAX_AGE = 3600
+
+
+class RateLimiter:
+    '''
+    Token bucket rate limiter shared between threads. Tokens are added at `rate` per second up to `burst`, and each request takes one, waiting
+    for it if the bucket is empty. Waiting threads reserve their token before sleeping, so they are served in the order they arrived.
+    '''
+
+    def __init__(self, rate:float=RATE_LIMIT, burst:int=BURST) -> None:
+        '''
+        :param rate: Average number of requests allowed per second.
+        :type rate: float
+        :param burst: Number of requests that can be made back to back before the rate applies.
+        :type burst: int
+        '''
+        if rate <= 0:
+            raise ValueError(f'rate must be greater than 0, not {rate}.')
+        if burst < 1:
+            raise ValueError(f'burst must be at least 1, not {burst}.')
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        '''
+        Takes a token, sleeping until one is available. Returns the time spent waiting in seconds.
+        '''
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait > 0:
+            with tracing.span('sleep', echo=False, reason='rate_limit'):
+                time.sleep(wait)
+        return wait
+
+    def try_acquire(self) -> bool:
+        '''
+        Takes a token if one is available without waiting. Returns whether a token was taken.
+        '''
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class UnderstatFetcher:
+    '''
+    Fetches data from Understat with every request going through one `RateLimiter`, and the shots for many matches fetched concurrently by a
+    pool of threads. Each thread has its own `UnderstatClient`, since a requests session shouldn't be shared between threads. Requests can be
+    pointed at a local stand-in server with `base_url`.
+
+    If a `ResponseCache` is given, responses are reused from it where possible. The shots for a finished match never change, so they are fetched
+    once and then always read from the cache. A fixture list is reused while it is younger than `LEAGUE_MAX_AGE`, or for as long as every match
+    up to the date it is needed for has a result. In offline mode everything comes from the cache.
+
+    Use as a context manager, or call `close()` when finished:
+
+        with UnderstatFetcher(rate=4) as fetcher:
+            matches = fetcher.league_matches('EPL', '2025')
+            shots = fetcher.match_shots_many([m['id'] for m in matches if m['isResult']])
+    '''
+
+    def __init__(self, rate:float=RATE_LIMIT, burst:int=BURST, max_workers:int=MAX_WORKERS, base_url:str=None, retries:int=RETRIES,
+                 cache:ResponseCache=None) -> None:
+        '''
+        :param rate: Average number of requests per second. Default value: `2.0`
+        :type rate: float
+        :param burst: Number of requests that can be made back to back before the rate applies. Default value: `4`
+        :type burst: int
+        :param max_workers: Maximum number of requests in flight at once. Default value: `4`
+        :type max_workers: int
+        :param base_url: URL to send requests to instead of `https://understat.com/`, e.g. `'http://127.0.0.1:8000/'`. Uses the `UNDERSTAT_URL`
+            environment variable if None, or Understat itself if that isn't set either. Default value: `None`
+        :type base_url: str
+        :param retries: Number of times to retry a request after a rate limit response, server error or dropped connection. Default value: `3`
+        :type retries: int
+        :param cache: Cache to read responses from and save them to. Nothing is cached if None. Default value: `None`
+        :type cache: ResponseCache
+        '''
+        self.limiter = RateLimiter(rate, burst)
+        self.max_workers = max(1, max_workers)
+        self.base_url = base_url if base_url is not None else BASE_URL
+        self.retries = retries
+        self.cache = cache
+        self.local = threading.local()
+        self.clients = []
+        self.clients_lock = threading.Lock()
+        self.indexes = {}
+        # Totals for status messages
+        self.requests = 0
+        self.cache_hits = 0
+        self.time_waiting = 0.0
+
+    def league_matches(self, league:str, season:str, until:datetime=None) -> list[dict]:
+        '''
+        Returns the fixture list for `league` in `season`, as returned by `UnderstatClient.league(league).get_match_data(season)`.
+
+        :param until: Last date the fixture list is needed for. A cached fixture list older than `LEAGUE_MAX_AGE` is still reused if every match
+            up to this date has a result. If None, every match in the season must have a result. Default value: `None`
+        :type until: datetime
+        '''
+        key = f'{league}_{season}'
+        entry = self._cached('getLeagueData', key)
+        if entry is not None:
+            if self.cache.offline or time.time() - entry['fetched'] < LEAGUE_MAX_AGE or _finished_until(entry['data'], until):
+                return self._hit(entry)
+        with tracing.span('fetch', endpoint='getLeagueData', key=key):
+            matches = self._request(lambda client: self._endpoint(client.league(league=league)).get_match_data(season=season))
+        if self.cache is not None:
+            self.cache.put('getLeagueData', key, matches, final=_finished_until(matches, None))
+        return matches
+
+    def fixture_index(self, league:str, season:str, until:datetime=None) -> FixtureIndex:
+        '''
+        Returns the fixture list for `league` in `season` as a `FixtureIndex`. The index is built the first time it is asked for and reused for
+        the rest of this fetcher's life, so many windows can be selected from one league and season for the cost of one fetch and one sort.
+        `until` is passed on to `league_matches`.
+        '''
+        key = (league, season)
+        if key not in self.indexes:
+            self.indexes[key] = FixtureIndex(self.league_matches(league, season, until))
+        return self.indexes[key]
+
+    def match_shots(self, match_id:str, finished:bool=True) -> dict:
+        '''
+        Returns the shots for the match with ID `match_id`, as returned by `UnderstatClient.match(match_id).get_shot_data()`.
+
+        :param finished: Whether the match has finished (`isResult` in the fixture list), in which case its shots can be cached for good.
+            Default value: `True`
+        :type finished: bool
+        '''
+        entry = self._cached('getMatchData', match_id)
+        if entry is not None and (entry['final'] or self.cache.offline):
+            return self._hit(entry)
+        with tracing.span('fetch', echo=False, endpoint='getMatchData', key=match_id):
+            shots = self._request(lambda client: self._endpoint(client.match(match=match_id)).get_shot_data())
+        if self.cache is not None:
+            self.cache.put('getMatchData', match_id, shots, final=finished)
+        return shots
+
+    def match_shots_many(self, match_ids:list[str], finished:bool=True, on_result=None) -> list[dict]:
+        '''
+        Fetches the shots for every match in `match_ids` concurrently and returns them in the same order as `match_ids`. Raises the first error
+        from any match once every request has finished. `finished` is passed on to `match_shots` for every match. If given, `on_result(match_id,
+        shots)` is called from the calling thread as each match's shots arrive, including when another match fails. If the fetch is interrupted,
+        requests not yet started are cancelled and any matches already returned are passed to `on_result` before the interruption is raised.
+        '''
+        results = [None] * len(match_ids)
+        error = None
+        handed = set()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='understat')
+        futures = {pool.submit(self.match_shots, match_id, finished): i for i, match_id in enumerate(match_ids)}
+        try:
+            for n, future in enumerate(as_completed(futures)):
+                i = futures[future]
+                handed.add(future)
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # Keep collecting the other matches so they can still be handed to on_result before the error is raised
+                    error = error or e
+                    tracing.event('fetch.failed', match=match_ids[i], n=n + 1, of=len(match_ids), error=f'{type(e).__name__}: {e}')
+                    continue
+                if on_result is not None:
+                    on_result(match_ids[i], results[i])
+                tracing.event('fetch.returned', echo=False, match=match_ids[i], n=n + 1, of=len(match_ids))
+        except BaseException:
+            # Interrupted (e.g. Ctrl-C). Drop the requests not yet started rather than waiting for every one of them, and hand over the matches
+            # that have already arrived so they can still be checkpointed
+            pool.shutdown(wait=False, cancel_futures=True)
+            if on_result is not None:
+                for future, i in futures.items():
+                    if future not in handed and future.done() and not future.cancelled() and future.exception() is None:
+                        on_result(match_ids[i], future.result())
+            raise
+        pool.shutdown()
+        if error is not None:
+            raise error
+        return results
+
+    def close(self) -> None:
+        '''
+        Closes the session of every client opened by this fetcher.
+        '''
+        with self.clients_lock:
+            for client in self.clients:
+                client.session.close()
+            self.clients = []
+
+    def _client(self) -> UnderstatClient:
+        # One client per thread, created the first time the thread makes a request
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = UnderstatClient()
+            self.local.client = client
+            with self.clients_lock:
+                self.clients.append(client)
+        return client
+
+    def _cached(self, endpoint:str, key:str) -> dict:
+        '''
+        Returns the cached entry for `key` from `endpoint`, or None if there isn't one. Raises a FileNotFoundError in offline mode if there isn't
+        one, since it can't be fetched.
+        '''
+        if self.cache is None:
+            return None
+        entry = self.cache.get(endpoint, key)
+        if entry is None and self.cache.offline:
+            raise FileNotFoundError(f'No cached {endpoint} response for {key} in {self.cache.cache_dir}, and the cache is in offline mode.')
+        return entry
+
+    def _hit(self, entry:dict):
+        with self.clients_lock:
+            self.cache_hits += 1
+        return entry['data']
+
+    def _endpoint(self, endpoint):
+        # Setting the URL on the endpoint rather than the class leaves any other Understat clients in the process untouched
+        if self.base_url is not None:
+            endpoint.base_url = self.base_url if self.base_url.endswith('/') else f'{self.base_url}/'
+        return endpoint
+
+    def _request(self, call):
+        '''
+        Makes the request `call(client)` once the rate limiter allows it, retrying with a doubling wait if the request is rate limited, hits a
+        server error or loses its connection.
+        '''
+        wait = RETRY_WAIT
+        for attempt in range(self.retries + 1):
+            waited = self.limiter.acquire()
+            with self.clients_lock:
+                self.requests += 1
+                self.time_waiting += waited
+            try:
+                return call(self._client())
+            except Exception as e:
+                if attempt == self.retries or not _is_retryable(e):
+                    raise
+                # Report the underlying HTTP error rather than understatapi's 'not a valid match' wrapper around it
+                error = e.__cause__ or e
+                tracing.event('retry', error=f'{type(error).__name__}: {error}', wait=wait)
+                with tracing.span('sleep', echo=False, reason='retry', error=f'{type(error).__name__}: {error}'):
+                    time.sleep(wait)
+                wait *= 2
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _finished_until(matches:list[dict], until:datetime=None) -> bool:
+    '''
+    Whether every match in the fixture list `matches` played on or before `until` (or every match at all if `until` is None) has a result.
+    '''
+    for m in matches:
+        if until is not None and datetime(int(m['datetime'][:4]), int(m['datetime'][5:7]), int(m['datetime'][8:10])) > until:
+            continue
+        if not m['isResult']:
+            return False
+    return True
+
+
+def _is_retryable(e:Exception) -> bool:
+    '''
+    Whether a failed request is worth retrying: a rate limit response, a server error, a timeout or a dropped connection. understatapi wraps
+    HTTP errors for matches in its own exception, so the original error is checked too.
+    '''
+    for error in (e, e.__cause__):
+        if isinstance(error, (ConnectionError, Timeout)):
+            return True
+        if isinstance(error, HTTPError) and error.response is not None:
+            return error.response.status_code == 429 or error.response.status_code >= 500
+    return False
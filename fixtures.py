@@ -0,0 +1,79 @@
+# Imports
+import numpy as np
+
+
+class FixtureIndex:
+    '''
+    Fixture list for one league and season, sorted by kick-off time with the kick-off dates held as a `datetime64[D]` array, so the matches in a
+    date window are found with two binary searches rather than by parsing the date of every match. Each match is also given a matchweek: the
+    larger of the two teams' game numbers, so a rescheduled match falls in the round it was actually played in.
+
+        index = FixtureIndex(fetcher.league_matches('EPL', '2025'))
+        matches = index.select(windows=[('2025-09-13', '2025-09-14'), ('2025-09-20', '2025-09-21')], matchweeks=[1])
+    '''
+
+    def __init__(self, matches:list[dict]) -> None:
+        '''
+        :param matches: Fixture list as returned by `UnderstatFetcher.league_matches`.
+        :type matches: list[dict]
+        '''
+        # Understat lists fixtures in kick-off order, but sort anyway since a stable sort of sorted data is cheap
+        self.matches = sorted(matches, key=lambda m: m['datetime'])
+        self.dates = np.array([m['datetime'][:10] for m in self.matches], dtype='datetime64[D]')
+        self.is_result = np.array([bool(m['isResult']) for m in self.matches], dtype=bool)
+
+        played = {}
+        self.matchweeks = np.empty(len(self.matches), dtype=np.int64)
+        for i, m in enumerate(self.matches):
+            h, a = m['h']['title'], m['a']['title']
+            played[h] = played.get(h, 0) + 1
+            played[a] = played.get(a, 0) + 1
+            self.matchweeks[i] = max(played[h], played[a])
+
+    def __len__(self) -> int:
+        return len(self.matches)
+
+    def window(self, start:str=None, end:str=None, results_only:bool=True) -> list[dict]:
+        '''
+        Returns the matches played from `start` to `end` in kick-off order. Both dates are in 'YYYY-MM-DD' format and are included, and either
+        can be None to leave that end of the window open. Only matches with a result are returned if `results_only` is True.
+        '''
+        return [self.matches[i] for i in self._window_rows(start, end, results_only)]
+
+    def matchweek(self, n:int, results_only:bool=True) -> list[dict]:
+        '''
+        Returns the matches in matchweek `n` in kick-off order. Only matches with a result are returned if `results_only` is True.
+        '''
+        return [self.matches[i] for i in self._matchweek_rows(n, results_only)]
+
+    def select(self, windows:list[tuple[str, str]]=None, matchweeks:list[int]=None, results_only:bool=True) -> list[dict]:
+        '''
+        Returns every match in any of `windows` or `matchweeks`, once each and in kick-off order. If both are None, every match is returned.
+
+        :param windows: (start, end) date windows, as for `window`. Default value: `None`
+        :type windows: list[tuple[str, str]]
+        :param matchweeks: Matchweek numbers. Default value: `None`
+        :type matchweeks: list[int]
+        :param results_only: Only return matches with a result. Default value: `True`
+        :type results_only: bool
+        :returns matches: Matches in the selection.
+        :rtype matches: list[dict]
+        '''
+        if windows is None and matchweeks is None:
+            return self.window(results_only=results_only)
+        selected = np.zeros(len(self.matches), dtype=bool)
+        for start, end in windows or []:
+            selected[self._window_rows(start, end, results_only)] = True
+        for n in matchweeks or []:
+            selected[self._matchweek_rows(n, results_only)] = True
+        return [self.matches[i] for i in np.flatnonzero(selected)]
+
+    def _window_rows(self, start:str, end:str, results_only:bool) -> np.ndarray:
+        first = 0 if start is None else np.searchsorted(self.dates, np.datetime64(start, 'D'), side='left')
+        stop = len(self.matches) if end is None else np.searchsorted(self.dates, np.datetime64(end, 'D'), side='right')
+        rows = np.arange(first, stop)
+        return rows[self.is_result[rows]] if results_only else rows
+
+    def _matchweek_rows(self, n:int, results_only:bool) -> np.ndarray:
+        rows = np.flatnonzero(self.matchweeks == n)
+        return rows[self.is_result[rows]] if results_only else rows
@@ -0,0 +1,401 @@
+import os
+import time
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+DATA_DIR = './data'
+
+# Explicit on-disk dtypes for each table. String columns are stored as categoricals (integer codes plus one copy of each distinct value) since team
+# names, match codes, results and event logs repeat on most rows.
+MATCHES_SCHEMA = {
+    'match_id':'int64',
+    'h_team':'category',
+    'a_team':'category',
+    'match_code':'category',
+    'max_min':'int16'
+}
+
+SHOTS_SCHEMA = {
+    'match_id':'int64',
+    'minute':'int16',
+    'h_a':'category',
+    'xG':'float64',
+    'result':'category',
+    'x':'float64',
+    'y':'float64',
+    'player':'category',
+    'shot_type':'category',
+    'last_action':'category'
+}
+
+FRAMES_SCHEMA = {'minute':'int16'}
+for t in ('h', 'a'):
+    FRAMES_SCHEMA.update({
+        f'{t}_name':'category',
+        f'{t}_score':'int16',
+        f'{t}_xG':'float64',
+        f'{t}_0':'float64',
+        f'{t}_1':'float64',
+        f'{t}_2':'float64',
+        f'{t}_3':'float64',
+        f'{t}_4':'float64',
+        f'{t}_shot_x':'float64',
+        f'{t}_shot_y':'float64',
+        f'{t}_type':'category',
+        f'{t}_shot_xG':'float64',
+        f'{t}_event_log':'category'
+    })
+FRAMES_SCHEMA['code'] = 'category'
+
+
+def write_table(df:pd.DataFrame, path:str, schema:dict=None, compress:bool=True) -> None:
+    '''
+    Saves `df` to `path` as a columnar NumPy archive (.npz). Columns are cast to the dtypes in `schema` and stored column-major in one 2D block
+    per dtype, so loading a table reads a handful of arrays rather than one per column. Columns marked 'category' are stored as int32 codes in
+    the `category` block, with the distinct values of every categorical column concatenated into a single string array. Missing values in
+    categorical columns are stored as code -1.
+
+    :param df: Pandas DataFrame to save.
+    :type df: pd.DataFrame
+    :param path: File path to save to. Should end in `.npz`.
+    :type path: str
+    :param schema: Mapping of column name to dtype string. Columns not in `schema` keep their dtype, with strings stored as categoricals. Default
+        value: `None`
+    :type schema: dict
+    :param compress: Whether to zip-compress the arrays. Default value: `True`
+    :type compress: bool
+    '''
+    if schema is None:
+        schema = {}
+    columns = []
+    blocks = {}
+    categories = []
+    category_offsets = [0]
+    for col in df.columns:
+        dtype = schema.get(col)
+        if dtype is None:
+            dtype = 'category' if df[col].dtype == object or pd.api.types.is_string_dtype(df[col]) else df[col].dtype.str
+        columns.append((col, dtype))
+        if dtype == 'category':
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                codes, values = df[col].cat.codes.to_numpy(), df[col].cat.categories
+            else:
+                codes, values = pd.factorize(df[col], sort=True, use_na_sentinel=True)
+            blocks.setdefault(dtype, []).append(codes.astype(np.int32))
+            categories.extend(str(v) for v in values)
+            category_offsets.append(len(categories))
+        else:
+            blocks.setdefault(dtype, []).append(df[col].to_numpy(dtype=dtype))
+
+    arrays = {f'block.{dtype}': np.stack(block) for dtype, block in blocks.items()}
+    arrays['categories'] = np.array(categories, dtype=str)
+    arrays['category_offsets'] = np.array(category_offsets, dtype=np.int64)
+    arrays['__schema__'] = np.array(columns, dtype=str).reshape(-1, 2)
+
+    if compress:
+        np.savez_compressed(path, **arrays)
+    else:
+        np.savez(path, **arrays)
+
+
+def read_table(path:str, columns:list[str]=None) -> pd.DataFrame:
+    '''
+    Loads a DataFrame saved with `write_table`. Categorical columns are returned with pandas' `category` dtype, with missing values as NaN.
+
+    :param path: File path to load.
+    :type path: str
+    :param columns: Subset of columns to load. If None, all columns are loaded. Default value: `None`
+    :type columns: list[str]
+    :returns df: Pandas DataFrame with the saved columns and dtypes.
+    :rtype df: pd.DataFrame
+    '''
+    with np.load(path, allow_pickle=False) as archive:
+        schema = archive['__schema__']
+        blocks = {dtype: archive[f'block.{dtype}'] for dtype in set(schema[:, 1])}
+        categories = archive['categories']
+        category_offsets = archive['category_offsets']
+
+    data = {}
+    positions = {}
+    for col, dtype in schema:
+        # Position of this column within its dtype's block
+        i = positions.get(dtype, 0)
+        positions[dtype] = i + 1
+        if columns is not None and col not in columns:
+            continue
+        if dtype == 'category':
+            values = categories[category_offsets[i]:category_offsets[i+1]]
+            data[col] = pd.Categorical.from_codes(blocks[dtype][i], categories=values, validate=False)
+        else:
+            data[col] = blocks[dtype][i]
+    return pd.DataFrame(data)
+
+
+def _read_with_fallback(name:str, schema:dict) -> pd.DataFrame:
+    '''
+    Loads `name` from the data folder, preferring the .npz store and falling back to a legacy CSV (cast to `schema`) if no .npz file exists.
+    '''
+    path = f'{DATA_DIR}/{name}.npz'
+    if os.path.exists(path):
+        return read_table(path)
+    csv_path = f'{DATA_DIR}/{name}.csv'
+    if not os.path.exists(csv_path):
+        raise FileNotFoundError(f'No {name}.npz or {name}.csv file found in {DATA_DIR}/ folder.')
+    df = pd.read_csv(csv_path)
+    df = df.drop(columns=[c for c in df.columns if c.startswith('Unnamed')])
+    dtypes = {}
+    for col, dtype in schema.items():
+        # Integer columns with gaps can't be cast, so leave them as read
+        if col in df.columns and not (dtype.startswith('int') and df[col].isna().any()):
+            dtypes[col] = dtype
+    return df.astype(dtypes)
+
+
+def write_matches(matches:pd.DataFrame) -> None:
+    '''
+    Saves the match-level DataFrame returned by `get_league_shot_data` to `matches.npz` in the data folder.
+    '''
+    write_table(matches, f'{DATA_DIR}/matches.npz', MATCHES_SCHEMA)
+
+
+def read_matches() -> pd.DataFrame:
+    '''
+    Loads the match-level DataFrame saved by `write_matches`, or from the legacy `matches.csv` if it hasn't been saved in the new format.
+    '''
+    return _read_with_fallback('matches', MATCHES_SCHEMA)
+
+
+def write_shots(shots:pd.DataFrame) -> None:
+    '''
+    Saves the shot-level DataFrame returned by `get_league_shot_data` to `raw_shots.npz` in the data folder.
+    '''
+    write_table(shots, f'{DATA_DIR}/raw_shots.npz', SHOTS_SCHEMA)
+
+
+def read_shots() -> pd.DataFrame:
+    '''
+    Loads the shot-level DataFrame saved by `write_shots`, or from the legacy `raw_shots.csv` if it hasn't been saved in the new format.
+    '''
+    return _read_with_fallback('raw_shots', SHOTS_SCHEMA)
+
+
+def write_frames(frames:pd.DataFrame, code:str) -> None:
+    '''
+    Saves the frame table for a single match, as built by `create_minute_data`, to `{code}.npz` in the data folder.
+    '''
+    write_table(frames, f'{DATA_DIR}/{code}.npz', FRAMES_SCHEMA)
+
+
+def read_frames(code:str) -> pd.DataFrame:
+    '''
+    Loads the frame table for the match with match code `code`, or from the legacy `{code}.csv` if it hasn't been saved in the new format.
+    '''
+    return _read_with_fallback(code, FRAMES_SCHEMA)
+
+
+# Age in seconds after which a season archive lock file is assumed to have been left by a killed run. Writing an archive takes seconds
+ARCHIVE_LOCK_STALE = 600
+# Numeric frame columns held in the season archive, in column order. Every one fits in a single float64 array, and the integer columns are cast
+# back when a frame table is read.
+ARCHIVE_COLUMNS = ['minute']
+for t in ('h', 'a'):
+    ARCHIVE_COLUMNS.extend([f'{t}_score', f'{t}_xG', f'{t}_0', f'{t}_1', f'{t}_2', f'{t}_3', f'{t}_4', f'{t}_shot_x', f'{t}_shot_y', f'{t}_shot_xG'])
+ARCHIVE_COLUMNS.append('frames')
+ARCHIVE_INT_COLUMNS = ['minute', 'h_score', 'a_score', 'frames']
+# String frame columns held in the season archive as int32 codes into one array of distinct values shared by every column. Missing values are -1.
+ARCHIVE_STRING_COLUMNS = ['h_type', 'h_event_log', 'a_type', 'a_event_log']
+
+
+def write_season_archive(frames:list[pd.DataFrame], matches:pd.DataFrame, name:str) -> None:
+    '''
+    Saves the frame tables for every match in `matches` to a single season archive, which can be memory-mapped by `SeasonArchive` so rendering
+    processes can read any match's frames without them being pickled and sent to each process. If the archive already exists, matches already in
+    it are replaced and new matches are appended.
+
+    Each version of the archive is a pair of files named after a version number, `{name}.frames.{version}.npy` holding the numeric columns as one
+    float64 array with each match's frames in a contiguous block of rows and `{name}.strings.{version}.npy` holding the string columns as codes,
+    plus an index, `{name}.index.npz`, of the version and of the rows and teams of each `match_code` and `match_id`. A new version is written in
+    full before the index is swapped in with a single `os.replace`, so a reader always sees an index and frames that match. The previous version
+    is kept for readers that opened the archive just before the swap, and older versions are deleted. A lock file, `{name}.lock`, is held from
+    reading the existing archive to swapping in the new index, so runs writing the same archive at once don't drop each other's matches.
+
+    :param frames: Frame tables as returned by `create_minute_data` or `collapse_frames`, in the same order as `matches`. If a table has no
+        `frames` column, every row is stored as one frame.
+    :type frames: list[pd.DataFrame]
+    :param matches: Pandas DataFrame containing the `match_id`, `match_code`, `h_team` and `a_team` of each match in `frames`.
+    :type matches: pd.DataFrame
+    :param name: Name of the archive, e.g. 'EPL_2025'. Files are saved in the data folder.
+    :type name: str
+    '''
+    with _archive_lock(name):
+        _write_season_archive(frames, matches, name)
+
+
+def _write_season_archive(frames:list[pd.DataFrame], matches:pd.DataFrame, name:str) -> None:
+    tables = {}
+    try:
+        existing = SeasonArchive(name)
+        for code, id, h_team, a_team in zip(existing.match_codes, existing.match_ids, existing.h_teams, existing.a_teams):
+            tables[code] = (id, h_team, a_team, existing.frame_table(code))
+        previous = existing.version
+    except (FileNotFoundError, ValueError):
+        # No archive yet, or one saved before archives were versioned, which is replaced
+        previous = None
+    for df, code, id, h_team, a_team in zip(frames, matches['match_code'], matches['match_id'], matches['h_team'], matches['a_team']):
+        tables[str(code)] = (int(id), str(h_team), str(a_team), df)
+
+    codes = list(tables.keys())
+    lengths = np.array([tables[c][3].shape[0] for c in codes], dtype=np.int64)
+    stops = np.cumsum(lengths)
+    n_rows = int(stops[-1]) if len(codes) else 0
+    version = time.time_ns()
+
+    # Write the new version's frames and strings in full before the index that points at them
+    frames_path = f'{DATA_DIR}/{name}.frames.{version}.npy'
+    strings_path = f'{DATA_DIR}/{name}.strings.{version}.npy'
+    index_path = f'{DATA_DIR}/{name}.index.npz'
+    values = {}
+    out = np.lib.format.open_memmap(frames_path, mode='w+', dtype=np.float64, shape=(n_rows, len(ARCHIVE_COLUMNS)))
+    out_strings = np.lib.format.open_memmap(strings_path, mode='w+', dtype=np.int32, shape=(n_rows, len(ARCHIVE_STRING_COLUMNS)))
+    for code, start, stop in zip(codes, stops - lengths, stops):
+        df = tables[code][3]
+        for i, col in enumerate(ARCHIVE_COLUMNS):
+            if col == 'frames' and col not in df:
+                out[start:stop, i] = 1
+            else:
+                out[start:stop, i] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        for i, col in enumerate(ARCHIVE_STRING_COLUMNS):
+            out_strings[start:stop, i] = [-1 if pd.isna(v) else values.setdefault(v, len(values)) for v in df[col].tolist()]
+    out.flush()
+    out_strings.flush()
+    del out, out_strings
+    with open(f'{index_path}.tmp', 'wb') as f:
+        np.savez(
+            f,
+            version=np.int64(version),
+            match_code=np.array(codes, dtype=str),
+            match_id=np.array([tables[c][0] for c in codes], dtype=np.int64),
+            h_team=np.array([tables[c][1] for c in codes], dtype=str),
+            a_team=np.array([tables[c][2] for c in codes], dtype=str),
+            start=stops - lengths,
+            stop=stops,
+            columns=np.array(ARCHIVE_COLUMNS, dtype=str),
+            string_columns=np.array(ARCHIVE_STRING_COLUMNS, dtype=str),
+            string_values=np.array(list(values), dtype=str)
+        )
+    os.replace(f'{index_path}.tmp', index_path)
+
+    # Readers map the files when they open the archive, so deleting a version only affects archives opened from an index older than the previous
+    keep = {f'{version}.npy', f'{previous}.npy'}
+    for file in os.listdir(DATA_DIR):
+        if file.startswith((f'{name}.frames.', f'{name}.strings.')) and file.split('.', 2)[2] not in keep:
+            try:
+                os.remove(f'{DATA_DIR}/{file}')
+            except OSError:
+                # On Windows a file can't be deleted while another process has it mapped. It is removed by a later write instead
+                pass
+
+
+@contextmanager
+def _archive_lock(name:str):
+    '''
+    Holds the lock file for the season archive `name` until the block exits, waiting for any other run holding it. A lock left by a run that
+    was killed is taken over once it is older than `ARCHIVE_LOCK_STALE` seconds.
+    '''
+    os.makedirs(DATA_DIR, exist_ok=True)
+    path = f'{DATA_DIR}/{name}.lock'
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > ARCHIVE_LOCK_STALE:
+                    os.remove(path)
+                    continue
+            except OSError:
+                # Released (or taken over) between the two checks
+                continue
+            time.sleep(0.1)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        os.remove(path)
+
+
+class SeasonArchive:
+    '''
+    Read-only, memory-mapped view of a season archive saved by `write_season_archive`. Only the index is read when the archive is opened; the
+    frames for a match are returned as zero-copy views into the mapped files, so many rendering processes can share one copy in the page cache.
+    The archive stays on the version it was opened on, even if a newer one is written while it is open.
+
+        archive = SeasonArchive('EPL_2025')
+        minute_data = archive.frame_table('ARSCHE20250913')
+
+    :param name: Name of the archive, e.g. 'EPL_2025'.
+    :type name: str
+    '''
+    def __init__(self, name:str):
+        self.name = name
+        with np.load(f'{DATA_DIR}/{name}.index.npz', allow_pickle=False) as index:
+            if 'version' not in index:
+                raise ValueError(f'The {name} season archive was saved in an older format. Write it again with write_season_archive.')
+            self.version = int(index['version'])
+            self.match_codes = index['match_code'].tolist()
+            self.match_ids = index['match_id'].tolist()
+            self.h_teams = index['h_team'].tolist()
+            self.a_teams = index['a_team'].tolist()
+            starts = index['start'].tolist()
+            stops = index['stop'].tolist()
+            self.columns = index['columns'].tolist()
+            self.string_columns = index['string_columns'].tolist()
+            self._string_values = np.append(index['string_values'].astype(object), np.nan)
+        self._rows = dict(zip(self.match_codes, zip(starts, stops)))
+        self._rows.update(zip(self.match_ids, zip(starts, stops)))
+        self._column_index = {col: i for i, col in enumerate(self.columns)}
+        self._data = np.load(f'{DATA_DIR}/{name}.frames.{self.version}.npy', mmap_mode='r')
+        self._strings = np.load(f'{DATA_DIR}/{name}.strings.{self.version}.npy', mmap_mode='r')
+
+    def __contains__(self, match) -> bool:
+        return match in self._rows
+
+    def __len__(self) -> int:
+        return len(self.match_codes)
+
+    def frames(self, match) -> np.ndarray:
+        '''
+        Returns a read-only (frames, columns) view of the numeric frames for `match`, which can be either a match code or a match ID.
+        '''
+        start, stop = self._match_rows(match)
+        return self._data[start:stop]
+
+    def column(self, match, col:str) -> np.ndarray:
+        '''
+        Returns a read-only view of a single numeric column of the frames for `match`.
+        '''
+        return self.frames(match)[:, self._column_index[col]]
+
+    def frame_table(self, match) -> pd.DataFrame:
+        '''
+        Returns the frame table for `match` with the columns `MatchFigure.set_match` draws from. The float columns are views into the mapped
+        file; only the integer and string columns, which are small, are copied.
+        '''
+        start, stop = self._match_rows(match)
+        data = self._data[start:stop]
+        columns = {}
+        for i, col in enumerate(self.columns):
+            columns[col] = data[:, i].astype(np.int64) if col in ARCHIVE_INT_COLUMNS else data[:, i]
+        strings = self._strings[start:stop]
+        for i, col in enumerate(self.string_columns):
+            # Code -1 picks the NaN appended to the values
+            columns[col] = self._string_values[strings[:, i]]
+        return pd.DataFrame(columns, copy=False)
+
+    def _match_rows(self, match) -> tuple[int, int]:
+        try:
+            return self._rows[match]
+        except KeyError:
+            raise KeyError(f'{match} is not in the {self.name} season archive.')
@@ -1,13 +1,42 @@
-from understatapi import UnderstatClient
-import time
+from fetch import UnderstatFetcher, RATE_LIMIT, BURST, MAX_WORKERS
+from response_cache import ResponseCache
+from shot_store import ShotStore
+from shot_db import ShotDatabase
+from checkpoint import FetchCheckpoint, CHECKPOINT_EVERY
+import tracing
+import hashlib
 from datetime import datetime
 import pandas as pd
+from frame_store import write_matches, write_shots
 
-def get_league_shot_data(league:list[str], season:list[str]=None, period_start:str=None, period_end:str=None) -> tuple[pd.DataFrame]:
+def current_season() -> str:
+    '''
+    Returns the Understat season ID for the current season: the previous year from Jan 1 to Jul 31, and the current year from Aug 1 to Dec 31.
+    '''
+    cur_month = datetime.today().month
+    cur_year = datetime.today().year
+    if cur_month >= 8:
+        return str(cur_year)
+    return str(cur_year-1)
+
+
+def get_league_shot_data(league:list[str], season:list[str]=None, period_start:str=None, period_end:str=None, rate:float=RATE_LIMIT,
+                         burst:int=BURST, max_workers:int=MAX_WORKERS, base_url:str=None, cache_mode:str='on', sync:bool=False, resume:bool=False,
+                         checkpoint_every:int=CHECKPOINT_EVERY, windows:list[tuple[str, str]]=None, matchweeks:list[int]=None) -> tuple[pd.DataFrame]:
     '''
     Get the shot data from understat for every game in a specified league (or leagues), for a given season (or seasons), for a given time period. 
-    If `period_start` and `period_end` are None, return shot data for all games in the specified season (or seasons). If `season` is None, most 
-    recent season is used. Function saves the data in `/data/matches.csv` and `/data/raw_shots.csv` as well as returning the pandas DataFrames.
+    If `period_start` and `period_end` are None, return shot data for all games in the specified season (or seasons). Further date `windows` and
+    `matchweeks` can be selected in the same call, and a match in any of them is returned. If `season` is None, most recent season is used.
+    Function saves the data in `/data/matches.npz` and `/data/raw_shots.npz` as well as returning the pandas DataFrames.
+    The shots for each match are fetched concurrently by `max_workers` threads, with all requests kept to `rate` requests per second. Responses
+    are cached in `/data/cache/`, so finished matches are only ever downloaded once. Every match fetched is also added to the `ShotDatabase` in
+    `/data/shots.db`.
+
+    With `sync`, every result for each league and season is kept in a persistent `ShotStore` in `/data/store/`. Only results that aren't in the
+    store yet are fetched and added to it, and the matches in the requested period are then read back out of the store.
+
+    Fetched shots are checkpointed to `/data/checkpoints/` every `checkpoint_every` matches until the run finishes. If a run is interrupted,
+    calling again with the same leagues, seasons and period and `resume=True` only fetches the matches that aren't in the checkpoint.
     
     :param league: a list of the leagues to get data for. One of {'EPL', 'La_Liga', 'Bundesliga', 'Serie_A', 'Ligue_1', 'RFPL'}
     :type league: list[str] | str
@@ -19,6 +48,32 @@ def get_league_shot_data(league:list[str], season:list[str]=None, period_start:s
     :type period_start: str
     :param period_end: Ending date for return period. Must be in 'YYYY-MM-DD' format. Matches played on this date included.
     :type period_end: str
+    :param rate: Average number of requests per second to make to Understat. Default value: `2.0`
+    :type rate: float
+    :param burst: Number of requests that can be made back to back before `rate` applies. Default value: `4`
+    :type burst: int
+    :param max_workers: Maximum number of requests in flight at once. Default value: `4`
+    :type max_workers: int
+    :param base_url: URL to send requests to instead of `https://understat.com/`, e.g. a local `understat_server.StandInServer`. Uses the
+        `UNDERSTAT_URL` environment variable if None, or Understat itself if that isn't set either. Default value: `None`
+    :type base_url: str
+    :param cache_mode: 'on' to reuse and save cached responses, 'off' to fetch everything, or 'offline' to only use cached responses without any
+        network access. Default value: `'on'`
+    :type cache_mode: str
+    :param sync: If True, bring the stored results for each league and season up to date and return the requested period from the store, rather
+        than fetching just the matches in the period. Default value: `False`
+    :type sync: bool
+    :param resume: If True, reuse the shots checkpointed by an interrupted run with the same leagues, seasons and period. Otherwise any such
+        checkpoint is discarded. Default value: `False`
+    :type resume: bool
+    :param checkpoint_every: Number of matches fetched between checkpoints. Default value: `25`
+    :type checkpoint_every: int
+    :param windows: Extra (start, end) date windows to return matches from, in the same format as `period_start` and `period_end`. Default value:
+        `None`
+    :type windows: list[tuple[str, str]]
+    :param matchweeks: Matchweek numbers to return matches from. A match's matchweek is the larger of the two teams' game numbers in the season.
+        Default value: `None`
+    :type matchweeks: list[int] | int
     :returns matches_df: Pandas DataFrame containing the ID `match_id`, Home Team name `h_team`, Away Team name `a_team`, Match Code `match_code`,
         and maximum number minutes in the game `max_min`, for each match
     :rtype matches_df: pd.DataFrame
@@ -28,11 +83,6 @@ def get_league_shot_data(league:list[str], season:list[str]=None, period_start:s
         the shot was taken (Rebound, Pass, etc.) `last_action`
     :rtype shots_df: pd.DataFrame
     '''
-    # Set up timer
-    sleep_setting = 2
-    clock_start = time.monotonic()
-    time_asleep = 0
-
     # Check for errors in function parameters
     if type(league) == str:
         league = [league]
@@ -46,69 +96,150 @@ def get_league_shot_data(league:list[str], season:list[str]=None, period_start:s
     if type(season) == str:
         season = [season]
     if season is None or len(season) == 0:
-        cur_month = datetime.today().month
-        cur_year = datetime.today().year
-        if cur_month >= 8:
-            season = [str(cur_year)]
-        else:
-            season = [str(cur_year-1)]
+        season = [current_season()]
     else:
         for s in season:
             if type(s) != str:
                 raise TypeError(f'{s} is type {type(s)}. Season ids must be type string.')
             if int(s) <= 2013:
                 raise ValueError(f'Understat has no data for {s} season. Earliest data available is for the 2014/15 season.')
+    valid_cache_modes = {'on','off','offline'}
+    if cache_mode not in valid_cache_modes:
+        raise ValueError(f'{cache_mode} is not a valid cache mode. Please select from {valid_cache_modes}.')
     if (period_end is not None and period_start is None) or (period_start is not None and period_end is None):
         raise ValueError('period_start and period_end must both be set or both be None')
+    windows = list(windows or [])
     if period_start is not None:
-        if type(period_start) != str:
-            raise TypeError(f'{period_start} is type {type(period_start)}. period_start must be of type string in "YYYY-MM-DD" format')
-        else:
-            start_year = int(period_start.split('-')[0])
-            start_month = int(period_start.split('-')[1])
-            start_day = int(period_start.split('-')[2])
-            if start_day > 31:
-                raise ValueError(f'{period_start} is not a valid date in "YYYY-MM-DD" format.')
-            elif start_day == 31 and start_month in (2,4,6,9,11):
-                raise ValueError(f'{period_start} is not a valid date in "YYYY-MM-DD" format.')
-            elif start_day > 29 and start_month == 2:
-                raise ValueError(f'{period_start} is not a valid date in "YYYY-MM-DD" format.')
-            elif start_day == 29 and start_month ==2:
-                if not (((start_year % 4 == 0) and (start_year % 100 != 0)) or (start_year % 400 == 0)):
-                    raise ValueError(f'{period_start} is not a valid date ({start_year} is not a leap year)')
-            elif start_month > 12:
-                raise ValueError(f'{period_start} is not a valid date in "YYYY-MM-DD" format. Did you mean "{start_year}-{start_day}-{start_month}"?')
-    if period_end is not None:
-        if type(period_end) != str:
-            raise TypeError(f'{period_end} is type {type(period_end)}. period_end must be of type string in "YYYY-MM-DD" format')
+        windows.append((period_start, period_end))
+    for start, end in windows:
+        if _parse_date(start, 'period_start') > _parse_date(end, 'period_end'):
+            raise ValueError(f'period_end ({end}) cannot be before period_start ({start})')
+    if matchweeks is not None:
+        if type(matchweeks) == int:
+            matchweeks = [matchweeks]
+        for n in matchweeks:
+            if type(n) != int or n < 1:
+                raise ValueError(f'{n} is not a valid matchweek. Matchweeks are whole numbers from 1.')
+    # Select everything if no windows or matchweeks are given
+    if len(windows) == 0 and matchweeks is None:
+        windows = None
+
+    # Work out which matches are needed from the fixture list for each league and season, then fetch their shots concurrently
+    cache = None if cache_mode == 'off' else ResponseCache(offline=cache_mode == 'offline')
+    # The fixture list is only needed up to the last day of the last window, unless matchweeks are selected
+    until = None
+    if windows is not None and matchweeks is None:
+        until = max(datetime.strptime(end, '%Y-%m-%d') for start, end in windows)
+    with UnderstatFetcher(rate, burst, max_workers, base_url, cache=cache) as fetcher:
+        selected = []
+        groups = []
+        for l in league:
+            for s in season:
+                # A sync covers every result so far, whatever period is being returned
+                index = fetcher.fixture_index(l, s, datetime.today() if sync else until)
+                if sync:
+                    store = ShotStore(l, s)
+                    new = [m for m in index.select() if m['id'] not in store.match_ids]
+                    tracing.event('fixtures.new', league=l, season=s, results=len(index), stored=len(store), watermark=store.watermark, new=len(new))
+                    selected.extend(new)
+                    groups.append((l, s, store, new, index.select(windows, matchweeks)))
+                    continue
+                group = index.select(windows, matchweeks)
+                tracing.event('fixtures.selected', league=l, season=s, results=len(index), matches=len(group))
+                selected.extend(group)
+                groups.append((l, s, None, group, group))
+
+        # Matches already in the checkpoint of an interrupted run are not fetched again
+        checkpoint = FetchCheckpoint(_run_name(league, season, windows, matchweeks, sync), every=checkpoint_every)
+        if resume:
+            shots_by_id = checkpoint.load()
+            tracing.event('checkpoint.resume', matches=len(shots_by_id))
         else:
-            end_year = int(period_end.split('-')[0])
-            end_month = int(period_end.split('-')[1])
-            end_day = int(period_end.split('-')[2])
-            if end_day > 31:
-                raise ValueError(f'{period_end} is not a valid date in "YYYY-MM-DD" format.')
-            elif end_day == 31 and end_month in (2,4,6,9,11):
-                raise ValueError(f'{period_end} is not a valid date in "YYYY-MM-DD" format.')
-            elif end_day > 29 and end_month == 2:
-                raise ValueError(f'{period_end} is not a valid date in "YYYY-MM-DD" format.')
-            elif end_day == 29 and end_month ==2:
-                if not (((end_year % 4 == 0) and (end_year % 100 != 0)) or (end_year % 400 == 0)):
-                    raise ValueError(f'{period_end} is not a valid date ({end_year} is not a leap year)')
-            elif end_month > 12:
-                raise ValueError(f'{period_end} is not a valid date in "YYYY-MM-DD" format. Did you mean "{end_year}-{end_day}-{end_month}"?')
-            if (end_year < start_year) or ((end_month < start_month) and (end_year <= start_year)) or ((end_day < start_day) and (end_month <= start_month)):
-                raise ValueError(f'period_end ({period_end}) cannot be before period_start ({period_start})')
-    
-    elapsed = time.monotonic()
-    print(f'Parameter checks complete. {round(elapsed - clock_start,4)} seconds elapsed...')
+            checkpoint.remove()
+            shots_by_id = {}
+        to_fetch = [m['id'] for m in selected if m['id'] not in shots_by_id]
+
+        with checkpoint, tracing.span('fetch.shots', matches=len(to_fetch), rate=rate):
+            match_shots = fetcher.match_shots_many(to_fetch, on_result=checkpoint.add)
+        shots_by_id.update(zip(to_fetch, match_shots))
+        tracing.event('fetch.totals', requests=fetcher.requests, cache_hits=fetcher.cache_hits, rate_limit_wait=round(fetcher.time_waiting, 2))
 
+    # Add the fetched matches to the shot database and, when syncing, to each store. When syncing, the requested period is then read back out of
+    # the stores
+    period_matches = []
+    period_shots = []
+    with tracing.span('save.data'), ShotDatabase() as db:
+        for l, s, store, group, in_period in groups:
+            group_matches, group_shots = shot_tables(group, [shots_by_id[m['id']] for m in group])
+            db.insert(l, s, group_matches, group_shots)
+            if not sync:
+                period_matches.append(group_matches)
+                period_shots.append(group_shots)
+                continue
+            n_new = store.upsert(group_matches, group_shots)
+            tracing.event('store.upsert', league=store.league, season=store.season, added=n_new, stored=len(store), watermark=store.watermark)
+            stored_matches = store.matches()
+            stored_matches = stored_matches[stored_matches['match_id'].astype(str).isin([m['id'] for m in in_period])]
+            stored_shots = store.shots()
+            period_matches.append(stored_matches)
+            period_shots.append(stored_shots[stored_shots['match_id'].isin(stored_matches['match_id'])])
+    # The kick-off time is only needed to find matches in the store and database
+    matches_df = pd.concat(period_matches, ignore_index=True).drop(columns='datetime')
+    shots_df = pd.concat(period_shots, ignore_index=True)
+
+    with tracing.span('save.frame_store', matches=matches_df.shape[0], shots=shots_df.shape[0]):
+        write_matches(matches_df)
+        write_shots(shots_df)
+    # Everything fetched is now saved, so the checkpoint is no longer needed
+    checkpoint.remove()
+    return matches_df, shots_df
+
+
+def _parse_date(value:str, name:str) -> datetime:
+    '''
+    Returns the date `value`, given for the parameter `name` in 'YYYY-MM-DD' format, raising a TypeError or ValueError if it isn't a valid date.
+    '''
+    if type(value) != str:
+        raise TypeError(f'{value} is type {type(value)}. {name} must be of type string in "YYYY-MM-DD" format')
+    try:
+        return datetime.strptime(value, '%Y-%m-%d')
+    except ValueError:
+        parts = value.split('-')
+        if len(parts) == 3 and parts[1].isdigit() and parts[2].isdigit() and int(parts[1]) > 12 and int(parts[2]) <= 12:
+            raise ValueError(f'{value} is not a valid date in "YYYY-MM-DD" format. Did you mean "{parts[0]}-{parts[2]}-{parts[1]}"?')
+        raise ValueError(f'{value} is not a valid date in "YYYY-MM-DD" format.')
+
+
+def _run_name(league:list[str], season:list[str], windows:list[tuple[str, str]], matchweeks:list[int], sync:bool) -> str:
+    '''
+    Returns a name for a fetch of the given leagues, seasons, windows and matchweeks, which is the same every time the same fetch is made.
+    '''
+    name = f'{"-".join(league)}_{"-".join(season)}'
+    if windows is None and matchweeks is None:
+        name += '_all'
+    for start, end in windows or []:
+        name += f'_{start}_{end}'
+    if matchweeks is not None:
+        name += f'_mw{"-".join(str(n) for n in matchweeks)}'
+    if len(name) > 120:
+        # Many windows would make too long a file name, so shorten it to a prefix and a hash of the whole
+        name = f'{name[:80]}_{hashlib.sha1(name.encode()).hexdigest()[:12]}'
+    return f'{name}_sync' if sync else name
+
+
+def shot_tables(matches:list[dict], match_shots:list[dict]) -> tuple[pd.DataFrame]:
+    '''
+    Builds the match-level and shot-level DataFrames described in `get_league_shot_data` from Understat fixture list entries `matches` and the
+    shot data for each of them, `match_shots`. The match-level DataFrame also has the kick-off time of each match as `datetime`.
+    '''
     # Set up dictionaries for collecting the holding the understat data
     match_data = {
         'match_id':[],
         'h_team':[],
         'a_team':[],
         'match_code':[],
-        'max_min':[]
+        'max_min':[],
+        'datetime':[]
     }
 
     shot_data = {
@@ -124,160 +255,50 @@ def get_league_shot_data(league:list[str], season:list[str]=None, period_start:s
         'last_action':[]
     }
 
-    # Create understat session client
-    u = UnderstatClient()
-    for l in league:
-        for s in season:
-            time.sleep(sleep_setting)
-            time_asleep += sleep_setting
-            print(f'Getting match data for {s} season of {l}...')
-            matches = u.league(league=l).get_match_data(season=s)
-            elapsed = time.monotonic()
-            print(f'{len(matches)} match results returned. {round(elapsed - clock_start,2)} seconds elapsed, of which {time_asleep} spent asleep.')
-            total_results = sum([m['isResult'] for m in matches])
-            loop_counter = 0
-            for m in matches:
-                if m['isResult']:
-                    # Use all matches if period_start is None, otherwise check match date to ensure in scope
-                    if period_start is None:
-                        # Increment counter for status messages
-                        loop_counter += 1
+    for m, shots in zip(matches, match_shots):
+        # Get team names and match code
+        h_team = m['h']['title']
+        a_team = m['a']['title']
+        code = f'{m['h']['short_title']}{m['a']['short_title']}{m['datetime'][:4]}{m['datetime'][5:7]}{m['datetime'][8:10]}'
+        h_shots = shots['h']
+        a_shots = shots['a']
 
-                        # Get team names and match code
-                        h_team = m['h']['title']
-                        a_team = m['a']['title']
-                        code = f'{m['h']['short_title']}{m['a']['short_title']}{m['datetime'][:4]}{m['datetime'][5:7]}{m['datetime'][8:10]}'
+        # Determine last minute a shot was taken or default to 90 minute game
+        max_min = 90
+        if len(h_shots) > 0 and int(h_shots[-1]['minute']) > max_min:
+            max_min = int(h_shots[-1]['minute'])
+        if len(a_shots) > 0 and int(a_shots[-1]['minute']) > max_min:
+            max_min = int(a_shots[-1]['minute'])
 
-                        # Get shot data from Understat for current match
-                        print(f'Getting shot data for result {loop_counter} of {total_results}. Roughly {(total_results - (loop_counter - 1))*sleep_setting} seconds remaining...')
-                        time.sleep(sleep_setting)
-                        time_asleep += sleep_setting
-                        shots = u.match(m['id']).get_shot_data()
-                        h_shots = shots['h']
-                        a_shots = shots['a']
+        # Append match-level values to match_data
+        match_data['match_id'].append(m['id'])
+        match_data['h_team'].append(h_team)
+        match_data['a_team'].append(a_team)
+        match_data['match_code'].append(code)
+        match_data['max_min'].append(max_min)
+        match_data['datetime'].append(m['datetime'])
 
-                        # Determine last minute a shot was taken or default to 90 minute game
-                        max_min = 90
-                        if int(h_shots['minute'][-1]) > max_min:
-                            max_min = int(h_shots['minute'][-1])
-                        if int(a_shots['minute'][-1]) > max_min:
-                            max_min = int(a_shots['minute'][-1])
+        # Loop through shots to get minute, home/away, xG, result, x/y coords, player who took the shot, and last action
+        for s in h_shots + a_shots:
+            shot_data['match_id'].append(m['id'])
+            shot_data['minute'].append(int(s['minute']))
+            shot_data['h_a'].append(s['h_a'])
+            shot_data['xG'].append(float(s['xG']))
+            shot_data['result'].append(s['result'])
+            shot_data['x'].append(float(s['X']))
+            shot_data['y'].append(float(s['Y']))
+            shot_data['player'].append(s['player'])
+            shot_data['shot_type'].append(s['shotType'])
+            shot_data['last_action'].append(s['lastAction'])
 
-                        # Append match-level values to match_data
-                        match_data['match_id'].append(m['id'])
-                        match_data['h_team'].append(h_team)
-                        match_data['a_team'].append(a_team)
-                        match_data['match_code'].append(code)
-                        match_data['max_min'].append(max_min)
-
-                        # Loop through shots to get minute, home/away, xG, result, x/y coords, player who took the shot, and last action
-                        for s in h_shots:
-                            shot_data['match_id'].append(m['id'])
-                            shot_data['minute'].append(int(s['minute']))
-                            shot_data['h_a'].append(s['h_a'])
-                            shot_data['xG'].append(float(s['xG']))
-                            shot_data['result'].append(s['result'])
-                            shot_data['x'].append(float(s['X']))
-                            shot_data['y'].append(float(s['Y']))
-                            shot_data['player'].append(s['player'])
-                            shot_data['shot_type'].append(s['shotType'])
-                            shot_data['last_action'].append(s['lastAction'])
-                        for s in a_shots:
-                            shot_data['match_id'].append(m['id'])
-                            shot_data['minute'].append(int(s['minute']))
-                            shot_data['h_a'].append(s['h_a'])
-                            shot_data['xG'].append(float(s['xG']))
-                            shot_data['result'].append(s['result'])
-                            shot_data['x'].append(float(s['X']))
-                            shot_data['y'].append(float(s['Y']))
-                            shot_data['player'].append(s['player'])
-                            shot_data['shot_type'].append(s['shotType'])
-                            shot_data['last_action'].append(s['lastAction'])
-                        
-                        elapsed = time.monotonic()
-                        print(f'{len(h_shots) + len(a_shots)} shots returned. {round(elapsed - clock_start,2)} seconds elapsed, of which {time_asleep} spent asleep.')
-                    else:
-                        match_year = int(m['datetime'][:4])
-                        match_month = int(m['datetime'][5:7])
-                        match_day = int(m['datetime'][8:10])
-                        if datetime(match_year, match_month, match_day) >= datetime(start_year, start_month, start_day) and datetime(match_year, match_month, match_day) <= datetime(end_year, end_month, end_day):
-                            # Increment counter for status messages
-                            loop_counter += 1
-
-                            # Get team names and match code
-                            h_team = m['h']['title']
-                            a_team = m['a']['title']
-                            code = f'{m['h']['short_title']}{m['a']['short_title']}{m['datetime'][:4]}{m['datetime'][5:7]}{m['datetime'][8:10]}'
-
-                            # Get shot data from Understat for current match
-                            print(f'Getting shot data for result {loop_counter} of {total_results}. Roughly {(total_results - (loop_counter - 1))*sleep_setting} seconds remaining...')
-                            time.sleep(sleep_setting)
-                            time_asleep += sleep_setting
-                            shots = u.match(m['id']).get_shot_data()
-                            h_shots = shots['h']
-                            a_shots = shots['a']
-
-                            # Determine last minute a shot was taken or default to 90 minute game
-                            max_min = 90
-                            if int(h_shots[-1]['minute']) > max_min:
-                                max_min = int(h_shots[-1]['minute'])
-                            if int(a_shots[-1]['minute']) > max_min:
-                                max_min = int(a_shots[-1]['minute'])
-
-                            # Append match-level values to match_data
-                            match_data['match_id'].append(m['id'])
-                            match_data['h_team'].append(h_team)
-                            match_data['a_team'].append(a_team)
-                            match_data['match_code'].append(code)
-                            match_data['max_min'].append(max_min)
-
-                            # Loop through shots to get minute, home/away, xG, result, x/y coords, player who took the shot, and last action
-                            for s in h_shots:
-                                shot_data['match_id'].append(m['id'])
-                                shot_data['minute'].append(int(s['minute']))
-                                shot_data['h_a'].append(s['h_a'])
-                                shot_data['xG'].append(float(s['xG']))
-                                shot_data['result'].append(s['result'])
-                                shot_data['x'].append(float(s['X']))
-                                shot_data['y'].append(float(s['Y']))
-                                shot_data['player'].append(s['player'])
-                                shot_data['shot_type'].append(s['shotType'])
-                                shot_data['last_action'].append(s['lastAction'])
-                            for s in a_shots:
-                                shot_data['match_id'].append(m['id'])
-                                shot_data['minute'].append(int(s['minute']))
-                                shot_data['h_a'].append(s['h_a'])
-                                shot_data['xG'].append(float(s['xG']))
-                                shot_data['result'].append(s['result'])
-                                shot_data['x'].append(float(s['X']))
-                                shot_data['y'].append(float(s['Y']))
-                                shot_data['player'].append(s['player'])
-                                shot_data['shot_type'].append(s['shotType'])
-                                shot_data['last_action'].append(s['lastAction'])
-                            
-                            elapsed = time.monotonic()
-                            print(f'{len(h_shots) + len(a_shots)} shots returned. {round(elapsed - clock_start,2)} seconds elapsed, of which {time_asleep} spent asleep.')
-                        elif datetime(match_year, match_month, match_day) > datetime(end_year, end_month, end_day):
-                            # Since match data appears chronologically in the outputted Understat data, all matches after the period_end can be disregarded
-                            print(f'Breaking loop. No further matches before {period_end}. Shot data for {loop_counter} matches returned.')
-                            break
-        
-    matches_df = pd.DataFrame(match_data)
-    shots_df = pd.DataFrame(shot_data)
-
-    matches_df.to_csv('./data/matches.csv', index=False)
-    shots_df.to_csv('./data/raw_shots.csv')
-
-    elapsed = time.monotonic()
-    print(f'Data collected and saved to CSV files in data folder.\n\nTotal Elapsed Time: {round(elapsed - clock_start, 4)} seconds.\nTime sleeping: {time_asleep} seconds')
-    return matches_df, shots_df
+    return pd.DataFrame(match_data), pd.DataFrame(shot_data)
 
 
 def get_team_shot_data(team:str, season:list[str]=None, period_start:str=None, period_end:str=None):
     '''
     Get the shot data from understat for every game for a specified team (or teams) for a given season (or seasons), for a given time period. 
     If `period_start` and `period_end` are None, return shot data for all games in the specified season (or seasons). If `season` is None, most 
-    recent season is used. Function saves the data in `/data/matches.csv` and `/data/raw_shots.csv` as well as returning the pandas DataFrames.
+    recent season is used. Function saves the data in `/data/matches.npz` and `/data/raw_shots.npz` as well as returning the pandas DataFrames.
 
     :param team: a list of the teams to get data for. Team names should be as they appear in the `title` for each team but with whitespaces (' ')
         replaced with underscores ('_').
@@ -304,6 +325,8 @@ if __name__ == '__main__':
     season = '2025'
     period_start = '2025-09-26'
     period_end = '2025-09-29'
+    # Print each stage as it finishes
+    tracing.configure(echo=True)
     matches, shots = get_league_shot_data(leagues, season, period_start, period_end)
     print('\nMatches:')
     print(matches.head())
@@ -1,22 +1,24 @@
 # Imports
-from get_shot_data import get_league_shot_data
-from create_minute_data import create_minute_data
-from colours import TEAM_COLOURS, BG_COLOUR, TEXT_COLOUR, PITCH_COLOUR, PAINT_COLOUR
+from get_shot_data import get_league_shot_data, current_season
+from fetch import RATE_LIMIT
+from create_minute_data import create_minute_data, collapse_frames
+from frame_store import SeasonArchive, write_season_archive
+from match_figure import match_figure
+from writers import animation_writer, gif_palette, FILE_EXTENSIONS
+import tracing
+import memory_profile
 import matplotlib.pyplot as plt
-from matplotlib.patches import Rectangle, Ellipse, Arc
-from matplotlib.animation import FuncAnimation
 import pandas as pd
+import numpy as np
 import time
-from PIL import Image
-from io import BytesIO
+import tempfile
 from sys import argv
 import datetime
 import os
-folder_path = os.path.abspath('./venv/Lib/site-packages/cairo/bin/')
-path_env = os.environ['PATH']
-if folder_path not in path_env:
-    os.environ['PATH'] = folder_path + os.pathsep + path_env
-from cairosvg import svg2png
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context, current_process
+
+FPS = 30
 
 
 def main(marker_size:int=300, **kwargs) -> None:
@@ -27,6 +29,17 @@ def main(marker_size:int=300, **kwargs) -> None:
     season = None
     period_start = None
     period_end = None
+    workers = 1
+    frame_workers = 1
+    animation_format = 'gif'
+    rate = RATE_LIMIT
+    base_url = None
+    cache_mode = 'on'
+    sync = False
+    resume = False
+    matchweeks = None
+    trace = 'off'
+    memory = False
 
     for k, val in kwargs.items():
         match k:
@@ -40,373 +53,381 @@ def main(marker_size:int=300, **kwargs) -> None:
                 period_start = val
             case 'period_end' | 'end':
                 period_end = val
+            case 'workers' | 'w':
+                workers = int(val) if val is not None else 1
+            case 'frame_workers' | 'fw':
+                frame_workers = int(val) if val is not None else 1
+            case 'format' | 'f':
+                animation_format = val if val is not None else 'gif'
+            case 'rate' | 'r':
+                rate = float(val) if val is not None else RATE_LIMIT
+            case 'base_url' | 'u':
+                base_url = val
+            case 'cache' | 'c':
+                cache_mode = val if val is not None else 'on'
+            case 'sync' | 'i':
+                sync = bool(val)
+            case 'resume' | 'rs':
+                resume = bool(val)
+            case 'matchweeks' | 'mw':
+                matchweeks = val
+            case 'trace' | 'tr':
+                trace = val if val is not None else 'off'
+            case 'memory' | 'mem':
+                memory = bool(val)
             case _:
                 raise KeyError(f'{k} is not a valid keyword argument for main().')
     
+    if animation_format not in FILE_EXTENSIONS:
+        raise ValueError(f'Unknown animation format "{animation_format}". Use one of {", ".join(FILE_EXTENSIONS)}.')
+    if trace not in ('off', 'on', 'chrome'):
+        raise ValueError(f'Unknown trace mode "{trace}". Use off, on or chrome.')
+
     start = time.monotonic()
+    if trace != 'off':
+        trace_log, trace_file = tracing.trace_paths()
+        tracing.configure(trace_log)
+    if memory:
+        memory_log, memory_report = memory_profile.profile_paths()
+        memory_profile.configure(memory_log)
+
+    with tracing.span('data', league=league, season=season), memory_profile.stage('data'):
+        matches, shots = get_league_shot_data(league, season, period_start, period_end, rate=rate, base_url=base_url, cache_mode=cache_mode,
+                                              sync=sync, resume=resume, matchweeks=matchweeks)
+    with tracing.span('frames', matches=matches.shape[0]), memory_profile.stage('frames'):
+        match_minutes = create_minute_data(matches,shots)
 
-    matches, shots = get_league_shot_data(league, season, period_start, period_end)
-    match_minutes = create_minute_data(matches,shots)
+    # Collapse runs of identical frames so each is only drawn once
+    with memory_profile.stage('frames.collapse'):
+        match_minutes = [collapse_frames(minute_data) for minute_data in match_minutes]
 
-    for m_ix in range(len(match_minutes)):
-        print(f'Creating visual {m_ix + 1} of {len(match_minutes)}...')
-        # Get match code, match id, and team names from matches
+    # Add the frames to the memory-mapped archive for this league and season. Renderers read each match's frames from the archive, so the frame
+    # tables don't need to be pickled and sent to every process
+    leagues = [league] if type(league) == str else league
+    seasons = [season] if type(season) == str else (season or [current_season()])
+    archive_name = f'{'-'.join(leagues)}_{'-'.join(seasons)}'
+    with tracing.span('save.archive', archive=archive_name), memory_profile.stage('save.archive'):
+        write_season_archive(match_minutes, matches, archive_name)
+    n_matches = len(match_minutes)
+    del match_minutes
+
+    jobs = []
+    for m_ix in range(n_matches):
+        # Get match code and team names from matches
         code = matches['match_code'][m_ix]
-        id = matches['match_id'][m_ix]
         h_team = matches['h_team'][m_ix]
         a_team = matches['a_team'][m_ix]
-        
-        # Get minute by minute data and raw shot data for match
-        minute_data = match_minutes[m_ix]
-        h_shots = shots[(shots['match_id']==id) & (shots['h_a']=='h')].reset_index()
-        a_shots = shots[(shots['match_id']==id) & (shots['h_a']=='a')].reset_index()
-
-        # Invert away team x and y coordinates
-        a_shots['x_adj'] = a_shots['x'].apply(lambda x: 1 - x)
-        a_shots['y_adj'] = a_shots['y'].apply(lambda y: 1 - y)
-
-        # Get team crests, converting from SVG to PNG
-        h_crest = Image.open(BytesIO(svg2png(url=f'./icons/{h_team}.svg')))
-        a_crest = Image.open(BytesIO(svg2png(url=f'./icons/{a_team}.svg')))
-
-        # Set team colours [primary, accent, outline]
-        h_colour = TEAM_COLOURS[h_team]
-        if TEAM_COLOURS[a_team][0] == h_colour[0]:
-            a_colour = TEAM_COLOURS[a_team][::-1]
-        else:
-            a_colour = TEAM_COLOURS[a_team]
-        if h_colour[0] == 'white':
-            h_colour.append(h_colour[1])
-        else:
-            h_colour.append(h_colour[0])
-        if a_colour[0] == 'white':
-            a_colour.append(a_colour[1])
-        else:
-            a_colour.append(a_colour[0])
-        
-        # Initialise variable data
-        h_score = minute_data['h_score'][0]
-        a_score = minute_data['a_score'][0]
-        h_xG = minute_data['h_xG'][0]
-        a_xG = minute_data['a_xG'][0]
-        h_prob = [minute_data['h_0'][0], minute_data['h_1'][0], minute_data['h_2'][0], minute_data['h_3'][0], minute_data['h_4'][0]]
-        a_prob = [minute_data['a_0'][0], minute_data['a_1'][0], minute_data['a_2'][0], minute_data['a_3'][0], minute_data['a_4'][0]]
-        h_at_least = [h_prob[0],0,0,0,0]
-        a_at_least = [a_prob[0],0,0,0,0]
-
-        # Set up mpl figure with 10*8 grid and 0 wspace to allow prob bars to share central axis
-        fig = plt.figure(figsize=(10,10))
-        gs = fig.add_gridspec(10, 8, wspace=0)
-        shotmap_ax = fig.add_subplot(gs[1:4,2:6])
-        h_prob_ax = fig.add_subplot(gs[4:,0:4])
-        a_prob_ax = fig.add_subplot(gs[4:,4:])
-        ax = [h_prob_ax, a_prob_ax, shotmap_ax]
-
-        # Add bars for exact and at least probabilities, and outline
-        h_p_bar = ax[0].barh(range(5), h_prob, color=h_colour[0], zorder=3)
-        h_al_bar = ax[0].barh(range(5), h_at_least, color = h_colour[1], hatch='//', edgecolor=h_colour[0], zorder=2)
-        h_ol_bar = ax[0].barh(range(5), h_at_least, fill=False, edgecolor=h_colour[2], zorder=3)
-        a_p_bar = ax[1].barh(range(5), a_prob, color=a_colour[0], zorder=3)
-        a_al_bar = ax[1].barh(range(5), a_at_least, color=a_colour[1], hatch='//', edgecolor=a_colour[0], zorder=2)
-        a_ol_bar = ax[1].barh(range(5), a_at_least, fill=False, edgecolor=a_colour[2], zorder=3)
-
-        # Add scatter plots for missed/blocked shots, own goals, and goals
-        h_s_scat = ax[2].scatter(
-            x=h_shots[(h_shots['minute'] <= 0) & (h_shots['result'] != 'Goal') & (h_shots['result']!='OwnGoal')]['x'],
-            y=h_shots[(h_shots['minute'] <= 0) & (h_shots['result'] != 'Goal') & (h_shots['result']!='OwnGoal')]['y'],
-            s=[marker_size*n for n in h_shots[(h_shots['minute']<=0) & (h_shots['result'] != 'Goal') & (h_shots['result'] != 'OwnGoal')]['xG']],
-            color=h_colour[0],
-            alpha=0.6,
-            zorder=2
-        )
-        h_og_scat = ax[2].scatter(
-            x=h_shots[(h_shots['minute']<=0) & (h_shots['result']=='OwnGoal')]['x'],
-            y=h_shots[(h_shots['minute']<=0) & (h_shots['result']=='OwnGoal')]['y'],
-            s=[marker_size*0.5 for n in h_shots[(h_shots['minute']<=0) & (h_shots['result']=='OwnGoal')]['xG']],
-            color=h_colour[1],
-            marker='*',
-            edgecolors=h_colour[0],
-            alpha=0.6,
-            zorder=3
-        )
-        h_g_scat = ax[2].scatter(
-            x=h_shots[(h_shots['minute']<=0) & (h_shots['result']=='Goal')]['x'],
-            y=h_shots[(h_shots['minute']<=0) & (h_shots['result']=='Goal')]['y'],
-            s=[marker_size*n for n in h_shots[(h_shots['minute']<=0) & (h_shots['result']=='Goal')]['xG']],
-            color=h_colour[0],
-            marker='*',
-            edgecolors=h_colour[1],
-            alpha=0.6,
-            zorder=3
-        )
-        a_s_scat = ax[2].scatter(
-            x=a_shots[(a_shots['minute'] <= 0) & (a_shots['result'] != 'Goal') & (a_shots['result']!='OwnGoal')]['x_adj'],
-            y=a_shots[(a_shots['minute'] <= 0) & (a_shots['result'] != 'Goal') & (a_shots['result']!='OwnGoal')]['y_adj'],
-            s=[marker_size*n for n in a_shots[(a_shots['minute']<=0) & (a_shots['result'] != 'Goal') & (a_shots['result'] != 'OwnGoal')]['xG']],
-            color=a_colour[0],
-            alpha=0.6,
-            zorder=2
-        )
-        a_og_scat = ax[2].scatter(
-            x=a_shots[(a_shots['minute']<=0) & (a_shots['result']=='OwnGoal')]['x_adj'],
-            y=a_shots[(a_shots['minute']<=0) & (a_shots['result']=='OwnGoal')]['y_adj'],
-            s=[marker_size*0.5 for n in a_shots[(a_shots['minute']<=0) & (a_shots['result']=='OwnGoal')]['xG']],
-            color=a_colour[1],
-            marker='*',
-            edgecolors=a_colour[0],
-            alpha=0.6,
-            zorder=3
-        )
-        a_g_scat = ax[2].scatter(
-            x=a_shots[(a_shots['minute']<=0) & (a_shots['result']=='Goal')]['x_adj'],
-            y=a_shots[(a_shots['minute']<=0) & (a_shots['result']=='Goal')]['y_adj'],
-            s=[marker_size*n for n in a_shots[(a_shots['minute']<=0) & (a_shots['result']=='Goal')]['xG']],
-            color=a_colour[0],
-            marker='*',
-            edgecolors=a_colour[1],
-            alpha=0.6,
-            zorder=3
-        )
-
-        # Set background colour and shared formatting for bar plots
-        fig.set_facecolor(BG_COLOUR)
-        for a in ax[:-1]:
-            a.set_facecolor(BG_COLOUR)
-            a.set_yticks(range(5), labels=["0", "1", "2", "3", "4+"], color=TEXT_COLOUR)
-            a.tick_params(axis='y',length=0)
-            a.set_ylabel('Goals Scored', color=TEXT_COLOUR)
-            a.set_xlabel('Probability (%)', color=TEXT_COLOUR)
-            a.invert_yaxis()
-            a.spines['top'].set_visible(False)
-            a.spines['bottom'].set_visible(False)
-            a.grid(True, color='0.85', axis='x', zorder=1)
-        
-        # Set inverted formatting for subplots
-        ax[0].set_xlim(1,0)
-        ax[0].set_xticks([1,.9,.8,.7,.6,.5,.4,.3,.2,.1,0], labels=range(100,-10,-10), color=TEXT_COLOUR)
-        ax[0].spines['left'].set_visible(False)
-        ax[0].spines['right'].set(zorder=4)
-        ax[1].set_xlim(0,1)
-        ax[1].set_xticks([0,.1,.2,.3,.4,.5,.6,.7,.8,.9,1], labels=range(0,105,10), color=TEXT_COLOUR)
-        ax[1].spines['right'].set_color('0.85')
-        ax[1].spines['right'].set(zorder=1)
-        ax[1].yaxis.set_label_position('right')
-        ax[1].yaxis.set_ticks_position('right')
-
-        # Set formatting for scatterplot
-        ax[2].set_xlim(0,1)
-        ax[2].set_ylim(0,1)
-        ax[2].tick_params(axis='both', length=0)
-        ax[2].get_xaxis().set_ticks([])
-        ax[2].get_yaxis().set_ticks([])
-        ax[2].set_facecolor(PITCH_COLOUR)
-        # Add penalty boxes and halfway line to scatterplot
-        ax[2].axvline(x=0.5, color=PAINT_COLOUR, zorder=1)
-        centre_circle = ax[2].add_patch(Ellipse(xy=(0.5,0.5),width=0.11,height=0.175,color=PAINT_COLOUR,fill=False))
-        centre_circle.set_zorder(1)
-        ax[2].hlines(y=[0.19, 0.81],xmin=0,xmax=0.17,colors=PAINT_COLOUR,zorder=1)
-        ax[2].axvline(x=0.17,ymin=0.19,ymax=0.81,color=PAINT_COLOUR,zorder=1)
-        ax[2].hlines(y=[0.37,0.63],xmin=0,xmax=0.055,colors=PAINT_COLOUR,zorder=1)
-        ax[2].axvline(x=0.055,ymin=0.37,ymax=0.63,color=PAINT_COLOUR,zorder=1)
-        ax[2].hlines(y=[0.19,0.81],xmin=0.83,xmax=1,colors=PAINT_COLOUR,zorder=1)
-        ax[2].axvline(x=0.83,ymin=0.19,ymax=0.81,color=PAINT_COLOUR,zorder=1)
-        ax[2].hlines(y=[0.37,0.63],xmin=0.945,xmax=1,colors=PAINT_COLOUR,zorder=1)
-        ax[2].axvline(x=0.945,ymin=0.37,ymax=0.63,color=PAINT_COLOUR,zorder=1)
-        h_pen_arc = ax[2].add_patch(Arc(xy=(0.115,0.5),width=0.16,height=0.15,angle=270,theta1=49,theta2=131,color=PAINT_COLOUR))
-        a_pen_arc = ax[2].add_patch(Arc(xy=(0.885,0.5),width=0.16,height=0.15,angle=90,theta1=49,theta2=131,color=PAINT_COLOUR))
-        h_pen_arc.set_zorder(1)
-        a_pen_arc.set_zorder(1)
-        # Add arrow showing direction of attack
-        ax[2].axhline(y=0.85,xmin=0.3,xmax=0.7,color=TEXT_COLOUR,zorder=2)
-        ax[2].plot([0.67,0.7],[0.9,0.85],color=TEXT_COLOUR,zorder=2)
-        ax[2].plot([0.67,0.7],[0.8,0.85],color=TEXT_COLOUR,zorder=2)
-        
-
-        # Create legend
-        labels = ['Exactly','At Least']
-        handles = [Rectangle((0,0),1,1,color='black'), Rectangle((0,0),1,1,facecolor='white',hatch='//',edgecolor='black')]
-        ax[1].legend(labels=labels, handles=handles, loc='lower right', fancybox=False, framealpha=0.5)
-
-        # Add Header Text
-        minute_label = ax[2].text(0.5, 1.1, '0\'', size='x-large',ha='center',weight='bold',color=TEXT_COLOUR)
-        match h_team:
-            case 'Wolverhampton Wanderers':
-                h_team_label = 'Wolves'
-            case 'Tottenham':
-                h_team_label = 'Spurs'
-            case _:
-                h_team_label = h_team
-        match a_team:
-            case 'Wolverhampton Wanderers':
-                a_team_label = 'Wolves'
-            case 'Tottenham':
-                a_team_label = 'Spurs'
-            case _:
-                a_team_label = a_team
-        ax[2].text(0.5,0.925,f'{h_team_label} attacking',ha='center',size='medium',color=TEXT_COLOUR,zorder=2)
-        ax[2].text(-0.45,0.2,h_team_label,size='large',ha='left',weight='bold',color=TEXT_COLOUR)
-        h_score_label = ax[2].text(-0.45,0.1,h_score,size='x-large',ha='left',weight='bold',color=TEXT_COLOUR)
-        h_xG_label = ax[2].text(-0.45,0,f'({round(h_xG,2)})',size='large',ha='left',weight='normal',color=TEXT_COLOUR)
-        ax[2].text(1.45,0.2,a_team_label,size='large',ha='right',weight='bold',color=TEXT_COLOUR)
-        a_score_label = ax[2].text(1.45,0.1,a_score,size='x-large',ha='right',weight='bold',color=TEXT_COLOUR)
-        a_xG_label = ax[2].text(1.45,0,f'({round(a_xG,2)})',size='large',ha='right',weight='normal',color=TEXT_COLOUR)
-        h_event_label = ax[2].text(0.4,1.1,'',size='medium',ha='right',weight='normal',color=TEXT_COLOUR)
-        a_event_label = ax[2].text(0.6,1.1,'',size='medium',ha='left',weight='normal',color=TEXT_COLOUR)
-
-        # Add Team crests either side of scatter plot
-        ax_h_crest = fig.add_subplot(gs[1:3,0:2])
-        ax_h_crest.imshow(h_crest)
-        ax_h_crest.set_zorder(5)
-        ax_h_crest.axis('off')
-        ax_a_crest = fig.add_subplot(gs[1:3,-2:])
-        ax_a_crest.imshow(a_crest)
-        ax_a_crest.set_zorder(5)
-        ax_a_crest.axis('off')
-
-        # Adjust margins to allow room for minute and events text at top
-        fig.subplots_adjust(left=0.075, bottom=0.075, right=0.925, top=1.025)
-
-        # Set up artists list for blitting
-        artists = [minute_label, h_score_label, h_xG_label, a_score_label, a_xG_label, h_event_label, a_event_label]
-        artists.extend(h_p_bar.patches)
-        artists.extend(a_p_bar.patches)
-        artists.extend(h_al_bar.patches)
-        artists.extend(a_al_bar.patches)
-        artists.extend(h_ol_bar.patches)
-        artists.extend(a_ol_bar.patches)
-        artists.append(h_s_scat)
-        artists.append(a_s_scat)
-        artists.append(h_og_scat)
-        artists.append(a_og_scat)
-        artists.append(h_g_scat)
-        artists.append(a_g_scat)
-
-        n_h_shots = [0]
-        n_a_shots = [0]
-
-        def update(f):
-            h_prob = [minute_data['h_0'][f], minute_data['h_1'][f], minute_data['h_2'][f], minute_data['h_3'][f], minute_data['h_4'][f]]
-            a_prob = [minute_data['a_0'][f], minute_data['a_1'][f], minute_data['a_2'][f], minute_data['a_3'][f], minute_data['a_4'][f]]
-            h_at_least[0] = h_prob[0]
-            a_at_least[0] = a_prob[0]
-            for i in range(1,len(h_at_least)):
-                h_at_least[i] = sum(h_prob[i:])
-                a_at_least[i] = sum(a_prob[i:])
-            frame_minute = minute_data['minute'][f]
-
-            # Update text
-            minute_label.set_text(f'{frame_minute}\'')
-            h_score_label.set_text(f'{minute_data['h_score'][f]}')
-            h_xG_label.set_text(f'({round(minute_data['h_xG'][f],2)})')
-            h_event_label.set_text(f'{minute_data['h_event_log'][f]}')
-            a_score_label.set_text(f'{minute_data['a_score'][f]}')
-            a_xG_label.set_text(f'({round(minute_data['a_xG'][f],2)})')
-            a_event_label.set_text(f'{minute_data['a_event_log'][f]}')
-
-            # Update bar widths
-            for r in range(len(h_p_bar.patches)):
-                h_p_bar.patches[r].set_width(h_prob[r])
-                a_p_bar.patches[r].set_width(a_prob[r])
-                h_al_bar.patches[r].set_width(h_at_least[r])
-                a_al_bar.patches[r].set_width(a_at_least[r])
-                h_ol_bar.patches[r].set_width(h_at_least[r])
-                a_ol_bar.patches[r].set_width(a_at_least[r])
-            
-            # Update scatter plots
-            if minute_data['h_type'][f] is not None:
-                match minute_data['h_type'][f]:
-                    case 'Goal':
-                        h_g_scat = ax[2].scatter(
-                            x=minute_data['h_shot_x'][f],
-                            y=minute_data['h_shot_y'][f],
-                            s=marker_size*minute_data['h_shot_xG'][f],
-                            color=h_colour[0],
-                            marker='*',
-                            edgecolors=h_colour[1],
-                            alpha=0.8,
-                            zorder=3
-                        )
-                    case 'OwnGoal':
-                        h_og_scat = ax[2].scatter(
-                            x=minute_data['h_shot_x'][f],
-                            y=minute_data['h_shot_y'][f],
-                            s=marker_size*0.5,
-                            color=h_colour[1],
-                            marker='*',
-                            edgecolors=h_colour[0],
-                            alpha=0.8,
-                            zorder=3
-                        )
-                    case _:
-                        h_s_scat = ax[2].scatter(
-                            x=minute_data['h_shot_x'][f],
-                            y=minute_data['h_shot_y'][f],
-                            s=marker_size*minute_data['h_shot_xG'][f],
-                            color=h_colour[0],
-                            alpha=0.6,
-                            zorder=3
-                        )
-                
-                        
-                # n_h_shots.append(h_shots[h_shots['minute']<=frame_minute].shape[0])
-            if minute_data['a_type'][f] is not None:
-                match minute_data['a_type'][f]:
-                    case 'Goal':
-                        a_g_scat = ax[2].scatter(
-                            x=minute_data['a_shot_x'][f],
-                            y=minute_data['a_shot_y'][f],
-                            s=marker_size*minute_data['a_shot_xG'][f],
-                            color=a_colour[0],
-                            marker='*',
-                            edgecolors=a_colour[1],
-                            alpha=0.8,
-                            zorder=3
-                        )
-                    case 'OwnGoal':
-                        a_og_scat = ax[2].scatter(
-                            x=minute_data['a_shot_x'][f],
-                            y=minute_data['a_shot_y'][f],
-                            s=marker_size*0.5,
-                            color=a_colour[1],
-                            marker='*',
-                            edgecolors=a_colour[0],
-                            alpha=0.8,
-                            zorder=3
-                        )
-                    case _:
-                        a_s_scat = ax[2].scatter(
-                            x=minute_data['a_shot_x'][f],
-                            y=minute_data['a_shot_y'][f],
-                            s=marker_size*minute_data['a_shot_xG'][f],
-                            color=a_colour[0],
-                            alpha=0.6,
-                            zorder=3
-                        )
-                # n_a_shots.append(a_shots[a_shots['minute']<=frame_minute].shape[0])
-            return artists
-        
-        def progress(i, n):
-            current = time.monotonic()
-            print(f'Saving frame {i} of {n} for {code} (match {m_ix + 1}/{len(match_minutes)}). Time elapsed: {round((current - animation_start),2)} seconds')
-
-        animation_start = time.monotonic()
-        ani = FuncAnimation(fig, update, frames=range(minute_data.shape[0]), interval=25, repeat=False, blit=True)
-        ani.save(f'./output/animated/{code}.gif','pillow',fps=30, progress_callback=progress)
-        
-        minute_label.set_text('')
-        h_event_label.set_text('')
-        a_event_label.set_text('')
-        fig.subplots_adjust(top=1.05)
-        fig.savefig(f'./output/static/{code}.png')
-
-        elapsed = time.monotonic()
-        print(f'Visuals created for {code}. Total time elapsed: {int(((elapsed - start)/60) - (((elapsed - start)%60)/60))} minutes and {round((elapsed - start)%60,2)} seconds.')
+
+        jobs.append((code, h_team, a_team, archive_name, marker_size, f'match {m_ix + 1}/{n_matches}', start, frame_workers, animation_format))
+
+    failed = []
+    if workers > 1:
+        # Each worker process renders whole matches with its own Agg figures. Output names only depend on the match code, so the order
+        # matches finish in doesn't matter
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context('spawn'), initializer=_init_worker,
+                                 initargs=(tracing.settings(), memory_profile.settings())) as pool:
+            futures = {pool.submit(_render_match_safe, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                try:
+                    code, error = future.result()
+                except Exception as e:
+                    # Worker process died (e.g. killed for running out of memory) rather than the render raising
+                    code, error = futures[future], f'{type(e).__name__}: {e}'
+                if error is not None:
+                    failed.append((code, error))
+    else:
+        for job in jobs:
+            code, error = _render_match_safe(*job)
+            if error is not None:
+                failed.append((code, error))
+
+    elapsed = time.monotonic()
+    print(f'{len(jobs) - len(failed)} of {len(jobs)} matches rendered in {round(elapsed - start, 2)} seconds.')
+    for code, error in failed:
+        print(f'Failed to render {code}: {error}')
+
+    if trace != 'off':
+        tracing.close()
+        print(f'Trace log saved to {trace_log}')
+        if trace == 'chrome':
+            tracing.write_chrome_trace(trace_log, trace_file)
+            print(f'Chrome trace saved to {trace_file}. Open it in chrome://tracing or https://ui.perfetto.dev')
+    if memory:
+        memory_profile.close()
+        memory_profile.write_report(memory_log, memory_report)
+
+
+def render_match(code:str, h_team:str, a_team:str, minute_data:pd.DataFrame|str, marker_size:int=300, label:str='', batch_start:float=None,
+                 frame_workers:int=1, animation_format:str='gif') -> None:
+    '''
+    Renders the animation and static PNG for a single match and saves them to `./output/animated/{code}.{ext}` (e.g. `{code}.gif`) and
+    `./output/static/{code}.png`.
+    Runs in its own process when `main()` is called with more than one worker, so it only uses the data it is passed or reads from the season
+    archive.
+
+    :param code: Match code, used for the output file names.
+    :type code: str
+    :param h_team: Name of the home team.
+    :type h_team: str
+    :param a_team: Name of the away team.
+    :type a_team: str
+    :param minute_data: Frame table for the match as returned by `create_minute_data` or `collapse_frames`, or the name of the season archive
+        saved by `write_season_archive` to read it from.
+    :type minute_data: pd.DataFrame | str
+    :param marker_size: Marker size for a shot with an xG of 1. Default value: `300`
+    :type marker_size: int
+    :param label: Label used for the match in progress messages, e.g. 'match 3/10'. Default value: `''`
+    :type label: str
+    :param batch_start: `time.monotonic()` value at the start of the batch, used for the total elapsed time message. Default value: `None`
+    :type batch_start: float
+    :param frame_workers: Number of processes to split the frames of the animation between. With 1 the whole animation is drawn in this
+        process. Default value: `1`
+    :type frame_workers: int
+    :param animation_format: Format to save the animation in, one of 'gif', 'mp4', 'webm', 'webp' or 'apng'. Default value: `'gif'`
+    :type animation_format: str
+    '''
+    if batch_start is None:
+        batch_start = time.monotonic()
+
+    log(f'Creating visual for {code} ({label})...')
+    archive_name = minute_data if type(minute_data) == str else None
+    minute_data = _match_frames(code, minute_data)
+    n_frames = minute_data.shape[0]
+    if frame_workers > 1 and n_frames > 1:
+        # Workers read the frames from the archive themselves when there is one
+        render_frames_parallel(code, h_team, a_team, archive_name or minute_data, marker_size, label, frame_workers, animation_format)
+    else:
+        with tracing.span('figure.setup', echo=False, match=code), memory_profile.stage('figure.setup', match=code):
+            figure = match_figure()
+            figure.set_match(h_team, a_team, minute_data, marker_size)
+            # The first and last frames cover every colour used in a GIF animation
+            palette = None
+            if animation_format == 'gif':
+                palette = gif_palette([figure.frame(0).copy(), figure.frame(n_frames - 1).copy()])
+
+        def frames():
+            for f in range(n_frames):
+                with tracing.span('draw', echo=False, match=code, frame=f):
+                    frame = figure.frame(f)
+                yield frame
+
+        with memory_profile.stage('save.animation', match=code):
+            save_animation(frames(), _animation_path(code, animation_format), _frame_durations(minute_data), palette, animation_format)
+        with tracing.span('save.static', echo=False, match=code), memory_profile.stage('save.static', match=code):
+            figure.save_static(f'./output/static/{code}.png')
+
+    elapsed = time.monotonic()
+    log(f'Visuals created for {code}. Total time elapsed: {int(((elapsed - batch_start)/60) - (((elapsed - batch_start)%60)/60))} minutes and {round((elapsed - batch_start)%60,2)} seconds.')
+
+
+def render_frames_parallel(code:str, h_team:str, a_team:str, minute_data:pd.DataFrame|str, marker_size:int=300, label:str='',
+                           frame_workers:int=2, animation_format:str='gif') -> None:
+    '''
+    Renders the animation and static PNG for a single match with its frames split into `frame_workers` contiguous ranges, each drawn by a
+    separate process. Every worker builds its own copy of the figure and writes its frames as raw RGBA arrays to a temporary .npy file. The
+    ranges are then read back in order and encoded into a single animation in this process, so the output is the same as rendering the match in
+    one go.
+
+    :param code: Match code, used for the output file names.
+    :type code: str
+    :param h_team: Name of the home team.
+    :type h_team: str
+    :param a_team: Name of the away team.
+    :type a_team: str
+    :param minute_data: Frame table for the match as returned by `create_minute_data` or `collapse_frames`, or the name of the season archive
+        saved by `write_season_archive` to read it from.
+    :type minute_data: pd.DataFrame | str
+    :param marker_size: Marker size for a shot with an xG of 1. Default value: `300`
+    :type marker_size: int
+    :param label: Label used for the match in progress messages, e.g. 'match 3/10'. Default value: `''`
+    :type label: str
+    :param frame_workers: Number of processes to split the frames between. Default value: `2`
+    :type frame_workers: int
+    :param animation_format: Format to save the animation in, as for `render_match`. Default value: `'gif'`
+    :type animation_format: str
+    '''
+    archive_name = minute_data if type(minute_data) == str else None
+    minute_data = _match_frames(code, minute_data)
+    n_frames = minute_data.shape[0]
+    bounds = np.linspace(0, n_frames, min(frame_workers, n_frames) + 1).astype(int).tolist()
+
+    with tempfile.TemporaryDirectory(prefix=f'{code}_frames_') as tmp_dir:
+        paths = [os.path.join(tmp_dir, f'{i}.npy') for i in range(len(bounds) - 1)]
+        with ProcessPoolExecutor(max_workers=len(paths), mp_context=get_context('spawn'), initializer=_init_worker,
+                                 initargs=(tracing.settings(), memory_profile.settings())) as pool:
+            futures = [
+                pool.submit(
+                    render_frame_range, code, h_team, a_team, archive_name or minute_data, marker_size, bounds[i], bounds[i+1], paths[i],
+                    label, bounds[i+1] == n_frames
+                )
+                for i in range(len(paths))
+            ]
+            # Raises the first error from any of the ranges
+            for future in futures:
+                future.result()
+
+        # Stitch the ranges together in frame order
+        palette = None
+        if animation_format == 'gif':
+            palette = gif_palette([np.load(paths[0], mmap_mode='r')[0], np.load(paths[-1], mmap_mode='r')[-1]])
+        save_animation(_read_frame_ranges(paths), _animation_path(code, animation_format), _frame_durations(minute_data), palette, animation_format)
+
+
+def render_frame_range(code:str, h_team:str, a_team:str, minute_data:pd.DataFrame|str, marker_size:int, first:int, last:int, path:str, label:str='',
+                       save_static:bool=False) -> str:
+    '''
+    Draws frames `first` to `last - 1` of a match and writes them to `path` as a (frames, height, width, 4) uint8 RGBA array in .npy format. Run
+    in a worker process by `render_frames_parallel`. Returns `path`.
+
+    :param first: Index of the first frame to draw.
+    :type first: int
+    :param last: Index one past the last frame to draw.
+    :type last: int
+    :param path: File to write the frames to.
+    :type path: str
+    :param save_static: If True, also save the static PNG once the last frame is drawn. Should only be set for the range that ends the match.
+        Default value: `False`
+    :type save_static: bool
+
+    The remaining parameters are the same as for `render_match`.
+    '''
+    minute_data = _match_frames(code, minute_data)
+    with tracing.span('figure.setup', echo=False, match=code), memory_profile.stage('figure.setup', match=code):
+        figure = match_figure()
+        figure.set_match(h_team, a_team, minute_data, marker_size)
+
+    width, height = figure.fig.canvas.get_width_height()
+    with memory_profile.stage('draw', match=code):
+        frames = np.lib.format.open_memmap(path, mode='w+', dtype=np.uint8, shape=(last - first, height, width, 4))
+        for f in range(first, last):
+            with tracing.span('draw', echo=False, match=code, frame=f):
+                frames[f - first] = figure.frame(f)
+        frames.flush()
+        del frames
+    log(f'Frames {first} to {last - 1} of {minute_data.shape[0]} drawn for {code} ({label}).')
+
+    if save_static:
+        with tracing.span('save.static', echo=False, match=code):
+            figure.save_static(f'./output/static/{code}.png')
+    tracing.flush()
+    return path
+
+
+def save_animation(frames, path:str, durations:list[int]=None, palette:np.ndarray=None, animation_format:str='gif') -> None:
+    '''
+    Streams `frames`, an iterable of (height, width, 4) uint8 RGBA arrays, into an animation at `path` playing at `FPS` frames per second. Each
+    frame is handed to the encoder as soon as it is drawn.
+
+    :param durations: Display time of each frame in milliseconds, as returned by `_frame_durations`. Every frame is shown for one frame at `FPS`
+        if None. Default value: `None`
+    :type durations: list[int]
+    :param palette: Palette shared by every frame of a GIF, as returned by `writers.gif_palette`. Built from the first frame if None. Default
+        value: `None`
+    :type palette: np.ndarray
+    :param animation_format: Format to save the animation in, one of the keys of `writers.FILE_EXTENSIONS`. Default value: `'gif'`
+    :type animation_format: str
+    '''
+    with tracing.span('save.animation', echo=False, path=path), animation_writer(path, animation_format, palette, FPS) as writer:
+        for f, frame in enumerate(frames):
+            with tracing.span('encode', echo=False, frame=f):
+                writer.write(frame, durations[f] if durations else int(1000 / FPS))
+
+
+def _animation_path(code:str, animation_format:str) -> str:
+    '''
+    Output path for the animation of the match with match code `code`.
+    '''
+    return f'./output/animated/{code}.{FILE_EXTENSIONS[animation_format]}'
+
+
+def _match_frames(code:str, minute_data:pd.DataFrame|str) -> pd.DataFrame:
+    '''
+    Returns `minute_data` if it is a frame table, or the frame table for the match with match code `code` from the season archive named
+    `minute_data`.
+    '''
+    if type(minute_data) == str:
+        return SeasonArchive(minute_data).frame_table(code)
+    return minute_data
+
+
+def _frame_durations(minute_data:pd.DataFrame) -> list[int]:
+    '''
+    Display time in milliseconds of each row of a frame table collapsed by `collapse_frames`, or None if every row is a single frame. A row
+    standing for n frames is held for n times the duration of one frame, which is what the GIF encoder gives when it merges n identical frames,
+    so the animation keeps the same timing once GIF durations are rounded down to hundredths of a second.
+    '''
+    if 'frames' not in minute_data:
+        return None
+    return (minute_data['frames'].to_numpy() * int(1000 / FPS)).tolist()
+
+
+def _read_frame_ranges(paths:list[str]):
+    '''
+    Yields the frames written by `render_frame_range` to each of `paths` in turn.
+    '''
+    for path in paths:
+        frames = np.load(path, mmap_mode='r')
+        for f in range(frames.shape[0]):
+            yield frames[f]
+        del frames
+
+
+def _init_worker(trace_settings:dict=None, memory_settings:dict=None) -> None:
+    '''
+    Sets up a rendering worker process to draw with the non-interactive Agg backend, to trace to the same log as the main process if
+    `trace_settings` (from `tracing.settings()`) is given, and to profile memory to the same log as the main process if `memory_settings` (from
+    `memory_profile.settings()`) is given.
+    '''
+    plt.switch_backend('Agg')
+    if trace_settings is not None:
+        tracing.configure(**trace_settings)
+    if memory_settings is not None:
+        memory_profile.configure(**memory_settings)
+    log('Worker started.')
+
+
+def _render_match_safe(*args) -> tuple[str, str]:
+    '''
+    Calls `render_match`, catching any exception so one bad match doesn't stop the rest of the batch. Returns the match code and the error
+    message, or None if the match rendered successfully.
+    '''
+    code = args[0]
+    try:
+        with tracing.span('render', echo=False, match=code), memory_profile.stage('render', match=code, snapshot=True):
+            render_match(*args)
+    except Exception as e:
+        log(f'Failed to render {code}: {type(e).__name__}: {e}')
+        plt.close('all')
+        return code, f'{type(e).__name__}: {e}'
+    finally:
+        # Worker processes exit without flushing, so write out this match's spans now
+        tracing.flush()
+    return code, None
+
+
+def log(message:str) -> None:
+    '''
+    Prints `message` prefixed with the name of the current process, so output from rendering workers can be told apart.
+    '''
+    print(f'[{current_process().name}] {message}', flush=True)
+
 
 if __name__ == '__main__':
     league = None
     season = None
     period_start = None
     period_end = None
+    workers = 1
+    frame_workers = 1
+    animation_format = 'gif'
+    rate = RATE_LIMIT
+    base_url = None
+    cache_mode = 'on'
+    sync = False
+    resume = False
+    matchweeks = None
+    trace = 'off'
+    memory = False
     if len(argv) > 1:
         cl_args = argv[1:]
         if cl_args[0][0] != '-':
@@ -418,7 +439,18 @@ if __name__ == '__main__':
     -t\t\tTeam ID(s) to determine matches to create visuals for, as str or list[str]
     -s\t\tSeason ID(s) to determine matches to create visuals for, as str or list[str]
     -ps\t\tStart Date for filtering visualised matches in "YYYY-MM-DD" format
-    -pe\t\tEnd Date for filtering visualised matches in "YYYY-MM-DD" format'''
+    -pe\t\tEnd Date for filtering visualised matches in "YYYY-MM-DD" format
+    -w\t\tNumber of worker processes to render matches in parallel (default 1)
+    -fw\t\tNumber of worker processes to split the frames of each match animation between (default 1)
+    -f\t\tAnimation format: gif, mp4, webm, webp or apng (default gif). mp4 and webm need ffmpeg on the PATH
+    -r\t\tMaximum average number of requests per second made to Understat (default 2)
+    -u\t\tURL to fetch Understat data from instead of https://understat.com/, e.g. python understat_server.py (default UNDERSTAT_URL if set)
+    -c\t\tResponse cache mode: on, off or offline (default on). offline renders from cached responses without any network access
+    -i\t\tIncremental sync: on or off (default off). on keeps every result in a store in data/store/ and only fetches new ones
+    -rs\t\tResume an interrupted fetch: on or off (default off). on skips matches saved in the last checkpoint for the same leagues, seasons and dates
+    -mw\t\tComma separated matchweek number(s) to create visuals for, alongside any matches between -ps and -pe
+    -tr\t\tTrace each stage of the run: off, on or chrome (default off). on saves a JSON log of timed spans to output/traces/, chrome also saves a Chrome trace
+    -mem\tProfile memory: on or off (default off). on reports the peak and retained memory of each stage and match, and any leaked figures, to output/memory/'''
             )
         else:
             key = None
@@ -438,10 +470,41 @@ if __name__ == '__main__':
                             period_start = cl_args[i]
                         case "-pe":
                             period_end = cl_args[i]
+                        case "-w":
+                            workers = int(cl_args[i])
+                        case "-fw":
+                            frame_workers = int(cl_args[i])
+                        case "-f":
+                            animation_format = cl_args[i]
+                        case "-r":
+                            rate = float(cl_args[i])
+                        case "-u":
+                            base_url = cl_args[i]
+                        case "-c":
+                            cache_mode = cl_args[i]
+                        case "-i":
+                            if cl_args[i] not in ('on','off'):
+                                raise ValueError(f'Unknown value {cl_args[i]} for command line option -i. Use on or off.')
+                            sync = cl_args[i] == 'on'
+                        case "-rs":
+                            if cl_args[i] not in ('on','off'):
+                                raise ValueError(f'Unknown value {cl_args[i]} for command line option -rs. Use on or off.')
+                            resume = cl_args[i] == 'on'
+                        case "-mw":
+                            matchweeks = [int(n) for n in cl_args[i].split(',')]
+                        case "-tr":
+                            if cl_args[i] not in ('off','on','chrome'):
+                                raise ValueError(f'Unknown value {cl_args[i]} for command line option -tr. Use off, on or chrome.')
+                            trace = cl_args[i]
+                        case "-mem":
+                            if cl_args[i] not in ('on','off'):
+                                raise ValueError(f'Unknown value {cl_args[i]} for command line option -mem. Use on or off.')
+                            memory = cl_args[i] == 'on'
                         case _:
                             raise ValueError(f'Unknown command line argument {key} with value {cl_args[i]}')
                     key = None
-        main(l=league, s=season, start=period_start, end=period_end)
+        main(l=league, s=season, start=period_start, end=period_end, w=workers, fw=frame_workers, f=animation_format, r=rate, u=base_url, c=cache_mode,
+             i=sync, rs=resume, mw=matchweeks, tr=trace, mem=memory)
     else:
         league = 'EPL'
         period_start = (datetime.datetime.today() - datetime.timedelta(days=6)).strftime('%Y-%m-%d')
@@ -0,0 +1,409 @@
+# Imports
+from colours import TEAM_COLOURS, BG_COLOUR, TEXT_COLOUR, PITCH_COLOUR, PAINT_COLOUR
+import matplotlib.pyplot as plt
+from matplotlib.axes import Axes
+from matplotlib.patches import Rectangle, Ellipse, Arc
+from matplotlib.transforms import Bbox, TransformedBbox
+import numpy as np
+import pandas as pd
+from crests import crest
+
+# Number of background rasters kept per figure, one for each pair of teams drawn
+BACKGROUND_CACHE_SIZE = 8
+
+_match_figure = None
+
+
+class MatchFigure:
+    '''
+    Reusable figure for match animations. Everything that is the same for every match (gridspec, axes, pitch markings, ticks, grid, legend and
+    the artists for the text, bars and shot map) is built once when the figure is created. `set_match` then only restyles the parts that depend
+    on the teams and loads the frame data, so a process can draw any number of matches on the same figure.
+
+    The background (every artist that doesn't change between frames) is rendered once for each pair of teams and kept as a raster. Each frame
+    restores that raster and draws only the changing artists, plus anything layered above them, on top of it, rather than redrawing the whole
+    canvas.
+    '''
+    def __init__(self):
+        # Set up mpl figure with 10*8 grid and 0 wspace to allow prob bars to share central axis
+        fig = plt.figure(figsize=(10,10))
+        gs = fig.add_gridspec(10, 8, wspace=0)
+        shotmap_ax = fig.add_subplot(gs[1:4,2:6])
+        h_prob_ax = fig.add_subplot(gs[4:,0:4])
+        a_prob_ax = fig.add_subplot(gs[4:,4:])
+        ax = [h_prob_ax, a_prob_ax, shotmap_ax]
+
+        # Add bars for exact and at least probabilities, and outline. Team colours are set by set_match
+        self.h_p_bar = ax[0].barh(range(5), [1,0,0,0,0], color='black', zorder=3)
+        self.h_al_bar = ax[0].barh(range(5), [1,0,0,0,0], color='black', hatch='//', edgecolor='black', zorder=2)
+        self.h_ol_bar = ax[0].barh(range(5), [1,0,0,0,0], fill=False, edgecolor='black', zorder=3)
+        self.a_p_bar = ax[1].barh(range(5), [1,0,0,0,0], color='black', zorder=3)
+        self.a_al_bar = ax[1].barh(range(5), [1,0,0,0,0], color='black', hatch='//', edgecolor='black', zorder=2)
+        self.a_ol_bar = ax[1].barh(range(5), [1,0,0,0,0], fill=False, edgecolor='black', zorder=3)
+
+        # Add one scatter plot per team for missed/blocked shots, own goals, and goals. They are updated in place with the shots up to the
+        # current frame
+        self.h_s_scat = ax[2].scatter(x=[], y=[], s=[], color='black', alpha=0.6, zorder=3)
+        self.h_og_scat = ax[2].scatter(x=[], y=[], s=[], color='black', marker='*', edgecolors='black', alpha=0.8, zorder=3)
+        self.h_g_scat = ax[2].scatter(x=[], y=[], s=[], color='black', marker='*', edgecolors='black', alpha=0.8, zorder=3)
+        self.a_s_scat = ax[2].scatter(x=[], y=[], s=[], color='black', alpha=0.6, zorder=3)
+        self.a_og_scat = ax[2].scatter(x=[], y=[], s=[], color='black', marker='*', edgecolors='black', alpha=0.8, zorder=3)
+        self.a_g_scat = ax[2].scatter(x=[], y=[], s=[], color='black', marker='*', edgecolors='black', alpha=0.8, zorder=3)
+
+        # Set background colour and shared formatting for bar plots
+        fig.set_facecolor(BG_COLOUR)
+        for a in ax[:-1]:
+            a.set_facecolor(BG_COLOUR)
+            a.set_yticks(range(5), labels=["0", "1", "2", "3", "4+"], color=TEXT_COLOUR)
+            a.tick_params(axis='y',length=0)
+            a.set_ylabel('Goals Scored', color=TEXT_COLOUR)
+            a.set_xlabel('Probability (%)', color=TEXT_COLOUR)
+            a.invert_yaxis()
+            a.spines['top'].set_visible(False)
+            a.spines['bottom'].set_visible(False)
+            a.grid(True, color='0.85', axis='x', zorder=1)
+
+        # Set inverted formatting for subplots
+        ax[0].set_xlim(1,0)
+        ax[0].set_xticks([1,.9,.8,.7,.6,.5,.4,.3,.2,.1,0], labels=range(100,-10,-10), color=TEXT_COLOUR)
+        ax[0].spines['left'].set_visible(False)
+        ax[0].spines['right'].set(zorder=4)
+        ax[1].set_xlim(0,1)
+        ax[1].set_xticks([0,.1,.2,.3,.4,.5,.6,.7,.8,.9,1], labels=range(0,105,10), color=TEXT_COLOUR)
+        ax[1].spines['right'].set_color('0.85')
+        ax[1].spines['right'].set(zorder=1)
+        ax[1].yaxis.set_label_position('right')
+        ax[1].yaxis.set_ticks_position('right')
+
+        # Set formatting for scatterplot
+        ax[2].set_xlim(0,1)
+        ax[2].set_ylim(0,1)
+        ax[2].tick_params(axis='both', length=0)
+        ax[2].get_xaxis().set_ticks([])
+        ax[2].get_yaxis().set_ticks([])
+        ax[2].set_facecolor(PITCH_COLOUR)
+        # Add penalty boxes and halfway line to scatterplot
+        ax[2].axvline(x=0.5, color=PAINT_COLOUR, zorder=1)
+        centre_circle = ax[2].add_patch(Ellipse(xy=(0.5,0.5),width=0.11,height=0.175,color=PAINT_COLOUR,fill=False))
+        centre_circle.set_zorder(1)
+        ax[2].hlines(y=[0.19, 0.81],xmin=0,xmax=0.17,colors=PAINT_COLOUR,zorder=1)
+        ax[2].axvline(x=0.17,ymin=0.19,ymax=0.81,color=PAINT_COLOUR,zorder=1)
+        ax[2].hlines(y=[0.37,0.63],xmin=0,xmax=0.055,colors=PAINT_COLOUR,zorder=1)
+        ax[2].axvline(x=0.055,ymin=0.37,ymax=0.63,color=PAINT_COLOUR,zorder=1)
+        ax[2].hlines(y=[0.19,0.81],xmin=0.83,xmax=1,colors=PAINT_COLOUR,zorder=1)
+        ax[2].axvline(x=0.83,ymin=0.19,ymax=0.81,color=PAINT_COLOUR,zorder=1)
+        ax[2].hlines(y=[0.37,0.63],xmin=0.945,xmax=1,colors=PAINT_COLOUR,zorder=1)
+        ax[2].axvline(x=0.945,ymin=0.37,ymax=0.63,color=PAINT_COLOUR,zorder=1)
+        h_pen_arc = ax[2].add_patch(Arc(xy=(0.115,0.5),width=0.16,height=0.15,angle=270,theta1=49,theta2=131,color=PAINT_COLOUR))
+        a_pen_arc = ax[2].add_patch(Arc(xy=(0.885,0.5),width=0.16,height=0.15,angle=90,theta1=49,theta2=131,color=PAINT_COLOUR))
+        h_pen_arc.set_zorder(1)
+        a_pen_arc.set_zorder(1)
+        # Add arrow showing direction of attack
+        ax[2].axhline(y=0.85,xmin=0.3,xmax=0.7,color=TEXT_COLOUR,zorder=2)
+        ax[2].plot([0.67,0.7],[0.9,0.85],color=TEXT_COLOUR,zorder=2)
+        ax[2].plot([0.67,0.7],[0.8,0.85],color=TEXT_COLOUR,zorder=2)
+
+        # Create legend
+        labels = ['Exactly','At Least']
+        handles = [Rectangle((0,0),1,1,color='black'), Rectangle((0,0),1,1,facecolor='white',hatch='//',edgecolor='black')]
+        ax[1].legend(labels=labels, handles=handles, loc='lower right', fancybox=False, framealpha=0.5)
+
+        # Add Header Text
+        self.minute_label = ax[2].text(0.5, 1.1, '0\'', size='x-large',ha='center',weight='bold',color=TEXT_COLOUR)
+        self.attacking_label = ax[2].text(0.5,0.925,'',ha='center',size='medium',color=TEXT_COLOUR,zorder=2)
+        self.h_team_label = ax[2].text(-0.45,0.2,'',size='large',ha='left',weight='bold',color=TEXT_COLOUR)
+        self.h_score_label = ax[2].text(-0.45,0.1,'',size='x-large',ha='left',weight='bold',color=TEXT_COLOUR)
+        self.h_xG_label = ax[2].text(-0.45,0,'',size='large',ha='left',weight='normal',color=TEXT_COLOUR)
+        self.a_team_label = ax[2].text(1.45,0.2,'',size='large',ha='right',weight='bold',color=TEXT_COLOUR)
+        self.a_score_label = ax[2].text(1.45,0.1,'',size='x-large',ha='right',weight='bold',color=TEXT_COLOUR)
+        self.a_xG_label = ax[2].text(1.45,0,'',size='large',ha='right',weight='normal',color=TEXT_COLOUR)
+        self.h_event_label = ax[2].text(0.4,1.1,'',size='medium',ha='right',weight='normal',color=TEXT_COLOUR)
+        self.a_event_label = ax[2].text(0.6,1.1,'',size='medium',ha='left',weight='normal',color=TEXT_COLOUR)
+
+        # Add Team crests either side of scatter plot
+        ax_h_crest = fig.add_subplot(gs[1:3,0:2])
+        self.h_crest = ax_h_crest.imshow(np.zeros((1,1,4)))
+        ax_h_crest.set_zorder(5)
+        ax_h_crest.axis('off')
+        ax_a_crest = fig.add_subplot(gs[1:3,-2:])
+        self.a_crest = ax_a_crest.imshow(np.zeros((1,1,4)))
+        ax_a_crest.set_zorder(5)
+        ax_a_crest.axis('off')
+
+        # Adjust margins to allow room for minute and events text at top
+        fig.subplots_adjust(left=0.075, bottom=0.075, right=0.925, top=1.025)
+
+        # Artists that change from frame to frame
+        self.artists = [
+            self.minute_label, self.h_score_label, self.h_xG_label, self.a_score_label, self.a_xG_label, self.h_event_label, self.a_event_label
+        ]
+        for bar in [self.h_p_bar, self.a_p_bar, self.h_al_bar, self.a_al_bar, self.h_ol_bar, self.a_ol_bar]:
+            self.artists.extend(bar.patches)
+        self.artists.extend([self.h_s_scat, self.a_s_scat, self.h_og_scat, self.a_og_scat, self.h_g_scat, self.a_g_scat])
+
+        # Anything an axes draws after the first of its changing artists has to be drawn again on top of them every frame (e.g. the centre line
+        # over the bars). These are left out of the cached background along with the changing artists, in the order the axes would draw them
+        changing = set(self.artists)
+        self.overlay = []
+        axes = [a for a in sorted(fig.get_children(), key=lambda a: a.get_zorder()) if isinstance(a, Axes)]
+        for i, a in enumerate(axes):
+            children = [c for c in a.get_children() if c is not a.patch and c.get_visible()]
+            first = min((c.get_zorder() for c in children if c in changing), default=None)
+            if first is None:
+                continue
+            redrawn = [c for c in sorted(children, key=lambda c: c.get_zorder()) if c.get_zorder() >= first]
+            # In a full draw, the background of a neighbouring axes drawn later covers anything spilling over the edge into it (e.g. half of the
+            # centre line between the bar plots). Clip those artists at that edge, so drawing them over the cached background gives the same result
+            for b in axes[i+1:]:
+                if b.axison and b.get_frame_on() and a.bbox.overlaps(b.bbox):
+                    clip = _clip_before(a, b)
+                    for c in redrawn:
+                        if c.get_clip_box() is None:
+                            c.set_clip_box(clip)
+            self.overlay.extend(redrawn)
+        for a in self.overlay:
+            a.set_animated(True)
+
+        self.fig = fig
+        self.backgrounds = {}
+        self.teams = None
+
+    def set_match(self, h_team:str, a_team:str, minute_data:pd.DataFrame, marker_size:int=300) -> None:
+        '''
+        Styles the figure for a match between `h_team` and `a_team` and loads its frame data, leaving the figure on the first frame.
+
+        :param h_team: Name of the home team.
+        :type h_team: str
+        :param a_team: Name of the away team.
+        :type a_team: str
+        :param minute_data: Frame table for the match as returned by `create_minute_data`.
+        :type minute_data: pd.DataFrame
+        :param marker_size: Marker size for a shot with an xG of 1. Default value: `300`
+        :type marker_size: int
+        '''
+        if self.teams != (h_team, a_team):
+            self._set_teams(h_team, a_team)
+
+        # Take each column out of the DataFrame once, keeping the values' NumPy types so the text matches indexing the frame table directly
+        self.h_prob = minute_data[['h_0', 'h_1', 'h_2', 'h_3', 'h_4']].to_numpy()
+        self.a_prob = minute_data[['a_0', 'a_1', 'a_2', 'a_3', 'a_4']].to_numpy()
+        self.h_at_least = _at_least(self.h_prob)
+        self.a_at_least = _at_least(self.a_prob)
+        self.minute = minute_data['minute'].to_numpy()
+        self.h_score = minute_data['h_score'].to_numpy()
+        self.a_score = minute_data['a_score'].to_numpy()
+        self.h_xG = minute_data['h_xG'].to_numpy()
+        self.a_xG = minute_data['a_xG'].to_numpy()
+        self.h_event_log = minute_data['h_event_log'].to_numpy()
+        self.a_event_log = minute_data['a_event_log'].to_numpy()
+
+        # Every shot in the match along with the frame it appears on
+        h_markers = shot_markers(minute_data, 'h', marker_size)
+        a_markers = shot_markers(minute_data, 'a', marker_size)
+        self.shot_map = [
+            (self.h_s_scat, h_markers['shot']),
+            (self.h_og_scat, h_markers['own_goal']),
+            (self.h_g_scat, h_markers['goal']),
+            (self.a_s_scat, a_markers['shot']),
+            (self.a_og_scat, a_markers['own_goal']),
+            (self.a_g_scat, a_markers['goal']),
+        ]
+        self.update(0)
+
+    def _set_teams(self, h_team:str, a_team:str) -> None:
+        '''
+        Sets the team colours, names and crests.
+        '''
+        # Get team crests, rasterised from SVG once and cached
+        h_crest = crest(h_team)
+        a_crest = crest(a_team)
+
+        # Set team colours [primary, accent, outline]
+        h_colour = TEAM_COLOURS[h_team].copy()
+        if TEAM_COLOURS[a_team][0] == h_colour[0]:
+            a_colour = TEAM_COLOURS[a_team][::-1]
+        else:
+            a_colour = TEAM_COLOURS[a_team].copy()
+        if h_colour[0] == 'white':
+            h_colour.append(h_colour[1])
+        else:
+            h_colour.append(h_colour[0])
+        if a_colour[0] == 'white':
+            a_colour.append(a_colour[1])
+        else:
+            a_colour.append(a_colour[0])
+
+        for p_bar, al_bar, ol_bar, colour in [(self.h_p_bar, self.h_al_bar, self.h_ol_bar, h_colour), (self.a_p_bar, self.a_al_bar, self.a_ol_bar, a_colour)]:
+            for r in range(len(p_bar.patches)):
+                p_bar.patches[r].set_facecolor(colour[0])
+                al_bar.patches[r].set_facecolor(colour[1])
+                al_bar.patches[r].set_edgecolor(colour[0])
+                ol_bar.patches[r].set_edgecolor(colour[2])
+        for s_scat, og_scat, g_scat, colour in [(self.h_s_scat, self.h_og_scat, self.h_g_scat, h_colour), (self.a_s_scat, self.a_og_scat, self.a_g_scat, a_colour)]:
+            s_scat.set_facecolor(colour[0])
+            s_scat.set_edgecolor(colour[0])
+            og_scat.set_facecolor(colour[1])
+            og_scat.set_edgecolor(colour[0])
+            g_scat.set_facecolor(colour[0])
+            g_scat.set_edgecolor(colour[1])
+
+        match h_team:
+            case 'Wolverhampton Wanderers':
+                h_team_label = 'Wolves'
+            case 'Tottenham':
+                h_team_label = 'Spurs'
+            case _:
+                h_team_label = h_team
+        match a_team:
+            case 'Wolverhampton Wanderers':
+                a_team_label = 'Wolves'
+            case 'Tottenham':
+                a_team_label = 'Spurs'
+            case _:
+                a_team_label = a_team
+        self.attacking_label.set_text(f'{h_team_label} attacking')
+        self.h_team_label.set_text(h_team_label)
+        self.a_team_label.set_text(a_team_label)
+
+        for image, team_crest in [(self.h_crest, h_crest), (self.a_crest, a_crest)]:
+            image.set_data(team_crest)
+            image.set_extent((-0.5, team_crest.width - 0.5, team_crest.height - 0.5, -0.5))
+
+        self.teams = (h_team, a_team)
+
+    def update(self, f:int) -> list:
+        '''
+        Updates the figure to frame `f` of the current match and returns the artists that change between frames. Frames can be shown in any
+        order.
+        '''
+        # Update text
+        self.minute_label.set_text(f'{self.minute[f]}\'')
+        self.h_score_label.set_text(f'{self.h_score[f]}')
+        self.h_xG_label.set_text(f'({round(self.h_xG[f],2)})')
+        self.h_event_label.set_text(f'{self.h_event_log[f]}')
+        self.a_score_label.set_text(f'{self.a_score[f]}')
+        self.a_xG_label.set_text(f'({round(self.a_xG[f],2)})')
+        self.a_event_label.set_text(f'{self.a_event_log[f]}')
+
+        # Update bar widths
+        for r in range(len(self.h_p_bar.patches)):
+            self.h_p_bar.patches[r].set_width(self.h_prob[f, r])
+            self.a_p_bar.patches[r].set_width(self.a_prob[f, r])
+            self.h_al_bar.patches[r].set_width(self.h_at_least[f, r])
+            self.a_al_bar.patches[r].set_width(self.a_at_least[f, r])
+            self.h_ol_bar.patches[r].set_width(self.h_at_least[f, r])
+            self.a_ol_bar.patches[r].set_width(self.a_at_least[f, r])
+
+        # Show every shot up to and including this frame
+        for scat, (frames, offsets, sizes) in self.shot_map:
+            n = np.searchsorted(frames, f, side='right')
+            scat.set_offsets(offsets[:n])
+            scat.set_sizes(sizes[:n])
+        return self.artists
+
+    def frame(self, f:int) -> np.ndarray:
+        '''
+        Draws frame `f` of the current match and returns it as a (height, width, 4) uint8 RGBA array. The array is a view of the canvas, so it
+        is only valid until the next frame is drawn.
+        '''
+        self.update(f)
+        canvas = self.fig.canvas
+        if self.teams not in self.backgrounds:
+            if len(self.backgrounds) >= BACKGROUND_CACHE_SIZE:
+                self.backgrounds.pop(next(iter(self.backgrounds)))
+            # Animated artists are skipped by a normal draw, leaving just the background
+            canvas.draw()
+            self.backgrounds[self.teams] = canvas.copy_from_bbox(self.fig.bbox)
+        canvas.restore_region(self.backgrounds[self.teams])
+        for a in self.overlay:
+            self.fig.draw_artist(a)
+        return np.asarray(canvas.buffer_rgba())
+
+    def save_static(self, path:str, f:int=None) -> None:
+        '''
+        Saves frame `f` (by default the final frame) of the current match to `path` as a static image without the minute and event text.
+        '''
+        if f is None:
+            f = self.minute.shape[0] - 1
+        self.update(f)
+        for text_label in [self.minute_label, self.h_event_label, self.a_event_label]:
+            text_label.set_text('')
+        self.fig.subplots_adjust(top=1.05)
+        # Animated artists are included when saving
+        self.fig.savefig(path)
+        self.fig.subplots_adjust(top=1.025)
+
+
+def match_figure() -> MatchFigure:
+    '''
+    Returns the `MatchFigure` for this process, creating it the first time or if it has been closed.
+    '''
+    global _match_figure
+    if _match_figure is None or not plt.fignum_exists(_match_figure.fig.number):
+        _match_figure = MatchFigure()
+    return _match_figure
+
+
+def shot_markers(minute_data:pd.DataFrame, team:str, marker_size:int=300) -> dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    '''
+    Splits the shots taken by one team in a match into the groups drawn as separate scatter plots on the shot map.
+
+    :param minute_data: Frame table for the match as returned by `create_minute_data`.
+    :type minute_data: pd.DataFrame
+    :param team: 'h' for the home team or 'a' for the away team.
+    :type team: str
+    :param marker_size: Marker size for a shot with an xG of 1. Default value: `300`
+    :type marker_size: int
+    :returns markers: Dictionary with keys 'shot', 'own_goal' and 'goal', each holding a tuple of the frame each shot appears on, an (n, 2) array
+        of the shot positions, and the marker sizes, all in frame order.
+    :rtype markers: dict[str, tuple[np.ndarray, np.ndarray, np.ndarray]]
+    '''
+    frames = np.flatnonzero(minute_data[f'{team}_type'].notna().to_numpy())
+    shot_type = minute_data[f'{team}_type'].to_numpy()[frames]
+    offsets = np.column_stack([
+        np.asarray(minute_data[f'{team}_shot_x'].to_numpy()[frames], dtype=np.float64),
+        np.asarray(minute_data[f'{team}_shot_y'].to_numpy()[frames], dtype=np.float64),
+    ])
+    sizes = marker_size * np.asarray(minute_data[f'{team}_shot_xG'].to_numpy()[frames], dtype=np.float64)
+
+    # Own goals are drawn at a fixed size rather than scaled by xG
+    is_goal = shot_type == 'Goal'
+    is_own_goal = shot_type == 'OwnGoal'
+    sizes[is_own_goal] = marker_size * 0.5
+    markers = {}
+    for key, keep in [('shot', ~is_goal & ~is_own_goal), ('own_goal', is_own_goal), ('goal', is_goal)]:
+        markers[key] = (frames[keep], offsets[keep], sizes[keep])
+    return markers
+
+
+def _at_least(prob:np.ndarray) -> np.ndarray:
+    '''
+    Widths of the "at least" bars for each frame from the exact probabilities. The first bar is left at the probability of exactly 0 goals, and
+    the rest are summed left to right like the built-in `sum` so they match summing each frame on its own.
+    '''
+    at_least = np.empty(prob.shape, dtype=np.float64)
+    at_least[:, 0] = prob[:, 0]
+    for n in range(1, prob.shape[1]):
+        total = prob[:, n].astype(np.float64)
+        for m in range(n + 1, prob.shape[1]):
+            total = total + prob[:, m]
+        at_least[:, n] = total
+    return at_least
+
+
+def _clip_before(a:Axes, b:Axes) -> TransformedBbox:
+    '''
+    Clip box covering the whole figure apart from the side of axes `a` taken up by its neighbour `b`.
+    '''
+    a_pos = a.get_position()
+    b_pos = b.get_position()
+    x0, y0, x1, y1 = -1, -1, 2, 2
+    if b_pos.x0 >= a_pos.x1 - 1e-9:
+        x1 = b_pos.x0
+    elif b_pos.x1 <= a_pos.x0 + 1e-9:
+        x0 = b_pos.x1
+    elif b_pos.y0 >= a_pos.y1 - 1e-9:
+        y1 = b_pos.y0
+    elif b_pos.y1 <= a_pos.y0 + 1e-9:
+        y0 = b_pos.y1
+    return TransformedBbox(Bbox.from_extents(x0, y0, x1, y1), a.get_figure().transFigure)
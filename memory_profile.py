@@ -0,0 +1,351 @@
+# Imports
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from multiprocessing import current_process
+from matplotlib._pylab_helpers import Gcf
+
+MEMORY_DIR = './output/memory'
+# Seconds between samples of the resident set size
+SAMPLE_INTERVAL = 0.05
+# Number of allocation sites listed for the memory a stage holds on to
+TOP_ALLOCATIONS = 5
+# Memory a process may hold on to per match before it is flagged as a leak
+LEAK_THRESHOLD = 2**20
+
+
+def rss() -> int:
+    '''
+    Returns the resident set size of this process in bytes, or None where /proc/self/statm isn't available.
+    '''
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def open_figures() -> tuple[int, int]:
+    '''
+    Returns the number of figures open in pyplot and the number of artists on them.
+    '''
+    # Read the figures from pyplot's registry rather than with plt.figure(n), which would change the current figure
+    figures = [manager.canvas.figure for manager in Gcf.get_all_fig_managers()]
+    return len(figures), sum(len(fig.findobj()) for fig in figures)
+
+
+class MemoryProfiler:
+    '''
+    Records the memory used by each stage of a run, and by each match within a stage, with tracemalloc and by sampling the resident set size
+    (RSS) on a background thread. For every stage it records the peak and retained (still allocated at the end) Python memory, the RSS at the
+    start, end and peak, and the number of figures and artists open in pyplot at the start and end, so figures that are never closed or
+    artists that pile up from match to match can be flagged by `summarise`.
+
+    Records are appended to `log_path` as JSON lines at the end of every stage, so rendering worker processes can share one log with the main
+    process, as for `tracing.Tracer`.
+
+        configure('./output/memory/run.jsonl')
+        with stage('render', match='EPL_2025_Arsenal_Chelsea', snapshot=True):
+            render_match(...)
+        summary = summarise(read_records('./output/memory/run.jsonl'))
+
+    tracemalloc slows allocation-heavy code down by up to about twice, so only profile runs that are being sized rather than every run.
+    '''
+
+    def __init__(self, log_path:str, sample_interval:float=SAMPLE_INTERVAL, top:int=TOP_ALLOCATIONS) -> None:
+        '''
+        :param log_path: JSON lines file to append a record to at the end of each stage.
+        :type log_path: str
+        :param sample_interval: Seconds between samples of the RSS. Default value: `0.05`
+        :type sample_interval: float
+        :param top: Number of allocation sites to list for stages that take a snapshot. Default value: `5`
+        :type top: int
+        '''
+        self.log_path = log_path
+        self.sample_interval = sample_interval
+        self.top = top
+        self.process = current_process().name
+        self.pid = os.getpid()
+        self.lock = threading.Lock()
+        self.stack = []
+        self.rss_peak = rss() or 0
+        os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+        self.fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.stopped = threading.Event()
+        self.sampler = threading.Thread(target=self._sample, name='memory-sampler', daemon=True)
+        self.sampler.start()
+
+    def stage(self, name:str, match:str=None, snapshot:bool=False):
+        '''
+        Returns a context manager that records the memory used by the stage `name` (for the match with code `match`, if any) from when it is
+        entered to when it exits. If `snapshot` is True, tracemalloc snapshots are taken at both ends and the allocation sites holding the most
+        new memory at the end are recorded. Snapshots are slow, so only take them for stages run once per match or less. Stages can be nested.
+        '''
+        return _Stage(self, name, match, snapshot)
+
+    def close(self) -> None:
+        '''
+        Stops sampling the RSS and tracing allocations, and closes the log.
+        '''
+        self.stopped.set()
+        self.sampler.join()
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _sample(self) -> None:
+        while not self.stopped.wait(self.sample_interval):
+            current = rss()
+            if current is not None:
+                with self.lock:
+                    self.rss_peak = max(self.rss_peak, current)
+
+    def _enter(self, stage) -> None:
+        # Resetting the peaks for this stage would lose the peaks of any stage it is nested in, so hand them up the stack first
+        traced, traced_peak = tracemalloc.get_traced_memory()
+        with self.lock:
+            if len(self.stack) > 0:
+                parent = self.stack[-1]
+                parent.traced_peak = max(parent.traced_peak, traced_peak)
+                parent.rss_peak = max(parent.rss_peak, self.rss_peak)
+            stage.rss_start = rss() or 0
+            self.rss_peak = stage.rss_start
+            self.stack.append(stage)
+        tracemalloc.reset_peak()
+        stage.traced_start = traced
+        stage.traced_peak = traced
+        stage.rss_peak = stage.rss_start
+        stage.figures_start, stage.artists_start = open_figures()
+        stage.snapshot_start = tracemalloc.take_snapshot() if stage.snapshot else None
+        stage.start = time.perf_counter()
+
+    def _exit(self, stage, error:BaseException) -> None:
+        seconds = time.perf_counter() - stage.start
+        traced_end, traced_peak = tracemalloc.get_traced_memory()
+        rss_end = rss() or 0
+        with self.lock:
+            stage.traced_peak = max(stage.traced_peak, traced_peak)
+            stage.rss_peak = max(stage.rss_peak, self.rss_peak, rss_end)
+            self.stack.pop()
+            if len(self.stack) > 0:
+                parent = self.stack[-1]
+                parent.traced_peak = max(parent.traced_peak, stage.traced_peak)
+                parent.rss_peak = max(parent.rss_peak, stage.rss_peak)
+            self.rss_peak = rss_end
+        figures_end, artists_end = open_figures()
+        top = []
+        if stage.snapshot_start is not None:
+            snapshot_end = tracemalloc.take_snapshot()
+            ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, '<frozen importlib._bootstrap*>')]
+            diff = snapshot_end.filter_traces(ignore).compare_to(stage.snapshot_start.filter_traces(ignore), 'lineno')
+            top = [
+                {'site':f'{d.traceback[0].filename}:{d.traceback[0].lineno}', 'size':d.size_diff, 'count':d.count_diff}
+                for d in diff[:self.top] if d.size_diff > 0
+            ]
+            del snapshot_end, stage.snapshot_start
+        record = {
+            'stage':stage.name, 'match':stage.match, 'process':self.process, 'pid':self.pid, 'depth':len(self.stack),
+            'seconds':seconds, 'peak':stage.traced_peak - stage.traced_start, 'retained':traced_end - stage.traced_start,
+            'rss_start':stage.rss_start, 'rss_end':rss_end, 'rss_peak':stage.rss_peak,
+            'figures_start':stage.figures_start, 'figures_end':figures_end, 'artists_start':stage.artists_start, 'artists_end':artists_end,
+            'top':top
+        }
+        if error is not None:
+            record['error'] = f'{type(error).__name__}: {error}'
+        if self.fd is not None:
+            os.write(self.fd, (json.dumps(record) + '\n').encode())
+
+
+class _Stage:
+    '''
+    Context manager returned by `MemoryProfiler.stage`.
+    '''
+
+    def __init__(self, profiler:MemoryProfiler, name:str, match:str, snapshot:bool) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.match = match
+        self.snapshot = snapshot
+
+    def __enter__(self):
+        self.profiler._enter(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.profiler._exit(self, exc)
+
+
+_profiler = None
+
+
+def configure(log_path:str, sample_interval:float=SAMPLE_INTERVAL, top:int=TOP_ALLOCATIONS) -> MemoryProfiler:
+    '''
+    Turns memory profiling on for this process, appending a record for each stage to `log_path`, and returns the profiler. Any profiler
+    already configured is closed first. Rendering worker processes are configured with the same `settings()` as the main process.
+    '''
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+    _profiler = MemoryProfiler(log_path, sample_interval, top)
+    return _profiler
+
+
+def settings() -> dict:
+    '''
+    Returns the keyword arguments to pass to `configure` to profile to the same log from another process, or None if profiling is off.
+    '''
+    if _profiler is None:
+        return None
+    return {'log_path':_profiler.log_path, 'sample_interval':_profiler.sample_interval, 'top':_profiler.top}
+
+
+def stage(name:str, match:str=None, snapshot:bool=False):
+    '''
+    Returns a context manager recording the memory used by the stage `name` with the configured profiler (see `MemoryProfiler.stage`), or one
+    that does nothing if profiling is off.
+    '''
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _Stage(_profiler, name, match, snapshot)
+
+
+def close() -> None:
+    '''
+    Closes the configured profiler and turns profiling off.
+    '''
+    global _profiler
+    if _profiler is not None:
+        _profiler.close()
+        _profiler = None
+
+
+atexit.register(close)
+
+
+def profile_paths(name:str=None, memory_dir:str=MEMORY_DIR) -> tuple[str, str]:
+    '''
+    Returns the JSON lines record path and JSON report path for a run called `name`, or `memory_{timestamp}` if None, in `memory_dir`.
+    '''
+    if name is None:
+        name = f'memory_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    return f'{memory_dir}/{name}.jsonl', f'{memory_dir}/{name}.json'
+
+
+def read_records(log_path:str) -> list[dict]:
+    '''
+    Returns every record in the log written by `MemoryProfiler` to `log_path`.
+    '''
+    records = []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A worker killed mid-write can leave a partial line
+                continue
+    return records
+
+
+def summarise(records:list[dict], leak_threshold:int=LEAK_THRESHOLD) -> dict:
+    '''
+    Summarises the records written by `MemoryProfiler` into the memory used by each stage and each match, and flags likely leaks.
+
+    :param records: Records as returned by `read_records`.
+    :type records: list[dict]
+    :param leak_threshold: Memory in bytes a process may hold on to per match of a stage before it is flagged. Default value: `1048576`
+    :type leak_threshold: int
+    :returns summary: The `stages`, with the number of times each ran, its largest `peak` and `rss_peak` and its total and largest
+        `retained` memory; the `matches`, with the largest `peak` and `rss_peak` and the total `retained` memory of each match's top-level
+        stages; the largest RSS of each process in `processes`; and a list of `leaks` describing figures left open, artists piling up on
+        open figures, and memory held on to from match to match.
+    :rtype summary: dict
+    '''
+    stages = {}
+    matches = {}
+    processes = {}
+    match_depth = {}
+    for r in records:
+        if r['match'] is not None:
+            match_depth[r['match']] = min(match_depth.get(r['match'], r['depth']), r['depth'])
+    for r in records:
+        s = stages.setdefault(r['stage'], {'runs':0, 'seconds':0.0, 'peak':0, 'rss_peak':0, 'retained':0, 'max_retained':0})
+        s['runs'] += 1
+        s['seconds'] += r['seconds']
+        s['peak'] = max(s['peak'], r['peak'])
+        s['rss_peak'] = max(s['rss_peak'], r['rss_peak'])
+        s['retained'] += r['retained']
+        s['max_retained'] = max(s['max_retained'], r['retained'])
+        processes[r['process']] = max(processes.get(r['process'], 0), r['rss_peak'])
+        if r['match'] is not None:
+            m = matches.setdefault(r['match'], {'process':r['process'], 'peak':0, 'rss_peak':0, 'retained':0})
+            m['peak'] = max(m['peak'], r['peak'])
+            m['rss_peak'] = max(m['rss_peak'], r['rss_peak'])
+            # Nested stages are already counted in the stage they run in
+            if r['depth'] == match_depth[r['match']]:
+                m['retained'] += r['retained']
+
+    leaks = []
+    by_process_stage = {}
+    for r in records:
+        if r['match'] is not None:
+            by_process_stage.setdefault((r['process'], r['stage']), []).append(r)
+    for (process, name), runs in by_process_stage.items():
+        # The first match in a process opens the figure that is reused for the rest, so only later matches can leak figures
+        for r in runs[1:]:
+            if r['figures_end'] > r['figures_start']:
+                leaks.append(f'{name} left {r["figures_end"] - r["figures_start"]} figure(s) open after {r["match"]} in {process}.')
+        if len(runs) < 2:
+            continue
+        # Artists that keep piling up on a reused figure are as much a leak as figures that are never closed
+        growth = [b['artists_end'] - a['artists_end'] for a, b in zip(runs, runs[1:])]
+        if all(g >= 0 for g in growth) and sum(g > 0 for g in growth) >= max(1, len(growth) // 2):
+            leaks.append(f'Artists on open figures grew from {runs[0]["artists_end"]} to {runs[-1]["artists_end"]} over {len(runs)} matches '
+                         f'of {name} in {process}.')
+        # The first match sets up caches (crests, fonts, the figure itself), so only count what is held on to after that
+        retained = sum(r['retained'] for r in runs[1:])
+        if retained > leak_threshold * (len(runs) - 1):
+            sites = {}
+            for r in runs[1:]:
+                for t in r['top']:
+                    sites[t['site']] = sites.get(t['site'], 0) + t['size']
+            worst = ', '.join(f'{site} ({round(size / 2**20, 2)} MB)' for site, size in sorted(sites.items(), key=lambda x: -x[1])[:3])
+            leaks.append(f'{name} held on to {round(retained / 2**20, 2)} MB over {len(runs) - 1} matches after the first in {process}'
+                         + (f', mostly at {worst}.' if worst else '.'))
+    return {'stages':stages, 'matches':matches, 'processes':processes, 'leaks':leaks}
+
+
+def write_report(log_path:str, report_path:str, leak_threshold:int=LEAK_THRESHOLD) -> dict:
+    '''
+    Summarises the records in `log_path` with `summarise`, saves the summary and the records to `report_path` as JSON and prints it. Returns
+    the summary.
+    '''
+    records = read_records(log_path)
+    summary = summarise(records, leak_threshold)
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump({**summary, 'records':records}, f, indent=2)
+
+    mb = lambda n: round(n / 2**20, 1)
+    print(f'\n{"Stage":<18}{"Runs":>6}{"Seconds":>10}{"Peak (MB)":>11}{"Retained (MB)":>15}{"RSS peak (MB)":>15}')
+    for name, s in summary['stages'].items():
+        print(f'{name:<18}{s["runs"]:>6}{s["seconds"]:>10.2f}{mb(s["peak"]):>11}{mb(s["retained"]):>15}{mb(s["rss_peak"]):>15}')
+    if len(summary['matches']) > 0:
+        print(f'\n{"Match":<28}{"Process":<18}{"Peak (MB)":>11}{"Retained (MB)":>15}{"RSS peak (MB)":>15}')
+        for code, m in summary['matches'].items():
+            print(f'{code:<28}{m["process"]:<18}{mb(m["peak"]):>11}{mb(m["retained"]):>15}{mb(m["rss_peak"]):>15}')
+    print('\nLargest RSS per process: ' + ', '.join(f'{process} {mb(peak)} MB' for process, peak in summary['processes'].items()))
+    if len(summary['leaks']) == 0:
+        print('No leaked figures, artists or memory found.')
+    for leak in summary['leaks']:
+        print(f'Possible leak: {leak}')
+    print(f'Memory report saved to {report_path}')
+    return summary
@@ -0,0 +1,52 @@
+# Imports
+import json
+import os
+import time
+from frame_store import DATA_DIR
+
+CACHE_DIR = f'{DATA_DIR}/cache'
+
+
+class ResponseCache:
+    '''
+    On-disk cache of Understat responses, with one JSON file per response under `{cache_dir}/{endpoint}/{key}.json`. Each entry records when it
+    was fetched and whether its data can still change, so callers can decide whether it is fresh enough to reuse. In offline mode the cache is
+    never bypassed and a missing entry is an error, so a run can be replayed without any network access.
+    '''
+
+    def __init__(self, cache_dir:str=CACHE_DIR, offline:bool=False) -> None:
+        '''
+        :param cache_dir: Folder to keep cached responses in. Default value: `'./data/cache'`
+        :type cache_dir: str
+        :param offline: If True, only cached responses are used and nothing is fetched. Default value: `False`
+        :type offline: bool
+        '''
+        self.cache_dir = cache_dir
+        self.offline = offline
+
+    def get(self, endpoint:str, key:str) -> dict:
+        '''
+        Returns the cached entry for `key` from `endpoint` as a dictionary with the response `data`, the time it was `fetched` (seconds since the
+        epoch), and whether it is `final`, or None if there isn't one.
+        '''
+        try:
+            with open(self._path(endpoint, key), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def put(self, endpoint:str, key:str, data, final:bool=False) -> None:
+        '''
+        Saves `data` as the cached response for `key` from `endpoint`. `final` marks data that will never change, such as the shots for a match
+        that has finished.
+        '''
+        path = self._path(endpoint, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so a crash or a concurrent reader never sees a partially written entry
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'fetched':time.time(), 'final':final, 'data':data}, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, endpoint:str, key:str) -> str:
+        return f'{self.cache_dir}/{endpoint}/{key}.json'
@@ -0,0 +1,296 @@
+# Imports
+import os
+import sqlite3
+import numpy as np
+import pandas as pd
+from sys import argv
+from frame_store import DATA_DIR, MATCHES_SCHEMA, SHOTS_SCHEMA, read_matches, read_shots
+
+DB_PATH = f'{DATA_DIR}/shots.db'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    league TEXT NOT NULL,
+    season TEXT NOT NULL,
+    datetime TEXT NOT NULL,
+    h_team TEXT NOT NULL,
+    a_team TEXT NOT NULL,
+    match_code TEXT NOT NULL,
+    max_min INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS shots (
+    match_id INTEGER NOT NULL REFERENCES matches(match_id),
+    team TEXT NOT NULL,
+    minute INTEGER NOT NULL,
+    h_a TEXT NOT NULL,
+    xG REAL NOT NULL,
+    result TEXT NOT NULL,
+    x REAL NOT NULL,
+    y REAL NOT NULL,
+    player TEXT NOT NULL,
+    shot_type TEXT,
+    last_action TEXT
+);
+CREATE INDEX IF NOT EXISTS matches_league_season ON matches(league, season, datetime);
+CREATE INDEX IF NOT EXISTS matches_datetime ON matches(datetime);
+CREATE INDEX IF NOT EXISTS matches_h_team ON matches(h_team, datetime);
+CREATE INDEX IF NOT EXISTS matches_a_team ON matches(a_team, datetime);
+CREATE INDEX IF NOT EXISTS shots_match_id ON shots(match_id);
+CREATE INDEX IF NOT EXISTS shots_team ON shots(team, match_id);
+CREATE INDEX IF NOT EXISTS shots_player ON shots(player, match_id);
+'''
+
+MATCH_COLUMNS = ['match_id', 'league', 'season', 'datetime', 'h_team', 'a_team', 'match_code', 'max_min']
+SHOT_COLUMNS = ['match_id', 'team', 'minute', 'h_a', 'xG', 'result', 'x', 'y', 'player', 'shot_type', 'last_action']
+
+
+class ShotDatabase:
+    '''
+    Indexed SQLite database of matches and shots across every league and season fetched, so a consumer can pull just the rows it needs instead
+    of loading and filtering the whole shot table. Matches are indexed by league and season, kick-off time and team, and shots by match, team
+    and player. Every query returns a DataFrame with the dtypes of the frame store tables, or a dictionary of NumPy arrays from `shot_arrays`.
+
+        with ShotDatabase() as db:
+            matches = db.matches(league='EPL', season='2025', start='2025-09-13', end='2025-09-14')
+            shots = db.shots(match_ids=matches['match_id'])
+            xG = db.shot_arrays(['xG'], team='Arsenal')['xG']
+    '''
+
+    def __init__(self, path:str=DB_PATH) -> None:
+        '''
+        :param path: File to keep the database in. Created if it doesn't exist. Default value: `'./data/shots.db'`
+        :type path: str
+        '''
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        # Write-ahead logging lets rendering processes keep reading while a fetch is writing
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.executescript(SCHEMA)
+
+    def insert(self, league:str, season:str, matches:pd.DataFrame, shots:pd.DataFrame) -> int:
+        '''
+        Adds `matches` from `league` and `season`, and their `shots`, to the database in one transaction. Matches already in the database are
+        replaced along with all of their shots.
+
+        :param league: League ID, e.g. 'EPL'.
+        :type league: str
+        :param season: Season ID in 'YYYY' format.
+        :type season: str
+        :param matches: Matches with `match_id`, `h_team`, `a_team`, `match_code` and `max_min`, and the kick-off time `datetime` as 'YYYY-MM-DD
+            HH:MM:SS'. Without `datetime`, the date is taken from the end of the match code.
+        :type matches: pd.DataFrame
+        :param shots: Shots for every match in `matches`, with the columns of `SHOTS_SCHEMA`.
+        :type shots: pd.DataFrame
+        :returns n: Number of matches added or replaced.
+        :rtype n: int
+        '''
+        match_ids = matches['match_id'].astype('int64')
+        codes = matches['match_code'].astype(str)
+        if 'datetime' in matches.columns:
+            kick_offs = matches['datetime'].astype(str)
+        else:
+            kick_offs = codes.str[-8:-4] + '-' + codes.str[-4:-2] + '-' + codes.str[-2:] + ' 00:00:00'
+        match_rows = zip(
+            match_ids.tolist(), [league]*len(match_ids), [season]*len(match_ids), kick_offs.tolist(), matches['h_team'].astype(str).tolist(),
+            matches['a_team'].astype(str).tolist(), codes.tolist(), matches['max_min'].astype(int).tolist()
+        )
+
+        # Each shot is stored with the name of the team that took it, so a team's shots can be found without joining to matches
+        teams = matches.assign(match_id=match_ids).set_index('match_id')
+        shot_ids = shots['match_id'].astype('int64')
+        is_h = shots['h_a'].astype(str).to_numpy() == 'h'
+        shot_teams = np.where(is_h, teams['h_team'].astype(str).reindex(shot_ids).to_numpy(), teams['a_team'].astype(str).reindex(shot_ids).to_numpy())
+        shot_rows = zip(
+            shot_ids.tolist(), shot_teams.tolist(), shots['minute'].astype(int).tolist(), shots['h_a'].astype(str).tolist(),
+            shots['xG'].astype(float).tolist(), shots['result'].astype(str).tolist(), shots['x'].astype(float).tolist(),
+            shots['y'].astype(float).tolist(), shots['player'].astype(str).tolist(), shots['shot_type'].astype(object).tolist(),
+            shots['last_action'].astype(object).tolist()
+        )
+
+        with self.connection:
+            self.connection.executemany('DELETE FROM shots WHERE match_id = ?', ((id,) for id in match_ids.tolist()))
+            self.connection.executemany(f'INSERT OR REPLACE INTO matches VALUES ({", ".join("?" * len(MATCH_COLUMNS))})', match_rows)
+            self.connection.executemany(f'INSERT INTO shots VALUES ({", ".join("?" * len(SHOT_COLUMNS))})', shot_rows)
+        return len(match_ids)
+
+    def matches(self, league:str=None, season:str=None, team:str=None, start:str=None, end:str=None, match_ids:list[int]=None) -> pd.DataFrame:
+        '''
+        Returns the matches that meet every filter given, in kick-off order, with the columns of `MATCHES_SCHEMA` plus `league`, `season` and
+        `datetime`.
+
+        :param league: League ID, e.g. 'EPL'. Default value: `None`
+        :type league: str
+        :param season: Season ID in 'YYYY' format. Default value: `None`
+        :type season: str
+        :param team: Only matches this team played in, home or away. Default value: `None`
+        :type team: str
+        :param start: First date in 'YYYY-MM-DD' format. Matches played on this date are included. Default value: `None`
+        :type start: str
+        :param end: Last date in 'YYYY-MM-DD' format. Matches played on this date are included. Default value: `None`
+        :type end: str
+        :param match_ids: Only matches with these IDs. Default value: `None`
+        :type match_ids: list[int]
+        :returns matches: Matching matches.
+        :rtype matches: pd.DataFrame
+        '''
+        where, params = _match_filters(league, season, start, end, match_ids)
+        if team is not None:
+            where.append('(h_team = ? OR a_team = ?)')
+            params.extend([team, team])
+        df = pd.read_sql_query(f'SELECT * FROM matches{_where(where)} ORDER BY datetime, match_id', self.connection, params=params)
+        return df.astype(MATCHES_SCHEMA)
+
+    def shots(self, match_ids:list[int]=None, team:str=None, player:str=None, h_a:str=None, league:str=None, season:str=None, start:str=None,
+              end:str=None, columns:list[str]=None) -> pd.DataFrame:
+        '''
+        Returns the shots that meet every filter given, grouped by match in kick-off order and in the order they were added within each match.
+
+        :param match_ids: Only shots in the matches with these IDs. Default value: `None`
+        :type match_ids: list[int]
+        :param team: Only shots taken by this team. Default value: `None`
+        :type team: str
+        :param player: Only shots taken by this player. Default value: `None`
+        :type player: str
+        :param h_a: Only shots by the home ('h') or away ('a') team. Default value: `None`
+        :type h_a: str
+        :param league: Only shots in matches in this league. Default value: `None`
+        :type league: str
+        :param season: Only shots in matches in this season. Default value: `None`
+        :type season: str
+        :param start: Only shots in matches played on or after this date, in 'YYYY-MM-DD' format. Default value: `None`
+        :type start: str
+        :param end: Only shots in matches played on or before this date, in 'YYYY-MM-DD' format. Default value: `None`
+        :type end: str
+        :param columns: Columns to return, from `SHOT_COLUMNS`. Returns the columns of `SHOTS_SCHEMA` if None. Default value: `None`
+        :type columns: list[str]
+        :returns shots: Matching shots.
+        :rtype shots: pd.DataFrame
+        '''
+        if columns is None:
+            columns = list(SHOTS_SCHEMA)
+        query, params = self._shot_query(columns, match_ids, team, player, h_a, league, season, start, end)
+        df = pd.read_sql_query(query, self.connection, params=params)
+        return df.astype({col: dtype for col, dtype in SHOTS_SCHEMA.items() if col in df.columns})
+
+    def shot_arrays(self, columns:list[str], **filters) -> dict[str, np.ndarray]:
+        '''
+        Returns `columns` of the shots that meet `filters` (the keyword arguments of `shots`) as a dictionary of NumPy arrays, without building a
+        DataFrame. Numeric columns are int64 or float64 arrays and text columns are object arrays.
+        '''
+        query, params = self._shot_query(columns, **filters)
+        rows = self.connection.execute(query, params).fetchall()
+        arrays = {}
+        for i, col in enumerate(columns):
+            values = [row[i] for row in rows]
+            if col in ('match_id', 'minute'):
+                arrays[col] = np.array(values, dtype=np.int64)
+            elif col in ('xG', 'x', 'y'):
+                arrays[col] = np.array(values, dtype=np.float64)
+            else:
+                arrays[col] = np.array(values, dtype=object)
+        return arrays
+
+    def close(self) -> None:
+        '''
+        Closes the connection to the database.
+        '''
+        self.connection.close()
+
+    def _shot_query(self, columns:list[str], match_ids:list[int]=None, team:str=None, player:str=None, h_a:str=None, league:str=None,
+                    season:str=None, start:str=None, end:str=None) -> tuple[str, list]:
+        for col in columns:
+            if col not in SHOT_COLUMNS:
+                raise ValueError(f'{col} is not a shot column. Please select from {SHOT_COLUMNS}.')
+        where, params = _match_filters(league, season, start, end, match_ids, table='m.', shots_table='s.')
+        for col, value in (('team', team), ('player', player), ('h_a', h_a)):
+            if value is not None:
+                where.append(f's.{col} = ?')
+                params.append(value)
+        # Shots are always read in the order matches() returns their matches, so they line up with it
+        query = (
+            f'SELECT {", ".join(f"s.{col}" for col in columns)} FROM shots s JOIN matches m ON m.match_id = s.match_id'
+            f'{_where(where)} ORDER BY m.datetime, m.match_id, s.rowid'
+        )
+        return query, params
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def _match_filters(league:str, season:str, start:str, end:str, match_ids:list[int], table:str='', shots_table:str='') -> tuple[list, list]:
+    '''
+    Returns the SQL conditions and parameters for the filters shared by every query. `table` and `shots_table` are the prefixes of the matches
+    and shots tables in the query.
+    '''
+    where = []
+    params = []
+    if league is not None:
+        where.append(f'{table}league = ?')
+        params.append(league)
+    if season is not None:
+        where.append(f'{table}season = ?')
+        params.append(str(season))
+    if start is not None:
+        where.append(f'{table}datetime >= ?')
+        params.append(start)
+    if end is not None:
+        # Kick-off times on the end date sort after the bare date, so compare against the end of the day
+        where.append(f'{table}datetime <= ?')
+        params.append(f'{end} 23:59:59')
+    if match_ids is not None:
+        match_ids = [int(id) for id in match_ids]
+        where.append(f'{shots_table or table}match_id IN ({", ".join("?" * len(match_ids))})')
+        params.extend(match_ids)
+    return where, params
+
+
+def _where(conditions:list[str]) -> str:
+    return f' WHERE {" AND ".join(conditions)}' if conditions else ''
+
+
+def import_frame_store(league:str, season:str, path:str=DB_PATH) -> int:
+    '''
+    Adds the matches and shots saved in the frame store (or legacy CSVs) in the data folder to the database, as matches from `league` and
+    `season`.
+
+    :returns n: Number of matches added.
+    :rtype n: int
+    '''
+    with ShotDatabase(path) as db:
+        return db.insert(league, season, read_matches(), read_shots())
+
+
+if __name__ == '__main__':
+    league = None
+    season = None
+    if len(argv) > 1:
+        cl_args = argv[1:]
+        if cl_args[0] in ('-h','--help'):
+            print('''
+    -h\t\tPrint this help page.
+    -l\t\tLeague ID of the matches in the frame store, e.g. EPL
+    -s\t\tSeason ID of the matches in the frame store, e.g. 2025
+
+    Imports the matches and shots in the frame store files in the data folder into the shot database.'''
+            )
+            exit()
+        if len(cl_args) % 2 != 0:
+            raise ValueError(f'No value provided for command line option {cl_args[-1]}.')
+        for key, value in zip(cl_args[::2], cl_args[1::2]):
+            match key:
+                case "-l":
+                    league = value
+                case "-s":
+                    season = value
+                case _:
+                    raise ValueError(f'Unknown command line argument {key} with value {value}')
+    if league is None or season is None:
+        raise ValueError('League (-l) and season (-s) of the matches in the frame store must both be given.')
+    n = import_frame_store(league, season)
+    print(f'{n} matches imported into {DB_PATH}')
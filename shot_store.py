@@ -0,0 +1,122 @@
+# Imports
+import json
+import os
+import time
+import pandas as pd
+from frame_store import DATA_DIR, MATCHES_SCHEMA, SHOTS_SCHEMA, write_table, read_table
+
+STORE_DIR = f'{DATA_DIR}/store'
+
+# The store keeps the kick-off time of each match alongside the columns returned by `get_league_shot_data`, so windows can be read back out
+STORE_MATCHES_SCHEMA = {**MATCHES_SCHEMA, 'datetime':'category'}
+
+
+class ShotStore:
+    '''
+    Persistent store of the matches and shots for one league and season, kept in `{store_dir}/{league}_{season}/`. Matches are only ever added
+    or replaced, never dropped, so each sync only has to fetch the results that have come in since the last one. Alongside the `matches.npz`
+    and `raw_shots.npz` tables, `sync.json` records the ID of every match already ingested and the watermark: the kick-off time of the latest
+    one.
+
+        store = ShotStore('EPL', '2025')
+        new = [m for m in fixtures if m['isResult'] and m['id'] not in store.match_ids]
+        store.upsert(new_matches, new_shots)
+    '''
+
+    def __init__(self, league:str, season:str, store_dir:str=STORE_DIR) -> None:
+        '''
+        :param league: League ID, e.g. 'EPL'.
+        :type league: str
+        :param season: Season ID in 'YYYY' format.
+        :type season: str
+        :param store_dir: Folder to keep the stores for every league and season in. Default value: `'./data/store'`
+        :type store_dir: str
+        '''
+        self.league = league
+        self.season = season
+        self.path = f'{store_dir}/{league}_{season}'
+        try:
+            with open(f'{self.path}/sync.json', 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {'match_ids':[], 'watermark':None, 'synced':None}
+        self.match_ids = set(state['match_ids'])
+        self.watermark = state['watermark']
+        self.synced = state['synced']
+
+    def __len__(self) -> int:
+        return len(self.match_ids)
+
+    def matches(self) -> pd.DataFrame:
+        '''
+        Returns every match in the store in kick-off order, with the columns of `MATCHES_SCHEMA` plus the kick-off time `datetime` as
+        'YYYY-MM-DD HH:MM:SS'.
+        '''
+        if len(self.match_ids) == 0:
+            return _empty(STORE_MATCHES_SCHEMA)
+        return read_table(f'{self.path}/matches.npz')
+
+    def shots(self) -> pd.DataFrame:
+        '''
+        Returns every shot in the store, grouped by match in the same order as `matches()`.
+        '''
+        if len(self.match_ids) == 0:
+            return _empty(SHOTS_SCHEMA)
+        return read_table(f'{self.path}/raw_shots.npz')
+
+    def upsert(self, matches:pd.DataFrame, shots:pd.DataFrame) -> int:
+        '''
+        Adds `matches` and their `shots` to the store. Matches already in the store are replaced along with all of their shots, so a match can
+        be re-ingested after Understat corrects it.
+
+        :param matches: Matches to add, with the columns of `STORE_MATCHES_SCHEMA`.
+        :type matches: pd.DataFrame
+        :param shots: Shots for every match in `matches`, with the columns of `SHOTS_SCHEMA`.
+        :type shots: pd.DataFrame
+        :returns n: Number of matches that weren't already in the store.
+        :rtype n: int
+        '''
+        if matches.shape[0] == 0:
+            return 0
+        new_ids = set(str(id) for id in matches['match_id'])
+        n_new = len(new_ids - self.match_ids)
+
+        # Understat IDs are strings, so cast new rows to the stored dtypes before combining them with the stored rows
+        matches = matches.astype({'match_id':'int64'})
+        shots = shots.astype({'match_id':'int64'})
+        all_matches = self.matches()
+        all_shots = self.shots()
+        keep = ~all_matches['match_id'].astype(str).isin(new_ids)
+        all_matches = pd.concat([all_matches[keep], matches], ignore_index=True)
+        all_shots = pd.concat([all_shots[~all_shots['match_id'].astype(str).isin(new_ids)], shots], ignore_index=True)
+
+        # Keep matches in kick-off order, and the shots for each match together in that same order
+        all_matches['datetime'] = all_matches['datetime'].astype(str)
+        all_matches = all_matches.sort_values(['datetime', 'match_id'], kind='stable', ignore_index=True)
+        order = {id: i for i, id in enumerate(all_matches['match_id'])}
+        all_shots = all_shots.iloc[all_shots['match_id'].map(order).argsort(kind='stable')].reset_index(drop=True)
+
+        os.makedirs(self.path, exist_ok=True)
+        # Write the tables to temporary files and swap them in, and update sync.json last, so an interrupted upsert never records a match as
+        # ingested without its rows
+        _write_atomic(all_matches, f'{self.path}/matches', STORE_MATCHES_SCHEMA)
+        _write_atomic(all_shots, f'{self.path}/raw_shots', SHOTS_SCHEMA)
+        self.match_ids = set(all_matches['match_id'].astype(str))
+        self.watermark = all_matches['datetime'].iloc[-1]
+        self.synced = time.time()
+        tmp_path = f'{self.path}/sync.json.{os.getpid()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'match_ids':sorted(self.match_ids, key=int), 'watermark':self.watermark, 'synced':self.synced}, f)
+        os.replace(tmp_path, f'{self.path}/sync.json')
+        return n_new
+
+
+def _write_atomic(df:pd.DataFrame, path:str, schema:dict) -> None:
+    # np.savez adds .npz to any file name that doesn't already end in it, so the temporary file keeps the extension
+    tmp_path = f'{path}.{os.getpid()}.tmp.npz'
+    write_table(df, tmp_path, schema)
+    os.replace(tmp_path, f'{path}.npz')
+
+
+def _empty(schema:dict) -> pd.DataFrame:
+    return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in schema.items()})
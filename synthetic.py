@@ -0,0 +1,229 @@
+# Imports
+import zlib
+import numpy as np
+from datetime import datetime, timedelta
+from colours import TEAM_COLOURS
+from create_minute_data import FRAMES_PER_MINUTE
+
+# Understat short titles for the teams in TEAM_COLOURS, which also have crests in the icons folder, so synthetic matches can be rendered
+SHORT_TITLES = {
+    'Arsenal':'ARS', 'Aston Villa':'AVL', 'Bournemouth':'BOU', 'Brentford':'BRE', 'Brighton':'BRI', 'Burnley':'BUR', 'Chelsea':'CHE',
+    'Crystal Palace':'CRY', 'Everton':'EVE', 'Fulham':'FLH', 'Leeds':'LED', 'Liverpool':'LIV', 'Manchester City':'MCI',
+    'Manchester United':'MUN', 'Newcastle United':'NEW', 'Nottingham Forest':'NOT', 'Sunderland':'SUN', 'Tottenham':'TOT', 'West Ham':'WHU',
+    'Wolverhampton Wanderers':'WOL'
+}
+
+# Rates matched to the bundled 2025/26 Premier League data: shots per team per match, how often a shot is a rebound, how often a match has an
+# own goal, and the spread of xG per shot (log-normal, median about 0.055)
+HOME_SHOTS = 12.2
+AWAY_SHOTS = 10.4
+SHOTS_DISPERSION = 12
+REBOUND_CHANCE = 0.15
+OWN_GOAL_CHANCE = 0.08
+PENALTY_CHANCE = 0.02
+XG_MEDIAN = 0.055
+XG_SIGMA = 1.1
+# Mean number of minutes of second half stoppage time
+STOPPAGE_TIME = 3.5
+
+MISS_RESULTS = ['MissedShots', 'BlockedShot', 'SavedShot', 'ShotOnPost']
+MISS_WEIGHTS = [0.42, 0.335, 0.229, 0.016]
+SHOT_TYPES = ['RightFoot', 'LeftFoot', 'Head', 'OtherBodyPart']
+SHOT_TYPE_WEIGHTS = [0.495, 0.297, 0.201, 0.007]
+LAST_ACTIONS = ['Pass', 'Cross', 'Aerial', 'TakeOn', 'Standard', 'Chipped', 'HeadPass', 'BallTouch', 'BallRecovery', 'Throughball', 'None']
+LAST_ACTION_WEIGHTS = [0.41, 0.16, 0.14, 0.055, 0.05, 0.037, 0.035, 0.034, 0.03, 0.022, 0.027]
+SITUATIONS = ['OpenPlay', 'FromCorner', 'SetPiece', 'DirectFreekick']
+SITUATION_WEIGHTS = [0.72, 0.17, 0.07, 0.04]
+# Kick-off times used across a weekend round, as (days after the Saturday, time)
+KICK_OFFS = [(-1, '20:00:00'), (0, '12:30:00'), (0, '15:00:00'), (0, '15:00:00'), (0, '15:00:00'), (0, '17:30:00'), (1, '14:00:00'),
+             (1, '14:00:00'), (1, '16:30:00'), (2, '20:00:00')]
+
+
+def generate_season(league:str='EPL', season:str='2025', n_teams:int=20, n_matches:int=None, played:int=None, start:str=None, first_id:int=1000000,
+                    seed:int=0) -> tuple[list[dict], dict[str, dict]]:
+    '''
+    Generates a season of fixtures and shots in the shape Understat returns them, for testing and benchmarking against a stand-in server. Teams
+    play a double round robin of weekend rounds, and shot counts, xG, results, rebounds, own goals, penalties and stoppage time follow the rates of
+    real Premier League data. The same arguments always give the same season.
+
+    :param league: League ID to label the season with. Default value: `'EPL'`
+    :type league: str
+    :param season: Season ID in 'YYYY' format. Default value: `'2025'`
+    :type season: str
+    :param n_teams: Number of teams, taken from the teams with colours and crests so every match can be rendered. At most 20. Default value: `20`
+    :type n_teams: int
+    :param n_matches: Number of fixtures, taken from the start of the full round robin. Uses the whole round robin if None. Default value: `None`
+    :type n_matches: int
+    :param played: Number of fixtures that have been played and have shots. Every fixture if None. Default value: `None`
+    :type played: int
+    :param start: Saturday of the first round in 'YYYY-MM-DD' format. Uses the second Saturday of August in the season's first year if None.
+        Default value: `None`
+    :type start: str
+    :param first_id: Match ID of the first fixture. Give each league and season its own range when serving several. Default value: `1000000`
+    :type first_id: int
+    :param seed: Random seed. Default value: `0`
+    :type seed: int
+    :returns fixtures: Fixture list as returned by `UnderstatClient.league(league).get_match_data(season)`.
+    :rtype fixtures: list[dict]
+    :returns shots: Shots for each played fixture as returned by `UnderstatClient.match(id).get_shot_data()`, keyed by match ID.
+    :rtype shots: dict[str, dict]
+    '''
+    teams = list(TEAM_COLOURS)
+    if n_teams < 2 or n_teams > len(teams) or n_teams % 2 != 0:
+        raise ValueError(f'n_teams must be an even number from 2 to {len(teams)}, not {n_teams}.')
+    rng = np.random.default_rng([seed, int(season), sum(league.encode())])
+    teams = [teams[i] for i in sorted(rng.choice(len(teams), n_teams, replace=False))]
+    team_ids = {team: 70 + i for i, team in enumerate(teams)}
+    # Each team's attacking strength scales its expected shots, so some teams are consistently better than others
+    strength = rng.lognormal(0, 0.2, n_teams)
+    strength = dict(zip(teams, strength / strength.mean()))
+    squads = {team: [f'{team} Player {n}' for n in range(1, 19)] for team in teams}
+
+    if start is None:
+        first = datetime(int(season), 8, 8)
+        start = first + timedelta(days=(5 - first.weekday()) % 7)
+    else:
+        start = datetime.strptime(start, '%Y-%m-%d')
+
+    rounds = _round_robin(teams)
+    fixtures = []
+    shots = {}
+    for r, pairs in enumerate(rounds):
+        saturday = start + timedelta(weeks=r)
+        for k, (h, a) in enumerate(pairs):
+            if n_matches is not None and len(fixtures) >= n_matches:
+                break
+            day, time = KICK_OFFS[k % len(KICK_OFFS)]
+            kick_off = f'{(saturday + timedelta(days=day)).strftime("%Y-%m-%d")} {time}'
+            match_id = str(first_id + len(fixtures))
+            is_result = played is None or len(fixtures) < played
+            fixture = {
+                'id':match_id,
+                'isResult':is_result,
+                'h':{'id':str(team_ids[h]), 'title':h, 'short_title':SHORT_TITLES[h]},
+                'a':{'id':str(team_ids[a]), 'title':a, 'short_title':SHORT_TITLES[a]},
+                'goals':{'h':None, 'a':None},
+                'xG':{'h':None, 'a':None},
+                'datetime':kick_off,
+                'forecast':{'w':None, 'd':None, 'l':None}
+            }
+            if is_result:
+                match_shots = _match_shots(rng, match_id, h, a, strength, squads, season, kick_off)
+                h_goals, a_goals = _score(match_shots)
+                fixture['goals'] = {'h':str(h_goals), 'a':str(a_goals)}
+                fixture['xG'] = {t: str(round(sum(float(s['xG']) for s in match_shots[t]), 5)) for t in ('h', 'a')}
+                fixture['forecast'] = {'w':'0.4', 'd':'0.3', 'l':'0.3'}
+                shots[match_id] = match_shots
+            fixtures.append(fixture)
+    return fixtures, shots
+
+
+def _round_robin(teams:list[str]) -> list[list[tuple[str, str]]]:
+    '''
+    Returns the rounds of a double round robin between `teams` by the circle method, as lists of (home, away) pairs. The second half of the
+    season repeats the first with home and away swapped.
+    '''
+    n = len(teams)
+    order = list(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            h, a = order[i], order[n - 1 - i]
+            # Alternate home and away for the fixed team and between rounds so no team is at home every week
+            pairs.append((h, a) if (r + i) % 2 == 0 else (a, h))
+        rounds.append(pairs)
+        order = [order[0], order[-1]] + order[1:-1]
+    return rounds + [[(a, h) for h, a in pairs] for pairs in rounds]
+
+
+def _match_shots(rng:np.random.Generator, match_id:str, h:str, a:str, strength:dict, squads:dict, season:str, kick_off:str) -> dict:
+    '''
+    Generates the shots for one match, in Understat's shape: a list of shots for each team in the order they were taken.
+    '''
+    stoppage = 1 + rng.poisson(STOPPAGE_TIME)
+    raw = {'h':[], 'a':[]}
+    for t, team, mean in (('h', h, HOME_SHOTS), ('a', a, AWAY_SHOTS)):
+        # Gamma-Poisson (negative binomial) shot counts, which are more spread out than a plain Poisson, as real ones are
+        # Rebounds are added on top, so fewer first shots are drawn to keep the total on the mean
+        mean = mean * strength[team] / (1 + REBOUND_CHANCE * 0.5)
+        n = rng.poisson(rng.gamma(SHOTS_DISPERSION, mean / SHOTS_DISPERSION))
+        per_minute = {}
+        for _ in range(n):
+            minute = int(rng.integers(1, 91 + stoppage))
+            # A team can't have more shots in a minute than there are frames to draw them on, counting a possible rebound
+            if per_minute.get(minute, 0) >= FRAMES_PER_MINUTE - 2:
+                continue
+            per_minute[minute] = per_minute.get(minute, 0) + 1
+            raw[t].append(_shot(rng, minute, t, squads[team]))
+            if raw[t][-1]['result'] in ('SavedShot', 'BlockedShot') and rng.random() < REBOUND_CHANCE:
+                per_minute[minute] += 1
+                raw[t].append(_shot(rng, minute, t, squads[team], rebound=True))
+    if rng.random() < OWN_GOAL_CHANCE:
+        # Own goals are listed with the shots of the team whose player put the ball in their own net
+        t = 'h' if rng.random() < 0.5 else 'a'
+        minute = int(rng.integers(1, 91 + stoppage))
+        if sum(1 for s in raw[t] if s['minute'] == minute) < FRAMES_PER_MINUTE - 1:
+            raw[t].append(_shot(rng, minute, t, squads[h if t == 'h' else a], own_goal=True))
+
+    shots = {}
+    for t in ('h', 'a'):
+        # Sort by minute, keeping rebounds straight after the shot they followed
+        raw[t].sort(key=lambda s: s['minute'])
+        shots[t] = []
+        for s in raw[t]:
+            shot_id = f'{match_id}{len(shots["h"]) + len(shots.get("a", [])):03}'
+            shots[t].append({
+                'id':shot_id, 'minute':str(s['minute']), 'result':s['result'], 'X':f'{s["X"]:.16f}', 'Y':f'{s["Y"]:.16f}',
+                'xG':f'{s["xG"]:.16f}', 'player':s['player'], 'h_a':t, 'player_id':str(zlib.crc32(s['player'].encode()) % 100000),
+                'situation':s['situation'], 'season':season, 'shotType':s['shotType'], 'match_id':match_id, 'h_team':h, 'a_team':a,
+                'h_goals':None, 'a_goals':None, 'date':kick_off, 'player_assisted':s['player_assisted'], 'lastAction':s['lastAction']
+            })
+    h_goals, a_goals = _score(shots)
+    for s in shots['h'] + shots['a']:
+        s['h_goals'] = str(h_goals)
+        s['a_goals'] = str(a_goals)
+    return shots
+
+
+def _shot(rng:np.random.Generator, minute:int, t:str, squad:list[str], rebound:bool=False, own_goal:bool=False) -> dict:
+    '''
+    Generates a single shot taken in `minute`, as a dictionary of plain values.
+    '''
+    situation = SITUATIONS[rng.choice(len(SITUATIONS), p=SITUATION_WEIGHTS)]
+    if own_goal:
+        xG = 0.0
+        result = 'OwnGoal'
+    elif rng.random() < PENALTY_CHANCE:
+        xG = 0.7612
+        situation = 'Penalty'
+        result = 'Goal' if rng.random() < xG else MISS_RESULTS[rng.choice(len(MISS_RESULTS), p=MISS_WEIGHTS)]
+    else:
+        # Rebounds fall closer to goal, so they are worth more on average
+        xG = float(min(0.95, rng.lognormal(np.log(XG_MEDIAN * (2.5 if rebound else 1)), XG_SIGMA)))
+        result = 'Goal' if rng.random() < xG else MISS_RESULTS[rng.choice(len(MISS_RESULTS), p=MISS_WEIGHTS)]
+    # Better chances come from closer in and more central
+    distance = 0.04 + 0.3 * (1 - xG) ** 3 * rng.uniform(0.3, 1)
+    if situation == 'Penalty':
+        X, Y = 0.885, 0.5
+    else:
+        X, Y = 1 - distance, float(np.clip(rng.normal(0.5, 0.05 + distance), 0.05, 0.95))
+    if own_goal:
+        # Understat records own goals at the other end, from the point of view of the player who scored them
+        X, Y = 1 - X, 1 - Y
+    last_action = 'Rebound' if rebound else LAST_ACTIONS[rng.choice(len(LAST_ACTIONS), p=LAST_ACTION_WEIGHTS)]
+    player, assister = rng.choice(squad, 2, replace=False)
+    return {
+        'minute':minute, 'result':result, 'X':X, 'Y':Y, 'xG':xG, 'player':str(player), 'situation':situation,
+        'shotType':'Head' if situation == 'FromCorner' and rng.random() < 0.5 else SHOT_TYPES[rng.choice(len(SHOT_TYPES), p=SHOT_TYPE_WEIGHTS)],
+        'player_assisted':None if rebound or situation == 'Penalty' else str(assister), 'lastAction':last_action
+    }
+
+
+def _score(shots:dict) -> tuple[int, int]:
+    '''
+    Returns the score from a match's shots, counting each own goal for the other team.
+    '''
+    h = sum(1 for s in shots['h'] if s['result'] == 'Goal') + sum(1 for s in shots['a'] if s['result'] == 'OwnGoal')
+    a = sum(1 for s in shots['a'] if s['result'] == 'Goal') + sum(1 for s in shots['h'] if s['result'] == 'OwnGoal')
+    return h, a
@@ -0,0 +1,244 @@
+# Imports
+import atexit
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from multiprocessing import current_process
+
+TRACE_DIR = './output/traces'
+# Number of finished spans held in memory before they are appended to the log file
+FLUSH_EVERY = 200
+
+
+class Tracer:
+    '''
+    Records timed spans for each stage of a run (fetching, rate limit sleeps, frame building, figure setup, drawing, encoding and saving) as
+    structured JSON logs, one JSON object per line in `log_path`. Every span has its `name`, start time `ts` and duration `dur` in
+    microseconds since the Unix epoch, the process and thread it ran on, and any attributes it was given. The log can be turned into a Chrome
+    trace with `write_chrome_trace` and opened in chrome://tracing or https://ui.perfetto.dev.
+
+    Finished spans are held in memory and appended to the log in one write every `FLUSH_EVERY` spans, so a span per frame costs far less than a
+    print per frame. Each write is a whole number of lines to a file opened for appending, so worker processes can share one log.
+
+        configure(log_path='./output/traces/run.jsonl')
+        with span('draw', match='EPL_2025_Arsenal_Chelsea', frame=f):
+            figure.frame(f)
+    '''
+
+    def __init__(self, log_path:str=None, echo:bool=False) -> None:
+        '''
+        :param log_path: JSON lines file to append spans to. Spans are only echoed if None. Default value: `None`
+        :type log_path: str
+        :param echo: Print a line to the console as each span finishes, unless the span was started with `echo=False`. Default value: `False`
+        :type echo: bool
+        '''
+        self.log_path = log_path
+        self.echo = echo
+        self.pending = []
+        self.lock = threading.Lock()
+        self.process = current_process().name
+        self.pid = os.getpid()
+        # perf_counter is precise but only comparable within a process, so shift it onto the wall clock to line up spans from every process
+        self.offset = time.time_ns() - time.perf_counter_ns()
+        self.fd = None
+        if log_path is not None:
+            os.makedirs(os.path.dirname(log_path) or '.', exist_ok=True)
+            self.fd = os.open(log_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            self._add({'ph':'M', 'name':'process_name', 'ts':self.now(), 'pid':self.pid, 'tid':0, 'args':{'name':self.process}})
+
+    def now(self) -> int:
+        '''
+        Returns the current time in microseconds since the Unix epoch.
+        '''
+        return (self.offset + time.perf_counter_ns()) // 1000
+
+    def span(self, name:str, echo:bool=True, **attrs):
+        '''
+        Returns a context manager that records a span called `name` with the attributes `attrs` from when it is entered to when it exits. If the
+        block raises, the span is recorded with the error. Leave `echo` True for stages worth a console line and set it False for spans
+        recorded in loops, e.g. once per frame.
+        '''
+        return _Span(self, name, echo, attrs)
+
+    def event(self, name:str, echo:bool=True, **attrs) -> None:
+        '''
+        Records an instant event called `name`, e.g. a failed request. `echo` is as for `span`.
+        '''
+        self._add({'ph':'i', 'name':name, 'ts':self.now(), 'pid':self.pid, 'tid':threading.get_ident(), 'args':attrs})
+        if echo and self.echo:
+            print(f'[{self.process}] {name}{_format_attrs(attrs)}', flush=True)
+
+    def flush(self) -> None:
+        '''
+        Appends every span held in memory to the log file.
+        '''
+        with self.lock:
+            pending, self.pending = self.pending, []
+        if self.fd is not None and len(pending) > 0:
+            os.write(self.fd, ''.join(json.dumps(record) + '\n' for record in pending).encode())
+
+    def close(self) -> None:
+        '''
+        Flushes the log and closes the file.
+        '''
+        self.flush()
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def _add(self, record:dict) -> None:
+        if self.fd is None:
+            return
+        with self.lock:
+            self.pending.append(record)
+            full = len(self.pending) >= FLUSH_EVERY
+        if full:
+            self.flush()
+
+    def _finish(self, name:str, start:int, attrs:dict, echo:bool, error:BaseException) -> None:
+        end = self.now()
+        if error is not None:
+            attrs['error'] = f'{type(error).__name__}: {error}'
+        self._add({'ph':'X', 'name':name, 'ts':start, 'dur':end - start, 'pid':self.pid, 'tid':threading.get_ident(), 'args':attrs})
+        if echo and self.echo:
+            print(f'[{self.process}] {name}{_format_attrs(attrs)} took {round((end - start) / 1e6, 4)} seconds.', flush=True)
+
+
+class _Span:
+    '''
+    Context manager returned by `Tracer.span`.
+    '''
+    __slots__ = ('tracer', 'name', 'echo', 'attrs', 'start')
+
+    def __init__(self, tracer:Tracer, name:str, echo:bool, attrs:dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.echo = echo
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = self.tracer.now()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.tracer._finish(self.name, self.start, self.attrs, self.echo, exc)
+
+
+class _NullSpan:
+    '''
+    Context manager that does nothing, returned by `span` when tracing is off so untraced runs pay for one function call per span.
+    '''
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_tracer = None
+
+
+def configure(log_path:str=None, echo:bool=False) -> Tracer:
+    '''
+    Turns tracing on for this process, recording spans to `log_path` and/or echoing them to the console, and returns the tracer. Any tracer
+    already configured is closed first. Rendering worker processes are configured with the same `settings()` as the main process.
+    '''
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+    _tracer = Tracer(log_path, echo)
+    return _tracer
+
+
+def settings() -> dict:
+    '''
+    Returns the keyword arguments to pass to `configure` to trace to the same log from another process, or None if tracing is off.
+    '''
+    if _tracer is None:
+        return None
+    return {'log_path':_tracer.log_path, 'echo':_tracer.echo}
+
+
+def span(name:str, echo:bool=True, **attrs):
+    '''
+    Returns a context manager recording a span called `name` with the configured tracer (see `Tracer.span`), or one that does nothing if
+    tracing is off.
+    '''
+    if _tracer is None:
+        return _NULL_SPAN
+    return _Span(_tracer, name, echo, attrs)
+
+
+def event(name:str, echo:bool=True, **attrs) -> None:
+    '''
+    Records an instant event called `name` with the configured tracer, if tracing is on.
+    '''
+    if _tracer is not None:
+        _tracer.event(name, echo, **attrs)
+
+
+def flush() -> None:
+    '''
+    Appends every span held in memory to the log. Worker processes call this after each task, since they exit without running atexit hooks.
+    '''
+    if _tracer is not None:
+        _tracer.flush()
+
+
+def close() -> None:
+    '''
+    Flushes and closes the configured tracer and turns tracing off.
+    '''
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+# Don't lose the last spans of a run that stops with an error
+atexit.register(flush)
+
+
+def trace_paths(name:str=None, trace_dir:str=TRACE_DIR) -> tuple[str, str]:
+    '''
+    Returns the JSON log path and Chrome trace path for a run called `name`, or `trace_{timestamp}` if None, in `trace_dir`.
+    '''
+    if name is None:
+        name = f'trace_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    return f'{trace_dir}/{name}.jsonl', f'{trace_dir}/{name}.json'
+
+
+def write_chrome_trace(log_path:str, trace_path:str) -> int:
+    '''
+    Converts the JSON log written by `Tracer` to `log_path` into a Chrome trace at `trace_path`, with times measured from the first span in the
+    log. Returns the number of events written.
+    '''
+    events = []
+    with open(log_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A worker killed mid-write can leave a partial line
+                continue
+    if len(events) > 0:
+        first = min(e['ts'] for e in events)
+        for e in events:
+            e['ts'] -= first
+            if e['ph'] == 'i':
+                e['s'] = 't'
+    os.makedirs(os.path.dirname(trace_path) or '.', exist_ok=True)
+    with open(trace_path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents':events, 'displayTimeUnit':'ms'}, f)
+    return len(events)
+
+
+def _format_attrs(attrs:dict) -> str:
+    if len(attrs) == 0:
+        return ''
+    return ' (' + ', '.join(f'{k}={v}' for k, v in attrs.items()) + ')'
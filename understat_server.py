@@ -0,0 +1,280 @@
+# Imports
+import json
+import os
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from sys import argv
+from fetch import RateLimiter, BURST
+from response_cache import CACHE_DIR
+from synthetic import generate_season
+
+
+class StandInServer:
+    '''
+    Local HTTP server that answers the Understat endpoints used by `UnderstatFetcher` (`getLeagueData/{league}/{season}` and
+    `getMatchData/{id}`) from synthetic or recorded data, so the fetch path can be tested and benchmarked without touching the live site. Each
+    request can be delayed by a fixed latency plus random jitter, fail with a 503 at a given rate, or be refused with a 429 once it goes over a
+    token bucket rate limit, the same way Understat behaves under load. `/stats` returns the request counters as JSON.
+
+        fixtures, shots = generate_season('EPL', '2025')
+        with StandInServer({('EPL', '2025'): (fixtures, shots)}, latency=0.2, error_rate=0.02) as server:
+            get_league_shot_data('EPL', '2025', base_url=server.url)
+
+    The server runs on a background thread. Point anything that fetches from Understat at it with `base_url`, or by setting the
+    `UNDERSTAT_URL` environment variable to `server.url`.
+    '''
+
+    def __init__(self, seasons:dict, latency:float=0.0, jitter:float=0.0, error_rate:float=0.0, rate_limit:float=None, burst:int=BURST,
+                 host:str='127.0.0.1', port:int=0, seed:int=0) -> None:
+        '''
+        :param seasons: The (fixtures, shots) for each (league, season) to serve, as returned by `synthetic.generate_season` or `load_cache`.
+        :type seasons: dict
+        :param latency: Seconds to wait before answering each request. Default value: `0.0`
+        :type latency: float
+        :param jitter: Up to this many more seconds are added to each request's latency at random. Default value: `0.0`
+        :type jitter: float
+        :param error_rate: Fraction of requests answered with a 503 error. Default value: `0.0`
+        :type error_rate: float
+        :param rate_limit: Average number of requests per second allowed before requests are refused with a 429. No limit if None. Default
+            value: `None`
+        :type rate_limit: float
+        :param burst: Number of requests allowed back to back before `rate_limit` applies. Default value: `4`
+        :type burst: int
+        :param host: Address to listen on. Default value: `'127.0.0.1'`
+        :type host: str
+        :param port: Port to listen on. A free port is picked if 0. Default value: `0`
+        :type port: int
+        :param seed: Seed for the latency jitter and injected errors. Default value: `0`
+        :type seed: int
+        '''
+        self.fixtures = {}
+        self.shots = {}
+        for (league, season), (fixtures, shots) in seasons.items():
+            self.fixtures[(league, str(season))] = fixtures
+            self.shots.update(shots)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.limiter = RateLimiter(rate_limit, burst) if rate_limit is not None else None
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {'requests':0, 'errors':0, 'rate_limited':0, 'not_found':0, 'in_flight':0, 'max_in_flight':0}
+        self.httpd = ThreadingHTTPServer((host, port), _handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        '''
+        URL of the server, to pass as `base_url`.
+        '''
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/'
+
+    def start(self):
+        '''
+        Starts answering requests on a background thread and returns the server.
+        '''
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='understat-server', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        '''
+        Stops the server and closes its socket.
+        '''
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def serve_forever(self) -> None:
+        '''
+        Answers requests on the calling thread until interrupted.
+        '''
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+    def respond(self, path:str) -> tuple[int, object]:
+        '''
+        Returns the status code and JSON body to answer a GET request for `path` with, after any latency, rate limiting and injected errors.
+        '''
+        parts = path.split('?')[0].strip('/').split('/')
+        if parts[0] == 'stats':
+            with self.lock:
+                return 200, dict(self.stats)
+
+        with self.lock:
+            self.stats['requests'] += 1
+        if self.limiter is not None and not self.limiter.try_acquire():
+            self._count('rate_limited')
+            return 429, {'error':'Too many requests'}
+        with self.lock:
+            delay = self.latency + (self.random.uniform(0, self.jitter) if self.jitter > 0 else 0)
+            fail = self.error_rate > 0 and self.random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            self._count('errors')
+            return 503, {'error':'Service unavailable'}
+
+        if parts[0] == 'getLeagueData' and len(parts) == 3 and (parts[1], parts[2]) in self.fixtures:
+            return 200, {'teams':{}, 'players':[], 'dates':self.fixtures[(parts[1], parts[2])]}
+        if parts[0] == 'getMatchData' and len(parts) == 2 and parts[1] in self.shots:
+            return 200, {'shots':self.shots[parts[1]], 'rosters':{}}
+        self._count('not_found')
+        return 404, {'error':'Not found'}
+
+    def _count(self, key:str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _handler(server:StandInServer):
+    '''
+    Returns a request handler class that answers requests from `server`.
+    '''
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with server.lock:
+                server.stats['in_flight'] += 1
+                server.stats['max_in_flight'] = max(server.stats['max_in_flight'], server.stats['in_flight'])
+            try:
+                status, body = server.respond(self.path)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                if status == 429:
+                    self.send_header('Retry-After', '1')
+                self.end_headers()
+                self.wfile.write(data)
+            finally:
+                with server.lock:
+                    server.stats['in_flight'] -= 1
+
+        def log_message(self, format, *args):
+            # Answering hundreds of requests a second would flood the console
+            pass
+
+    return Handler
+
+
+def load_cache(cache_dir:str=CACHE_DIR) -> dict:
+    '''
+    Loads responses recorded by a `ResponseCache` so they can be replayed by a `StandInServer`. Every recorded match is served, whichever
+    season it came from.
+
+    :param cache_dir: Folder the responses were cached in. Default value: `'./data/cache'`
+    :type cache_dir: str
+    :returns seasons: The (fixtures, shots) for each recorded (league, season).
+    :rtype seasons: dict
+    '''
+    shots = {}
+    match_dir = f'{cache_dir}/getMatchData'
+    if os.path.isdir(match_dir):
+        for file in os.listdir(match_dir):
+            if file.endswith('.json'):
+                with open(f'{match_dir}/{file}', 'r', encoding='utf-8') as f:
+                    shots[file[:-5]] = json.load(f)['data']
+    seasons = {}
+    league_dir = f'{cache_dir}/getLeagueData'
+    if os.path.isdir(league_dir):
+        for file in os.listdir(league_dir):
+            if file.endswith('.json'):
+                # League IDs can contain underscores (e.g. La_Liga), but seasons can't
+                league, season = file[:-5].rsplit('_', 1)
+                with open(f'{league_dir}/{file}', 'r', encoding='utf-8') as f:
+                    seasons[(league, season)] = (json.load(f)['data'], {})
+    if len(seasons) == 0:
+        raise FileNotFoundError(f'No recorded fixture lists found in {league_dir}.')
+    # The shots aren't split by season in the cache, so hand them all to the first season
+    first = next(iter(seasons))
+    seasons[first] = (seasons[first][0], shots)
+    return seasons
+
+
+if __name__ == '__main__':
+    port = 8000
+    leagues = ['EPL']
+    seasons = ['2025']
+    n_matches = None
+    played = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+    rate_limit = None
+    cache_dir = None
+    seed = 0
+    if len(argv) > 1:
+        cl_args = argv[1:]
+        if cl_args[0] in ('-h','--help'):
+            print('''
+    -h\t\tPrint this help page.
+    -p\t\tPort to listen on (default 8000)
+    -l\t\tComma separated league ID(s) to generate synthetic seasons for (default EPL)
+    -s\t\tComma separated season ID(s) to generate synthetic seasons for (default 2025)
+    -n\t\tNumber of fixtures in each synthetic season (default 380)
+    -pl\t\tNumber of fixtures in each synthetic season that have been played (default all)
+    -d\t\tReplay responses recorded in this response cache folder instead of generating seasons, e.g. ./data/cache
+    -lt\t\tSeconds to wait before answering each request (default 0)
+    -j\t\tUp to this many more seconds added to each request's wait at random (default 0)
+    -e\t\tFraction of requests answered with a 503 error (default 0)
+    -r\t\tAverage requests per second allowed before requests are refused with a 429 (default no limit)
+    -seed\tRandom seed for the synthetic seasons, jitter and errors (default 0)'''
+            )
+            exit()
+        if len(cl_args) % 2 != 0:
+            raise ValueError(f'No value provided for command line option {cl_args[-1]}.')
+        for key, value in zip(cl_args[::2], cl_args[1::2]):
+            match key:
+                case "-p":
+                    port = int(value)
+                case "-l":
+                    leagues = value.split(',')
+                case "-s":
+                    seasons = value.split(',')
+                case "-n":
+                    n_matches = int(value)
+                case "-pl":
+                    played = int(value)
+                case "-d":
+                    cache_dir = value
+                case "-lt":
+                    latency = float(value)
+                case "-j":
+                    jitter = float(value)
+                case "-e":
+                    error_rate = float(value)
+                case "-r":
+                    rate_limit = float(value)
+                case "-seed":
+                    seed = int(value)
+                case _:
+                    raise ValueError(f'Unknown command line argument {key} with value {value}')
+
+    if cache_dir is not None:
+        data = load_cache(cache_dir)
+    else:
+        data = {}
+        for i, league in enumerate(leagues):
+            for j, season in enumerate(seasons):
+                # Give each league and season its own range of match IDs
+                first_id = 1000000 + (i * len(seasons) + j) * 10000
+                data[(league, season)] = generate_season(league, season, n_matches=n_matches, played=played, first_id=first_id, seed=seed)
+    server = StandInServer(data, latency, jitter, error_rate, rate_limit, port=port, seed=seed)
+    n_served = sum(len(shots) for fixtures, shots in data.values())
+    print(f'Serving {len(data)} season(s) and {n_served} matches at {server.url}. Set UNDERSTAT_URL={server.url} or pass -u {server.url} to main.py.')
+    server.serve_forever()
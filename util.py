@@ -1,45 +1,174 @@
+import numpy as np
+
+
+def _fold_shot(dist:list[float], s:float, n_shots:int) -> None:
+    '''
+    Folds a single shot with xG `s` into the truncated goal distribution `dist` in place. `n_shots` is the number of shots in `dist` including
+    this one, used to skip counts that cannot have a non-zero probability yet.
+    '''
+    # Work down from the highest count so dist[n-1] still holds the value from before this shot
+    for n in range(min(n_shots, len(dist) - 1), 0, -1):
+        dist[n] = dist[n] * (1 - s) + dist[n-1] * s
+    dist[0] = dist[0] * (1 - s)
+
+
+def goal_distribution(shots, max_goals:int=3) -> list[float]:
+    '''
+    Returns the probability of exactly 0, 1, ..., `max_goals` goals being scored from `shots`, treating each shot as an independent Bernoulli trial
+    with a success probability equal to its xG (i.e. the Poisson-binomial distribution truncated at `max_goals`). Built in a single pass over the
+    shots, folding each shot into the running distribution, so the cost is O(len(shots) * max_goals) rather than growing combinatorially with n.
+
+    :param shots: xG value of each shot (or attack).
+    :type shots: list[float]
+    :param max_goals: Largest number of goals to return the exact probability for. Default value: `3`
+    :type max_goals: int
+    :returns dist: List of length `max_goals + 1` where `dist[n]` is the probability of exactly n goals. Probabilities of more than `max_goals`
+        goals are not included, so `1 - sum(dist)` is the probability of scoring more than `max_goals`.
+    :rtype dist: list[float]
+    '''
+    if max_goals < 0:
+        raise ValueError(f'max_goals must be 0 or greater, not {max_goals}.')
+    dist = [1] + [0] * max_goals
+    n_shots = 0
+    for s in shots:
+        n_shots += 1
+        _fold_shot(dist, s, n_shots)
+    return dist
+
+
 def prob(shots, n):
-    result = 0
-    match n:
-        case 0:
-            sub = 1
-            for s in shots:
-                sub = sub * (1-s)
-            result += sub
-        case 1:
-            for i in range(len(shots)):
-                sub = 1
-                for c in range(len(shots)):
-                    if c == i:
-                        sub = sub * shots[c]
-                    else:
-                        sub = sub * (1 - shots[c])
-                result += sub
-        case 2:
-            if len(shots) < 2:
-                return 0
-            for i in range(len(shots)-1):
-                for j in range(i+1,len(shots)):
-                    sub = 1
-                    for c in range(len(shots)):
-                        if c == i or c == j:
-                            sub = sub * shots[c]
-                        else:
-                            sub = sub * (1 - shots[c])
-                    result += sub
-        case 3:
-            if len(shots) < 3:
-                return 0
-            for i in range(len(shots)-2):
-                for j in range(i+1,len(shots)-1):
-                    for k in range(j+1,len(shots)):
-                        sub = 1
-                        for c in range(len(shots)):
-                            if c == i or c == j or c == k:
-                                sub = sub * shots[c]
-                            else:
-                                sub = sub * (1 - shots[c])
-                        result += sub
-        case _:
-            raise ValueError('3 is the largest number forget about it')
-    return result
\ No newline at end of file
+    '''
+    Returns the probability of exactly `n` goals being scored from `shots`. Thin wrapper around `goal_distribution`.
+
+    :param shots: xG value of each shot (or attack).
+    :type shots: list[float]
+    :param n: Number of goals.
+    :type n: int
+    :returns result: Probability of exactly `n` goals being scored.
+    :rtype result: float
+    '''
+    if n < 0:
+        raise ValueError(f'Cannot score {n} goals.')
+    return goal_distribution(shots, n)[n]
+
+
+class GoalAccumulator:
+    '''
+    Running goal distribution for one team in one match. Each new shot (or attack) is folded in with `add` in O(`max_goals`), so following a match
+    shot by shot costs the same as computing its final distribution once. Can be fed from a saved match or from a live, in-progress match feed.
+
+    :param max_goals: Largest number of goals to track the exact probability for. Anything above is reported as a single "more than" bin by
+        `probabilities`. Default value: `3`
+    :type max_goals: int
+    :param shots: Optional xG values to start from. Default value: `None`
+    :type shots: list[float]
+    '''
+    def __init__(self, max_goals:int=3, shots=None):
+        if max_goals < 0:
+            raise ValueError(f'max_goals must be 0 or greater, not {max_goals}.')
+        self.max_goals = max_goals
+        self.dist = [1] + [0] * max_goals
+        self.n_shots = 0
+        self.xG = 0
+        if shots is not None:
+            self.extend(shots)
+
+    def add(self, xG:float) -> None:
+        '''
+        Folds one shot (or attack) with probability `xG` of being scored into the distribution.
+        '''
+        self.n_shots += 1
+        self.xG += xG
+        _fold_shot(self.dist, xG, self.n_shots)
+
+    def extend(self, shots) -> None:
+        '''
+        Folds each xG value in `shots` into the distribution in order.
+        '''
+        for s in shots:
+            self.add(s)
+
+    def copy(self) -> 'GoalAccumulator':
+        '''
+        Returns an independent copy of the accumulator, e.g. to try out a hypothetical shot without changing the live state.
+        '''
+        other = GoalAccumulator(self.max_goals)
+        other.dist = self.dist.copy()
+        other.n_shots = self.n_shots
+        other.xG = self.xG
+        return other
+
+    @property
+    def distribution(self) -> list[float]:
+        '''
+        Probability of exactly 0, 1, ..., `max_goals` goals from the shots added so far.
+        '''
+        return self.dist.copy()
+
+    def probabilities(self) -> list[float]:
+        '''
+        Probability of exactly 0, 1, ..., `max_goals` goals, followed by the probability of more than `max_goals` goals, i.e. the bins used for
+        the frame data (`h_0`...`h_4` for the default `max_goals` of 3).
+        '''
+        probs = self.dist.copy()
+        probs.append(1 - sum(probs))
+        return probs
+
+    @property
+    def at_least(self) -> list[float]:
+        '''
+        Probability of at least 0, 1, ..., `max_goals + 1` goals from the shots added so far.
+        '''
+        probs = self.probabilities()
+        return [sum(probs[n:]) for n in range(len(probs))]
+
+
+def batch_goal_distribution(xG, mask=None, max_goals:int=3, prefix:bool=False) -> np.ndarray:
+    '''
+    Vectorised version of `goal_distribution` for many matches (or teams) at once. Shots are folded in one shot index at a time using NumPy array
+    operations across every row, so a whole season is computed in `n_shots` array steps instead of a Python loop per match. Uses the same
+    recurrence as `goal_distribution`, so `result[i]` matches `goal_distribution(shots_i, max_goals)` for the shots in row i.
+
+    :param xG: Array of shape (matches, shots) holding the xG of each shot, padded to the length of the longest row.
+    :type xG: np.ndarray
+    :param mask: Boolean array with the same shape as `xG` that is True for real shots and False for padding. If None, NaN values in `xG` are
+        treated as padding. Default value: `None`
+    :type mask: np.ndarray
+    :param max_goals: Largest number of goals to return the exact probability for. Default value: `3`
+    :type max_goals: int
+    :param prefix: If True, return the distribution after every shot index rather than just the final one. Default value: `False`
+    :type prefix: bool
+    :returns dist: Array of shape (matches, `max_goals` + 1) holding the probability of exactly n goals for each row or, if `prefix` is True, an
+        array of shape (matches, shots, `max_goals` + 1) where `dist[i, j]` is the distribution for row i after its first j + 1 shots. Padded
+        positions repeat the distribution of the last real shot before them.
+    :rtype dist: np.ndarray
+    '''
+    if max_goals < 0:
+        raise ValueError(f'max_goals must be 0 or greater, not {max_goals}.')
+    xG = np.asarray(xG, dtype=np.float64)
+    if xG.ndim != 2:
+        raise ValueError(f'xG must be a 2D (matches, shots) array, not {xG.ndim}D.')
+    if mask is None:
+        mask = ~np.isnan(xG)
+    else:
+        mask = np.asarray(mask, dtype=bool)
+        if mask.shape != xG.shape:
+            raise ValueError(f'mask shape {mask.shape} does not match xG shape {xG.shape}.')
+    # Padding becomes a shot with 0 xG, which leaves the distribution unchanged
+    shots = np.where(mask, xG, 0.0)
+
+    n_rows, n_cols = shots.shape
+    dist = np.zeros((n_rows, max_goals + 1))
+    dist[:, 0] = 1
+    if prefix:
+        prefixes = np.empty((n_rows, n_cols, max_goals + 1))
+    for c in range(n_cols):
+        s = shots[:, c:c+1]
+        # Right hand side is evaluated before assignment, so every count uses the values from before this shot
+        dist[:, 1:] = dist[:, 1:] * (1 - s) + dist[:, :-1] * s
+        dist[:, 0] = dist[:, 0] * (1 - s[:, 0])
+        if prefix:
+            prefixes[:, c] = dist
+    if prefix:
+        return prefixes
+    return dist
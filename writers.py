@@ -0,0 +1,347 @@
+# Imports
+import numpy as np
+import shutil
+import subprocess
+from PIL import Image, GifImagePlugin
+
+# Palette index left free in every GIF palette for pixels that are unchanged from the previous frame
+TRANSPARENT_INDEX = 255
+
+# File extension for each animation format
+FILE_EXTENSIONS = {
+    'gif':'gif',
+    'mp4':'mp4',
+    'webm':'webm',
+    'webp':'webp',
+    'apng':'png'
+}
+
+
+def gif_palette(frames:list[np.ndarray], colours:int=TRANSPARENT_INDEX) -> np.ndarray:
+    '''
+    Builds one palette to share between every frame of an animation from a sample of its frames. For the match animations the first and last
+    frames between them show the background, both teams' colours and crests, and every shot marker, so they cover the colours of the frames in
+    between.
+
+    :param frames: Sample frames as (height, width, 3 or 4) uint8 arrays.
+    :type frames: list[np.ndarray]
+    :param colours: Maximum number of colours in the palette, at most 255 so one index is left for transparency. Default value: `255`
+    :type colours: int
+    :returns palette: (colours, 3) uint8 array of the palette's RGB values, which can be passed to `GifWriter`.
+    :rtype palette: np.ndarray
+    '''
+    sample = np.concatenate([np.asarray(frame)[:, :, :3] for frame in frames], axis=0)
+    palette = Image.fromarray(sample).quantize(colours).getpalette()
+    return np.array(palette, dtype=np.uint8).reshape(-1, 3)[:colours]
+
+
+class GifWriter:
+    '''
+    Writes an animated GIF one frame at a time, straight from RGBA arrays such as the Agg canvas buffer. Every frame is mapped onto one shared
+    palette, stored once as the global colour table, and only the region that changed since the previous frame is encoded, with the unchanged
+    pixels inside it left transparent so they compress to almost nothing. Frames that come out the same as the previous one are merged into it by
+    extending its duration. Only the previous frame and the one waiting to be written are kept,
+    so memory use doesn't grow with the length of the animation.
+
+    Frames are assumed to be opaque, as the match figure always is, so any alpha channel is ignored.
+
+    Use as a context manager, or call `close()` once the last frame has been written:
+
+        with GifWriter(path, palette) as writer:
+            for frame in frames:
+                writer.write(frame, 33)
+    '''
+
+    def __init__(self, path:str, palette:np.ndarray=None, loop:int=0) -> None:
+        '''
+        :param path: File to write the GIF to.
+        :type path: str
+        :param palette: Palette as returned by `gif_palette`. If None, the palette is built from the first frame. Default value: `None`
+        :type palette: np.ndarray
+        :param loop: Number of times the animation repeats, with 0 looping forever. Default value: `0`
+        :type loop: int
+        '''
+        self.path = path
+        self.palette = palette
+        # Palette index of each colour seen so far, as sorted packed RGB values and the index for each
+        self.known_colours = np.zeros(0, dtype=np.uint32)
+        self.known_indices = np.zeros(0, dtype=np.uint8)
+        self.loop = loop
+        self.file = open(path, 'wb')
+        self.n_frames = 0
+        # RGB pixels of the last frame seen, to find the region each new frame changes
+        self.previous = None
+        # Frame waiting to be written, held back in case the next frame is the same and its duration needs extending
+        self.pending = None
+
+    def write(self, frame:np.ndarray, duration:int) -> None:
+        '''
+        Adds `frame`, a (height, width, 3 or 4) uint8 array, to the animation for `duration` milliseconds. The array is copied, so it can be a
+        view of a buffer that is redrawn afterwards.
+        '''
+        rgb = np.asarray(frame)[:, :, :3]
+        if self.previous is None:
+            if self.palette is None:
+                self.palette = gif_palette([rgb])
+            self.palette = self.palette[:TRANSPARENT_INDEX]
+            image = self._quantize(rgb)
+            header, _ = GifImagePlugin.getheader(image, info={'loop':self.loop, 'duration':duration})
+            self.file.write(b''.join(header))
+            self.pending = (image, (0, 0), {'duration':duration})
+            self.previous = rgb.copy()
+            self.n_frames += 1
+            return
+
+        changed = np.any(rgb != self.previous, axis=2)
+        rows = np.flatnonzero(changed.any(axis=1))
+        if rows.shape[0] == 0:
+            self.pending[2]['duration'] += duration
+            return
+        cols = np.flatnonzero(changed.any(axis=0))
+        top, bottom, left, right = rows[0], rows[-1] + 1, cols[0], cols[-1] + 1
+
+        # Only the changed region is mapped onto the palette and encoded, drawn over the previous frame at its offset
+        self._flush()
+        image = self._quantize(rgb[top:bottom, left:right], changed[top:bottom, left:right])
+        self.pending = (image, (int(left), int(top)), {'duration':duration, 'transparency':TRANSPARENT_INDEX})
+        self.previous[top:bottom, left:right] = rgb[top:bottom, left:right]
+        self.n_frames += 1
+
+    def close(self) -> None:
+        '''
+        Writes the last frame and the end of the GIF, and closes the file.
+        '''
+        if self.file.closed:
+            return
+        self._flush()
+        self.file.write(b';')
+        self.file.close()
+
+    def _quantize(self, rgb:np.ndarray, changed:np.ndarray=None) -> Image.Image:
+        '''
+        Maps each pixel of `rgb` to the nearest colour in the palette, or to the transparent index where `changed` is False. PIL's own mapping
+        onto a fixed palette looks colours up at reduced precision, which visibly shifts the anti-aliased edges, so the nearest colour is found
+        exactly, once for each distinct colour.
+        '''
+        packed = (rgb[:, :, 0].astype(np.uint32) << 16) | (rgb[:, :, 1].astype(np.uint32) << 8) | rgb[:, :, 2]
+        colours, inverse = np.unique(packed, return_inverse=True)
+
+        # Colours that haven't been seen in an earlier frame are matched to the palette and remembered
+        position = np.searchsorted(self.known_colours, colours)
+        seen = position < self.known_colours.shape[0]
+        seen[seen] = self.known_colours[position[seen]] == colours[seen]
+        new = colours[~seen]
+        if new.shape[0] > 0:
+            new_rgb = np.column_stack([(new >> 16) & 255, (new >> 8) & 255, new & 255]).astype(np.int32)
+            distance = ((new_rgb[:, None, :] - self.palette[None, :, :].astype(np.int32)) ** 2).sum(axis=2)
+            known_colours = np.concatenate([self.known_colours, new])
+            order = np.argsort(known_colours)
+            self.known_colours = known_colours[order]
+            self.known_indices = np.concatenate([self.known_indices, np.argmin(distance, axis=1).astype(np.uint8)])[order]
+
+        indices = self.known_indices[np.searchsorted(self.known_colours, colours)]
+        pixels = indices[inverse.reshape(packed.shape)]
+        if changed is not None:
+            pixels[~changed] = TRANSPARENT_INDEX
+        image = Image.fromarray(pixels, 'P')
+        # Pad the palette so the transparent index is always part of the colour table
+        palette = np.zeros((TRANSPARENT_INDEX + 1, 3), dtype=np.uint8)
+        palette[:self.palette.shape[0]] = self.palette
+        image.putpalette(palette.tobytes())
+        return image
+
+    def _flush(self) -> None:
+        if self.pending is not None:
+            image, offset, params = self.pending
+            self.file.write(b''.join(GifImagePlugin.getdata(image, offset, **params)))
+            self.pending = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class FfmpegWriter:
+    '''
+    Writes an animation by piping raw RGBA frames to a local ffmpeg binary, which encodes them as they arrive so nothing is held in this process.
+    ffmpeg reads frames at a constant `fps`, so a frame shown for longer than one frame is repeated, which costs almost nothing to encode.
+    '''
+
+    # Encoder options for each output format. yuv420p needs even dimensions, so video formats pad the frame by up to a pixel
+    CODECS = {
+        'mp4':['-c:v', 'libx264', '-preset', 'medium', '-crf', '23', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+               '-movflags', '+faststart', '-f', 'mp4'],
+        'webm':['-c:v', 'libvpx-vp9', '-crf', '32', '-b:v', '0', '-row-mt', '1', '-pix_fmt', 'yuv420p', '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+                '-f', 'webm'],
+        'webp':['-c:v', 'libwebp_anim', '-lossless', '1', '-compression_level', '4', '-loop', '0', '-f', 'webp'],
+        'apng':['-plays', '0', '-f', 'apng'],
+    }
+
+    def __init__(self, path:str, animation_format:str, fps:int=30, ffmpeg:str=None) -> None:
+        '''
+        :param path: File to write the animation to.
+        :type path: str
+        :param animation_format: One of 'mp4', 'webm', 'webp' or 'apng'.
+        :type animation_format: str
+        :param fps: Frame rate of the output. Default value: `30`
+        :type fps: int
+        :param ffmpeg: Path to the ffmpeg binary. Found on the PATH if None. Default value: `None`
+        :type ffmpeg: str
+        '''
+        if animation_format not in self.CODECS:
+            raise ValueError(f'FfmpegWriter can\'t write {animation_format}. Use one of {", ".join(self.CODECS)}.')
+        self.ffmpeg = ffmpeg or shutil.which('ffmpeg')
+        if self.ffmpeg is None:
+            raise FileNotFoundError(f'ffmpeg is needed to write {animation_format} animations but wasn\'t found on the PATH.')
+        self.path = path
+        self.animation_format = animation_format
+        self.fps = fps
+        self.process = None
+        # Total display time written so far in milliseconds, and the number of frames ffmpeg has been sent to cover it
+        self.elapsed = 0
+        self.frames_sent = 0
+
+    def write(self, frame:np.ndarray, duration:int) -> None:
+        '''
+        Adds `frame`, a (height, width, 4) uint8 RGBA array, to the animation for `duration` milliseconds. Raises a RuntimeError with ffmpeg's
+        error output if ffmpeg has stopped, e.g. because its build doesn't include the encoder for the format.
+        '''
+        frame = np.ascontiguousarray(frame)
+        if self.process is None:
+            self._start(frame.shape[1], frame.shape[0])
+
+        # Round the running total rather than each duration, so the animation doesn't drift from its intended length
+        self.elapsed += duration
+        repeats = round(self.elapsed * self.fps / 1000) - self.frames_sent
+        if self.frames_sent == 0:
+            repeats = max(repeats, 1)
+        data = frame.tobytes()
+        try:
+            for _ in range(repeats):
+                self.process.stdin.write(data)
+        except OSError:
+            # ffmpeg exited early and closed the pipe (BrokenPipeError, or EINVAL on Windows). Its error output says why
+            self.close()
+            raise
+        self.frames_sent += repeats
+
+    def close(self) -> None:
+        '''
+        Waits for ffmpeg to finish writing the file. Raises a RuntimeError with ffmpeg's error output if it failed.
+        '''
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.close()
+        except OSError:
+            # Flushing the last frames fails if ffmpeg has already exited
+            pass
+        stderr = self.process.stderr.read()
+        self.process.wait()
+        self.process.stderr.close()
+        returncode = self.process.returncode
+        self.process = None
+        if returncode != 0:
+            raise RuntimeError(f'ffmpeg failed to write {self.path} (exit code {returncode}): {stderr.decode(errors="replace").strip()}')
+
+    def _start(self, width:int, height:int) -> None:
+        command = [
+            self.ffmpeg, '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'rgba', '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+            *self.CODECS[self.animation_format], self.path
+        ]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class PillowWriter:
+    '''
+    Writes an animated WebP or APNG with Pillow, for when ffmpeg isn't available. Pillow's encoders for these formats take every frame at once,
+    so frames are kept in memory (merging any that repeat the previous frame) until `close()` is called.
+    '''
+
+    # Lossless WebP is both smaller and quicker to encode than lossy for flat graphics like the match figure
+    FORMATS = {
+        'webp':('WEBP', {'lossless':True, 'quality':80, 'method':4, 'minimize_size':True}),
+        'apng':('PNG', {}),
+    }
+
+    def __init__(self, path:str, animation_format:str) -> None:
+        '''
+        :param path: File to write the animation to.
+        :type path: str
+        :param animation_format: 'webp' or 'apng'.
+        :type animation_format: str
+        '''
+        if animation_format not in self.FORMATS:
+            raise ValueError(f'PillowWriter can\'t write {animation_format}. Use one of {", ".join(self.FORMATS)}.')
+        self.path = path
+        self.animation_format = animation_format
+        self.images = []
+        self.durations = []
+        self.previous = None
+
+    def write(self, frame:np.ndarray, duration:int) -> None:
+        '''
+        Adds `frame`, a (height, width, 3 or 4) uint8 array, to the animation for `duration` milliseconds.
+        '''
+        rgb = np.asarray(frame)[:, :, :3]
+        if self.previous is not None and np.array_equal(rgb, self.previous):
+            self.durations[-1] += duration
+            return
+        self.previous = rgb.copy()
+        self.images.append(Image.fromarray(self.previous))
+        self.durations.append(duration)
+
+    def close(self) -> None:
+        '''
+        Encodes the frames and writes the file.
+        '''
+        if not self.images:
+            return
+        pil_format, params = self.FORMATS[self.animation_format]
+        self.images[0].save(self.path, pil_format, save_all=True, append_images=self.images[1:], duration=self.durations, loop=0, **params)
+        self.images = []
+        self.durations = []
+        self.previous = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def animation_writer(path:str, animation_format:str='gif', palette:np.ndarray=None, fps:int=30):
+    '''
+    Returns a writer for an animation in `animation_format`. GIFs are written by `GifWriter`, MP4 and WebM by `FfmpegWriter`, and WebP and APNG
+    by `FfmpegWriter` if ffmpeg is on the PATH, falling back to `PillowWriter` if not. Every writer has the same `write(frame, duration)` and
+    `close()` methods and can be used as a context manager.
+
+    :param path: File to write the animation to, which should end with `FILE_EXTENSIONS[animation_format]`.
+    :type path: str
+    :param animation_format: One of the keys of `FILE_EXTENSIONS`. Default value: `'gif'`
+    :type animation_format: str
+    :param palette: Shared palette for GIFs, as returned by `gif_palette`. Ignored for other formats. Default value: `None`
+    :type palette: np.ndarray
+    :param fps: Frame rate for the ffmpeg formats, which repeat frames to make up longer durations. Default value: `30`
+    :type fps: int
+    '''
+    match animation_format:
+        case 'gif':
+            return GifWriter(path, palette)
+        case 'mp4' | 'webm':
+            return FfmpegWriter(path, animation_format, fps)
+        case 'webp' | 'apng':
+            if shutil.which('ffmpeg') is not None:
+                return FfmpegWriter(path, animation_format, fps)
+            return PillowWriter(path, animation_format)
+        case _:
+            raise ValueError(f'Unknown animation format "{animation_format}". Use one of {", ".join(FILE_EXTENSIONS)}.')